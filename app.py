@@ -1,19 +1,29 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, render_template, request, jsonify, send_from_directory, make_response
+from flask.json.provider import DefaultJSONProvider
 from flask_socketio import SocketIO, emit
 import subprocess
 import json
+import functools
+import hashlib
 import os
 import tempfile
 import threading
 import shutil
 import sys
 import time
+import uuid
 import signal
 import atexit
+from contextlib import closing
 import psutil
-from database import db
+from database import db, TYPED_COLUMN_NAMES
 import logging
-from background_tasks import updater
+from background_tasks import updater, RESOURCE_TYPES
+from kubectl_stream import KubectlItemStream
+from cluster_snapshot import snapshots
+from serializer import serializer
+from response_compression import compress_response
+from resource_fields import parse_cpu_to_millicores, parse_memory_to_bytes, parse_fields, extract_typed_columns
 import pty
 import select
 import struct
@@ -35,7 +45,20 @@ try:
 except ImportError:
     print("Git module could not be imported. GitHub update functionality will be disabled.")
 
+class SerializerJSONProvider(DefaultJSONProvider):
+    """jsonify and request.get_json through the configured serializer (orjson when available), formatting values the same way."""
+
+    def dumps(self, obj, **kwargs):
+        if serializer.name == 'json':
+            return super().dumps(obj, **kwargs)
+        return serializer.dumps(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys),
+                                default=kwargs.get('default', self.default))
+
+    def loads(self, s, **kwargs):
+        return serializer.loads(s)
+
 app = Flask(__name__)
+app.json = SerializerJSONProvider(app)
 # Configure SocketIO with enhanced settings for reliability
 socketio = SocketIO(
     app, 
@@ -56,8 +79,15 @@ socketio = SocketIO(
 # Get GitHub repo URL from environment variable or use default
 github_repo_url = os.environ.get('GITHUB_REPO_URL', 'https://github.com/AlexanderOllman/PodManager.git')
 
-def run_kubectl_command(command_list, is_json_output: bool = True) -> Optional[Union[dict, str]]:
-    """Runs a kubectl command and returns its output."""
+def run_kubectl_command(command_list, is_json_output: bool = True, stream: bool = False) -> Optional[Union[dict, str, KubectlItemStream]]:
+    """
+    Runs a kubectl command and returns its output.
+    With stream=True the command must print a JSON list; a KubectlItemStream is returned that yields
+    the items as they are decoded from the pipe and raises on failure while being iterated.
+    """
+    if stream:
+        logging.info(f"Streaming kubectl command: kubectl {' '.join(command_list)}")
+        return KubectlItemStream(['kubectl'] + command_list)
     try:
         full_command = ['kubectl'] + command_list
         logging.info(f"Running kubectl command: {' '.join(full_command)}")
@@ -69,7 +99,7 @@ def run_kubectl_command(command_list, is_json_output: bool = True) -> Optional[U
             return None
         
         if is_json_output:
-            return json.loads(stdout)
+            return serializer.loads(stdout)
         return stdout.strip()
     except subprocess.TimeoutExpired:
         logging.error(f"Timeout running kubectl command: {' '.join(full_command)}")
@@ -86,66 +116,11 @@ def run_kubectl_command(command_list, is_json_output: bool = True) -> Optional[U
         return None
 
 # --- Helper functions for metrics collection ---
-def parse_cpu_to_millicores(cpu_string: str) -> int:
-    """Converts a CPU string (e.g., '500m', '1', '0.5') to millicores."""
-    if not cpu_string:
-        return 0
-    cpu_string = str(cpu_string).strip()
-    if cpu_string.endswith('m'): # millicores
-        return int(cpu_string[:-1])
-    if cpu_string.endswith('u'): # microcores
-        return int(cpu_string[:-1]) // 1000 
-    if cpu_string.endswith('n'): # nanocores
-        return int(cpu_string[:-1]) // 1000000
-    try:
-        # Assuming it's in full cores if no suffix
-        return int(float(cpu_string) * 1000)
-    except ValueError:
-        logging.warning(f"Could not parse CPU string: {cpu_string}")
-        return 0
-
-def parse_memory_to_bytes(memory_string: str) -> int:
-    """Converts a memory string (e.g., '128Mi', '1Gi', '500Ki', '1024') to bytes."""
-    if not memory_string:
-        return 0
-    memory_string = str(memory_string).strip()
-    multipliers = {
-        'k': 1000, 'ki': 1024,
-        'm': 1000**2, 'mi': 1024**2,
-        'g': 1000**3, 'gi': 1024**3,
-        't': 1000**4, 'ti': 1024**4,
-        'p': 1000**5, 'pi': 1024**5,
-        'e': 1000**6, 'ei': 1024**6,
-    }
-    # Normalize to lowercase and identify multiplier
-    memory_string_lower = memory_string.lower()
-    unit = None
-    value_str = memory_string_lower
-
-    for u in sorted(multipliers.keys(), key=len, reverse=True): # Check longer units first (e.g., 'ki' before 'k')
-        if memory_string_lower.endswith(u):
-            unit = u
-            value_str = memory_string_lower[:-len(u)]
-            break
-    
-    try:
-        value = float(value_str)
-        if unit:
-            return int(value * multipliers[unit])
-        else: # Assume bytes if no unit
-            return int(value)
-    except ValueError:
-        logging.warning(f"Could not parse memory string: {memory_string}")
-        return 0
-
 def _collect_and_store_environment_metrics():
     """Collects cluster-wide metrics and stores them in the database."""
     logging.info("Starting collection of environment metrics...")
     
-    nodes_data = run_kubectl_command(["get", "nodes", "-o", "json"])
-    if not nodes_data or 'items' not in nodes_data:
-        logging.error("Failed to fetch node data or data format is incorrect.")
-        return
+    nodes_stream = run_kubectl_command(["get", "nodes", "-o", "json"], stream=True)
 
     total_pod_capacity = 0
     total_allocatable_pods = 0
@@ -160,63 +135,70 @@ def _collect_and_store_environment_metrics():
     worker_count = 0
     schedulable_nodes = 0
     
-    logging.info(f"Processing {len(nodes_data.get('items', []))} nodes for environment metrics...")
-
-    for node in nodes_data.get('items', []):
-        status = node.get('status', {})
-        capacity = status.get('capacity', {})
-        allocatable = status.get('allocatable', {})
-        metadata = node.get('metadata', {})
-        labels = metadata.get('labels', {})
-        node_name = metadata.get('name', 'unknown')
-        
-        # Check if node is schedulable (not cordoned)
-        spec = node.get('spec', {})
-        is_schedulable = not spec.get('unschedulable', False)
-        
-        # Enhanced control plane detection
-        is_control_plane = (
-            'node-role.kubernetes.io/control-plane' in labels or 
-            'node-role.kubernetes.io/master' in labels or
-            'node-role.kubernetes.io/etcd' in labels
-        )
+    node_count = 0
+    logging.info("Processing nodes for environment metrics as they stream in...")
+
+    try:
+        for node in nodes_stream:
+            node_count += 1
+            status = node.get('status', {})
+            capacity = status.get('capacity', {})
+            allocatable = status.get('allocatable', {})
+            metadata = node.get('metadata', {})
+            labels = metadata.get('labels', {})
+            node_name = metadata.get('name', 'unknown')
         
-        # Check if node has worker role explicitly
-        has_worker_role = (
-            'node-role.kubernetes.io/worker' in labels or
-            'kubernetes.io/role' in labels and labels['kubernetes.io/role'] == 'worker'
-        )
+            # Check if node is schedulable (not cordoned)
+            spec = node.get('spec', {})
+            is_schedulable = not spec.get('unschedulable', False)
         
-        # FIXED LOGIC: Control plane nodes should be excluded from pod allocation
-        # regardless of their schedulable status. We only want true worker nodes
-        # for pod allocation calculations.
-        should_count_for_pod_allocation = (
-            not is_control_plane and  # Not a control plane node
-            is_schedulable           # And is schedulable
-        )
+            # Enhanced control plane detection
+            is_control_plane = (
+                'node-role.kubernetes.io/control-plane' in labels or 
+                'node-role.kubernetes.io/master' in labels or
+                'node-role.kubernetes.io/etcd' in labels
+            )
         
-        # Debug logging
-        if is_control_plane:
-            control_plane_count += 1
-            logging.info(f"Node {node_name} detected as control plane (schedulable: {is_schedulable}) - EXCLUDED from pod allocation")
-        else:
-            worker_count += 1
-            logging.info(f"Node {node_name} detected as worker (schedulable: {is_schedulable}) - {'INCLUDED' if should_count_for_pod_allocation else 'EXCLUDED'} in pod allocation")
+            # Check if node has worker role explicitly
+            has_worker_role = (
+                'node-role.kubernetes.io/worker' in labels or
+                'kubernetes.io/role' in labels and labels['kubernetes.io/role'] == 'worker'
+            )
         
-        if is_schedulable:
-            schedulable_nodes += 1
-
-        # For pod allocation, only count worker nodes that are schedulable
-        if should_count_for_pod_allocation:
-            total_allocatable_pods += int(allocatable.get('pods', 0))
+            # FIXED LOGIC: Control plane nodes should be excluded from pod allocation
+            # regardless of their schedulable status. We only want true worker nodes
+            # for pod allocation calculations.
+            should_count_for_pod_allocation = (
+                not is_control_plane and  # Not a control plane node
+                is_schedulable           # And is schedulable
+            )
         
-        # For capacity and other resources, count all nodes
-        total_pod_capacity += int(capacity.get('pods', 0))
-        total_allocatable_cpu_millicores += parse_cpu_to_millicores(allocatable.get('cpu', '0'))
-        total_allocatable_memory_bytes += parse_memory_to_bytes(allocatable.get('memory', '0'))
-        total_allocatable_gpus += int(allocatable.get('nvidia.com/gpu', 0))
-        total_capacity_cpu_millicores += parse_cpu_to_millicores(capacity.get('cpu', '0'))
-        total_capacity_memory_bytes += parse_memory_to_bytes(capacity.get('memory', '0'))
+            # Debug logging
+            if is_control_plane:
+                control_plane_count += 1
+                logging.info(f"Node {node_name} detected as control plane (schedulable: {is_schedulable}) - EXCLUDED from pod allocation")
+            else:
+                worker_count += 1
+                logging.info(f"Node {node_name} detected as worker (schedulable: {is_schedulable}) - {'INCLUDED' if should_count_for_pod_allocation else 'EXCLUDED'} in pod allocation")
+        
+            if is_schedulable:
+                schedulable_nodes += 1
+
+            # For pod allocation, only count worker nodes that are schedulable
+            if should_count_for_pod_allocation:
+                total_allocatable_pods += int(allocatable.get('pods', 0))
+        
+            # For capacity and other resources, count all nodes
+            total_pod_capacity += int(capacity.get('pods', 0))
+            total_allocatable_cpu_millicores += parse_cpu_to_millicores(allocatable.get('cpu', '0'))
+            total_allocatable_memory_bytes += parse_memory_to_bytes(allocatable.get('memory', '0'))
+            total_allocatable_gpus += int(allocatable.get('nvidia.com/gpu', 0))
+            total_capacity_cpu_millicores += parse_cpu_to_millicores(capacity.get('cpu', '0'))
+            total_capacity_memory_bytes += parse_memory_to_bytes(capacity.get('memory', '0'))
+    except Exception as e:
+        # Partial node lists would understate capacity, so nothing is stored
+        logging.error(f"Failed to fetch node data: {e}")
+        return
 
     # Debug logging
     logging.info(f"Node analysis: {control_plane_count} control plane, {worker_count} worker, {schedulable_nodes} schedulable")
@@ -244,7 +226,7 @@ def _collect_and_store_environment_metrics():
     
     # Log the final calculated metrics for debugging
     logging.info(f"Environment metrics summary:")
-    logging.info(f"  - Total nodes processed: {len(nodes_data.get('items', []))}")
+    logging.info(f"  - Total nodes processed: {node_count}")
     logging.info(f"  - Control plane nodes: {control_plane_count}")
     logging.info(f"  - Worker nodes: {worker_count}")
     logging.info(f"  - Schedulable nodes: {schedulable_nodes}")
@@ -327,6 +309,51 @@ else:
     logger.warning("Control Plane CLI will show an error if initiated, as it cannot exec into the application's pod.")
 # --- End Get App's Pod and Namespace ---
 
+# --- Conditional requests for cache-backed endpoints ---
+# Part of every ETag, so bodies cached by clients of a previous process (possibly older code) never validate
+ETAG_INSTANCE = uuid.uuid4().hex
+
+def cache_etag(resource_types=None, environment_metrics: bool = False, window_seconds: Optional[int] = None):
+    """
+    Make a GET endpoint served from the cache answer If-None-Match with 304. The strong ETag is
+    derived from the sync generations of resource_types (the view's resource_type argument when
+    None), the latest environment metrics row if environment_metrics, and the path and query string.
+    Responses that also depend on the current time (wait times, ages) set window_seconds, which
+    keeps their ETag valid for at most that long. The tag is computed before the view runs, so a
+    sync that lands meanwhile only costs the client one more full response.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            types = resource_types if resource_types is not None else [kwargs['resource_type']]
+            generations = db.get_generations(types)
+            parts = [ETAG_INSTANCE, request.full_path] + [f"{t}={generations[t]}" for t in types]
+            if environment_metrics:
+                parts.append(f"environment_metrics={db.get_latest_environment_metrics_id()}")
+            if window_seconds:
+                parts.append(f"window={int(time.time() // window_seconds)}")
+            etag = hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:32]
+
+            # If-None-Match uses weak comparison, which also matches the tag of a compressed response
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # Clients may keep the body but must revalidate it before each use
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+# --- End Conditional requests ---
+
+@app.after_request
+def compress_json_response(response):
+    """gzip/brotli-encode large JSON responses for clients that accept it (see response_compression.py)."""
+    return compress_response(response, request.headers.get('Accept-Encoding', ''))
+
 # Flask routes and other functions start here
 @app.route('/')
 def index():
@@ -340,29 +367,45 @@ def get_resources():
     critical_only = request.form.get('critical_only', 'false').lower() == 'true'
     
     # Add pagination parameters
-    page = int(request.form.get('page', 1))
-    page_size = int(request.form.get('page_size', 50))
+    page = max(1, int(request.form.get('page', 1)))
+    page_size = max(1, int(request.form.get('page_size', 50)))
     count_only = request.form.get('count_only', 'false').lower() == 'true'
     
+    # Optional server-side sorting, keyset cursor and filters
+    sort_by = request.form.get('sort_by') or None
+    descending = request.form.get('sort_order', 'asc').lower() == 'desc'
+    after = request.form.get('after') or None
+    filters = {
+        'namespace': namespace if namespace and namespace != 'all' else None,
+        'name_prefix': request.form.get('name_prefix') or None,
+        'phase': request.form.get('phase') or None,
+        'node_name': request.form.get('node') or None,
+        # Full Kubernetes selector syntax, e.g. 'app=web,tier!=cache,env in (prod,staging)'
+        'label': request.form.get('label_selector') or request.form.get('label') or None,
+    }
+    
     if not resource_type:
         return jsonify(error="Resource type is required")
     
     try:
-        # Get resources from database
-        if namespace and namespace != 'all':
-            resources = db.get_resources(resource_type, namespace)
-        else:
-            resources = db.get_resources(resource_type)
+        # Optional projection: view=summary|full and/or fields=metadata.name,status.phase,...
+        fields = parse_fields(request.form.get('fields'), request.form.get('view'))
+        
+        # Generation and staleness let clients skip re-rendering unchanged data
+        sync_state = db.get_sync_state(resource_type).get(resource_type, {})
+        
+        # Counting happens in SQL, without decoding any rows
+        total_count = db.count_resources(resource_type, **filters)
         
         # If count_only is true, just return the count
         if count_only:
-            return jsonify(data={"totalCount": len(resources)})
+            return jsonify(data={"totalCount": total_count, "generation": sync_state.get('generation', 0)})
         
-        # Apply pagination
-        total_count = len(resources)
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-        paginated_resources = resources[start_idx:end_idx]
+        # Only the requested page is read and decoded
+        paginated_resources, next_cursor = db.query_resources(
+            resource_type, sort_by=sort_by, descending=descending,
+            limit=page_size, offset=(page - 1) * page_size, after=after, fields=fields, **filters
+        )
         
         # Add pagination metadata
         paginated_data = {
@@ -370,10 +413,17 @@ def get_resources():
             'page': page,
             'pageSize': page_size,
             'totalPages': (total_count + page_size - 1) // page_size,
+            'nextCursor': next_cursor,
+            'generation': sync_state.get('generation', 0),
+            'lastSynced': sync_state.get('last_success'),
+            'stalenessSeconds': sync_state.get('staleness_seconds'),
+            'lastError': sync_state.get('last_error'),
             'items': paginated_resources
         }
         
         return jsonify(data=paginated_data)
+    except ValueError as e:
+        return jsonify(error=f"Invalid query for {resource_type}: {str(e)}"), 400
     except Exception as e:
         logging.error(f"Error getting resources: {str(e)}")
         return jsonify(error=f"Failed to get {resource_type}: {str(e)}")
@@ -585,117 +635,57 @@ def get_namespaces():
         logging.error(f"Error processing namespace data: {e}")
         return jsonify(namespaces=[], error="Unable to fetch namespaces")
 
+def _live_namespace_details():
+    """Namespaces and per-namespace pod request totals straight from the cluster: one namespace list and one all-namespaces pod list."""
+    namespaces_data = run_kubectl_command(["get", "namespaces", "-o", "json"], is_json_output=True)
+    if not namespaces_data or 'items' not in namespaces_data:
+        raise RuntimeError(f"empty or malformed namespace list: {namespaces_data}")
+    
+    totals = {}
+    for pod in run_kubectl_command(["get", "pods", "--all-namespaces", "-o", "json"], stream=True):
+        columns = dict(zip(TYPED_COLUMN_NAMES, extract_typed_columns('pods', pod)))
+        namespace_totals = totals.setdefault(pod.get('metadata', {}).get('namespace'), {
+            'pod_count': 0, 'cpu_request_millicores': 0, 'memory_request_bytes': 0, 'gpu_request': 0
+        })
+        namespace_totals['pod_count'] += 1
+        for key in ('cpu_request_millicores', 'memory_request_bytes', 'gpu_request'):
+            namespace_totals[key] += columns[key]
+    return namespaces_data['items'], totals
+
 @app.route('/get_namespace_details', methods=['GET'])
 def get_namespace_details():
-    """Get detailed information about all namespaces including resource usage."""
-    # Get all namespaces
-    # ns_command = "kubectl get namespaces -o json"
-    ns_command_list = ["get", "namespaces", "-o", "json"]
-    ns_output_dict = run_kubectl_command(ns_command_list, is_json_output=True)
-    
+    """
+    Get detailed information about all namespaces including resource usage.
+    Served from the cached namespaces and the cluster snapshot's per-namespace pod totals;
+    live=true (or a cache that has not synced namespaces yet) reads them from the cluster instead.
+    """
+    live = request.args.get('live', 'false').lower() == 'true'
     try:
-        # namespaces_data = json.loads(ns_output) # No longer needed
-        namespaces_data = ns_output_dict
-        if not namespaces_data or 'items' not in namespaces_data:
-             logging.error(f"Failed to fetch namespaces for details or format incorrect: {namespaces_data}")
-             return jsonify(error="Unable to fetch namespace details (empty or malformed response)")
+        if live or db.get_generation('namespaces') == 0:
+            namespace_items, totals = _live_namespace_details()
+        else:
+            namespace_items = db.get_resources('namespaces')
+            totals = snapshots.current()['by_namespace']
         
         namespaces = []
+        for ns in namespace_items:
+            metadata = ns.get('metadata', {})
+            namespace_totals = totals.get(metadata.get('name'), {})
+            # Format the resource usage for display
+            namespaces.append({
+                'name': metadata.get('name'),
+                'podCount': namespace_totals.get('pod_count', 0),
+                'resources': {
+                    'cpu': round(namespace_totals.get('cpu_request_millicores', 0) / 1000, 2),
+                    'gpu': round(namespace_totals.get('gpu_request', 0), 2),
+                    'memory': round(namespace_totals.get('memory_request_bytes', 0) / (1024 * 1024), 2)  # Memory in MB
+                },
+                'metadata': metadata
+            })
         
-        # For each namespace, get pod count and resource usage
-        for ns in namespaces_data['items']:
-            namespace_name = ns['metadata']['name']
-            
-            # Get pod count
-            # pod_command = f"kubectl get pods -n {namespace_name} -o json"
-            pod_command_list = ["get", "pods", "-n", namespace_name, "-o", "json"]
-            pod_output_dict = run_kubectl_command(pod_command_list, is_json_output=True)
-            
-            try:
-                # pods_data = json.loads(pod_output) # No longer needed
-                pods_data = pod_output_dict
-                if not pods_data or 'items' not in pods_data:
-                    logging.warning(f"Could not retrieve pod data for namespace {namespace_name}, or format incorrect. Assuming 0 pods.")
-                    pod_count = 0
-                    pods_data = {'items': []} # Ensure 'items' exists for loop
-                else:
-                    pod_count = len(pods_data['items'])
-
-                
-                # Calculate resource usage
-                cpu_usage = 0
-                gpu_usage = 0
-                memory_usage = 0
-                
-                for pod in pods_data['items']:
-                    if 'containers' in pod.get('spec', {}):
-                        for container in pod['spec']['containers']:
-                            if 'resources' in container and 'requests' in container['resources']:
-                                requests = container['resources']['requests']
-                                
-                                # CPU usage
-                                if 'cpu' in requests:
-                                    cpu_req = requests['cpu']
-                                    # Convert to numeric value
-                                    if cpu_req.endswith('m'):
-                                        cpu_usage += float(cpu_req[:-1]) / 1000
-                                    else:
-                                        try:
-                                            cpu_usage += float(cpu_req)
-                                        except ValueError:
-                                            pass
-                                
-                                # Memory usage
-                                if 'memory' in requests:
-                                    mem_req = requests['memory']
-                                    # Convert to MB for display
-                                    if mem_req.endswith('Mi'):
-                                        memory_usage += float(mem_req[:-2])
-                                    elif mem_req.endswith('Gi'):
-                                        memory_usage += float(mem_req[:-2]) * 1024
-                                    elif mem_req.endswith('Ki'):
-                                        memory_usage += float(mem_req[:-2]) / 1024
-                                    else:
-                                        try:
-                                            # Assume bytes if no unit
-                                            memory_usage += float(mem_req) / (1024 * 1024)
-                                        except ValueError:
-                                            pass
-                                
-                                # GPU usage
-                                if 'nvidia.com/gpu' in requests:
-                                    try:
-                                        gpu_usage += float(requests['nvidia.com/gpu'])
-                                    except ValueError:
-                                        pass
-                
-                # Format the resource usage for display
-                namespace_info = {
-                    'name': namespace_name,
-                    'podCount': pod_count,
-                    'resources': {
-                        'cpu': round(cpu_usage, 2),
-                        'gpu': round(gpu_usage, 2),
-                        'memory': round(memory_usage, 2)  # Memory in MB
-                    },
-                    'metadata': ns.get('metadata', {})
-                }
-                
-                namespaces.append(namespace_info)
-                
-            except Exception as pod_processing_error: # Catch errors during pod data processing for a namespace
-                logging.error(f"Error processing pod data for namespace {namespace_name}: {pod_processing_error}")
-                # If we can't get pod data, still include the namespace with zero counts
-                namespaces.append({
-                    'name': namespace_name,
-                    'podCount': 0,
-                    'resources': {'cpu': 0, 'gpu': 0, 'memory': 0},
-                    'metadata': ns.get('metadata', {})
-                })
-                
         return jsonify(namespaces=namespaces)
     
-    except Exception as e: # General error fetching initial namespace list or other unexpected issues
+    except Exception as e:
         logging.error(f"Error fetching namespace details: {e}")
         return jsonify(error="Unable to fetch namespace details")
 
@@ -802,6 +792,8 @@ def api_namespace_create():
         if "error" in output.lower() or "failed" in output.lower():
             return jsonify(error=f"Failed to create namespace: {output}")
         
+        # Bring the cached namespace list up to date without waiting for its next scheduled sync
+        updater.request_refresh(['namespaces'])
         return jsonify(output=output, success=True, message=f"Namespace '{namespace_name}' created successfully")
         
     except Exception as e:
@@ -826,6 +818,7 @@ def api_namespace_delete():
     # command = f"kubectl delete namespace {namespace}"
     command_list = ["delete", "namespace", namespace]
     output = run_kubectl_command(command_list, is_json_output=False)
+    updater.request_refresh(['namespaces'])
     
     return jsonify(output=output)
 
@@ -1333,158 +1326,15 @@ def handle_pty_resize(data):
         logger.warning(f"[pty_resize sid:{sid}] Resize event received but no active session.")
 
 @app.route('/api/gpu-pods', methods=['GET'])
+@cache_etag(['pods', 'nodes'])
 def get_gpu_pods():
     try:
         namespace = request.args.get('namespace')
         
+        # GPU pods (with GPU memory inferred from their nodes) are collected once per sync in the snapshot
+        gpu_pods = snapshots.current()['gpu_pods']
         if namespace:
-            pods = db.get_resources('pods', namespace)
-        else:
-            pods = db.get_resources('pods')
-        
-        # Also get nodes to check for GPU memory capacity information
-        nodes = db.get_resources('nodes')
-        node_gpu_memory_map = {}
-        
-        # Build a map of node -> GPU memory capacity from node labels/status
-        for node in nodes:
-            metadata = node.get('metadata', {})
-            labels = metadata.get('labels', {})
-            status = node.get('status', {})
-            capacity = status.get('capacity', {})
-            allocatable = status.get('allocatable', {})
-            node_name = metadata.get('name', '')
-            
-            # Check for GPU memory information in various possible locations
-            gpu_memory_capacity = None
-            
-            # Common GPU memory label patterns
-            possible_gpu_memory_keys = [
-                'nvidia.com/gpu.memory',
-                'nvidia.com/gpu-memory',
-                'gpu-memory',
-                'nvidia.com/mig-1g.5gb',  # For MIG instances
-                'nvidia.com/mig-2g.10gb',
-                'nvidia.com/mig-3g.20gb',
-                'nvidia.com/mig-7g.40gb'
-            ]
-            
-            # Check capacity first
-            for key in possible_gpu_memory_keys:
-                if key in capacity:
-                    gpu_memory_capacity = capacity[key]
-                    break
-            
-            # Check allocatable if not found in capacity
-            if not gpu_memory_capacity:
-                for key in possible_gpu_memory_keys:
-                    if key in allocatable:
-                        gpu_memory_capacity = allocatable[key]
-                        break
-            
-            # Check labels for GPU memory info
-            if not gpu_memory_capacity:
-                for key in possible_gpu_memory_keys:
-                    if key in labels:
-                        gpu_memory_capacity = labels[key]
-                        break
-                
-                # Check for product-specific memory information
-                gpu_product = labels.get('nvidia.com/gpu.product', '')
-                if gpu_product:
-                    # Map known GPU products to memory (this is a basic mapping)
-                    gpu_memory_map = {
-                        'Tesla-V100-SXM2-16GB': '16Gi',
-                        'Tesla-V100-SXM2-32GB': '32Gi',
-                        'Tesla-T4': '16Gi',
-                        'Tesla-P100-PCIE-16GB': '16Gi',
-                        'Tesla-K80': '12Gi',
-                        'GeForce-RTX-3090': '24Gi',
-                        'GeForce-RTX-4090': '24Gi',
-                        'A100-SXM4-40GB': '40Gi',
-                        'A100-SXM4-80GB': '80Gi',
-                        'H100-SXM5-80GB': '80Gi'
-                    }
-                    gpu_memory_capacity = gpu_memory_map.get(gpu_product)
-            
-            if gpu_memory_capacity:
-                node_gpu_memory_map[node_name] = gpu_memory_capacity
-        
-        gpu_pods = []
-        for pod in pods:
-            if not isinstance(pod, dict): # Ensure pod is a dictionary
-                logging.warning(f"Skipping non-dict pod resource in get_gpu_pods: {type(pod)}")
-                continue
-
-            has_gpu_request = False
-            gpu_request_count = 0
-            gpu_memory_request = '0'
-            
-            # Check containers and initContainers for GPU requests
-            spec = pod.get('spec', {})
-            for container_type in ['containers', 'initContainers']:
-                for container in spec.get(container_type, []):
-                    resources = container.get('resources', {})
-                    requests = resources.get('requests', {}) # Changed from limits to requests
-                    limits = resources.get('limits', {})
-                    
-                    if requests: # Ensure requests exist
-                        gpu_val_str = requests.get('nvidia.com/gpu', '0') # Check nvidia.com/gpu in requests
-                        
-                        try:
-                            current_container_gpu_request = int(gpu_val_str)
-                            if current_container_gpu_request > 0:
-                                has_gpu_request = True
-                                gpu_request_count += current_container_gpu_request
-                                
-                                # Check for GPU memory requests
-                                gpu_memory_keys = [
-                                    'nvidia.com/gpu.memory',
-                                    'nvidia.com/gpu-memory',
-                                    'gpu-memory'
-                                ]
-                                
-                                for mem_key in gpu_memory_keys:
-                                    if mem_key in requests:
-                                        gpu_memory_request = requests[mem_key]
-                                        break
-                                    elif mem_key in limits:
-                                        gpu_memory_request = limits[mem_key]
-                                        break
-                                
-                        except ValueError:
-                            logging.warning(f"Could not parse GPU request value '{gpu_val_str}' for container {container.get('name')} in pod {pod.get('metadata',{}).get('name')}")
-                            pass # Or handle error as needed
-            
-            if has_gpu_request:
-                pod_node = spec.get('nodeName', '')
-                
-                # If no explicit GPU memory request, try to infer from node capacity
-                if gpu_memory_request == '0' and pod_node in node_gpu_memory_map:
-                    node_gpu_memory = node_gpu_memory_map[pod_node]
-                    # Calculate per-GPU memory if we know the total and GPU count
-                    if gpu_request_count > 0:
-                        try:
-                            # Parse node GPU memory (e.g., "80Gi" -> 80)
-                            if node_gpu_memory.endswith('Gi'):
-                                total_gb = int(node_gpu_memory[:-2])
-                                per_gpu_gb = total_gb // max(1, gpu_request_count)
-                                gpu_memory_request = f"{per_gpu_gb}Gi"
-                            elif node_gpu_memory.endswith('Mi'):
-                                total_mb = int(node_gpu_memory[:-2])
-                                per_gpu_mb = total_mb // max(1, gpu_request_count)
-                                gpu_memory_request = f"{per_gpu_mb}Mi"
-                        except (ValueError, TypeError):
-                            pass
-                
-                gpu_pods.append({
-                    'name': pod.get('metadata', {}).get('name', ''),
-                    'namespace': pod.get('metadata', {}).get('namespace', ''),
-                    'node': pod_node,
-                    'status': pod.get('status', {}).get('phase', ''),
-                    'gpu_count': gpu_request_count,
-                    'gpu_memory': gpu_memory_request if gpu_memory_request != '0' else 'Unknown'
-                })
+            gpu_pods = [pod for pod in gpu_pods if pod['namespace'] == namespace]
         
         return jsonify(gpu_pods)
     
@@ -1493,12 +1343,22 @@ def get_gpu_pods():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/namespace-metrics', methods=['GET'])
+@cache_etag(['pods'])
 def get_namespace_metrics():
     try:
         metric_type = request.args.get('metric', 'gpu')
         
-        # Get metrics from database
-        metrics = db.get_metrics(metric_type)
+        # Per-namespace totals from the cluster snapshot, in the units of the namespace metrics
+        metrics = [{
+            'namespace': namespace,
+            'pod_count': totals['pod_count'],
+            'cpu_usage': totals['cpu_request_millicores'] / 1000,
+            'gpu_usage': totals['gpu_request'],
+            'memory_usage': totals['memory_request_bytes'] / (1024 * 1024),  # in MB
+            'running_pods': totals['running_pods'],
+            'pending_pods': totals['pending_pods'],
+            'failed_pods': totals['failed_pods']
+        } for namespace, totals in snapshots.current()['by_namespace'].items()]
         
         # Sort by the requested metric
         if metric_type == 'gpu':
@@ -1517,6 +1377,35 @@ def get_namespace_metrics():
         logging.error(f"Error getting namespace metrics: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/pod-request-totals', methods=['GET'])
+@cache_etag(['pods'])
+def get_pod_request_totals():
+    """Pod counts and cpu/memory/gpu requests per phase, namespace, node (all phases) or owner, from the cluster snapshot."""
+    try:
+        group_by = request.args.get('group_by', 'namespace')
+        snapshot_keys = {'phase': 'by_phase', 'namespace': 'by_namespace', 'node': 'by_node', 'owner': 'by_owner'}
+        if group_by not in snapshot_keys:
+            return jsonify({"error": f"group_by must be one of {', '.join(snapshot_keys)}"}), 400
+
+        # Unscheduled pods are grouped under a null node
+        totals = [{
+            'group': group,
+            'pod_count': group_totals['pod_count'],
+            'cpu_request_millicores': group_totals['cpu_request_millicores'],
+            'memory_request_bytes': group_totals['memory_request_bytes'],
+            'gpu_request': group_totals['gpu_request'],
+            'running_pods': group_totals['running_pods'],
+            'pending_pods': group_totals['pending_pods'],
+            'failed_pods': group_totals['failed_pods']
+        } for group, group_totals in snapshots.current()[snapshot_keys[group_by]].items()]
+        totals.sort(key=lambda x: x['pod_count'], reverse=True)
+
+        return jsonify(totals)
+
+    except Exception as e:
+        logging.error(f"Error getting pod request totals: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/pods/delete', methods=['POST'])
 def delete_pod():
     try:
@@ -1540,52 +1429,144 @@ def delete_pod():
         app.logger.error(f"Error deleting pod: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/refresh-database', methods=['POST'])
-def refresh_database():
-    """
-    Manually and atomically triggers a full refresh of all cluster data,
-    including resources and environment metrics.
-    """
+# --- Manual database refresh jobs ---
+# A manual refresh runs as one background job at a time; callers arriving while it runs join it.
+# Progress and completion are pushed to clients as 'database_refresh_progress' and
+# 'database_refresh_complete' Socket.IO events carrying the job id.
+_refresh_job_lock = threading.Lock()
+_current_refresh_job = None
+_refresh_jobs = {}
+MAX_TRACKED_REFRESH_JOBS = 20
+
+def _refresh_job_snapshot(job: Dict) -> Dict:
+    with _refresh_job_lock:
+        return dict(job, completed_types=list(job['completed_types']), failed_types=list(job['failed_types']))
+
+def _emit_refresh_event(event_name: str, payload: Dict):
+    try:
+        socketio.emit(event_name, payload)
+    except Exception as e:
+        logging.error(f"Error emitting {event_name}: {e}")
+
+def _run_refresh_job(job: Dict):
+    """Run a manual refresh: all resource types, then environment metrics."""
+    global _current_refresh_job
+    total_types = len(RESOURCE_TYPES)
+
+    def on_type_done(resource_type, ok):
+        with _refresh_job_lock:
+            (job['completed_types'] if ok else job['failed_types']).append(resource_type)
+            done = len(job['completed_types']) + len(job['failed_types'])
+        _emit_refresh_event('database_refresh_progress', {
+            'job_id': job['job_id'], 'stage': 'resources', 'resource_type': resource_type,
+            'ok': ok, 'completed': done, 'total': total_types,
+        })
+
     try:
-        logging.info("Manual database refresh requested via API.")
-        
         # Force clear any cached metrics first
         db.clear_environment_metrics_cache()
-        
-        # This function now handles the atomic update of all resources
-        updater._update_resources() 
-        
+
+        # Waits for any sweep the background updater is running, then refreshes everything
+        # (in watch mode, by re-listing every type into the watch event pipeline)
+        results = updater.refresh_now(progress_callback=on_type_done)
+
         # Force a fresh collection of environment metrics with new logic
+        _emit_refresh_event('database_refresh_progress', {
+            'job_id': job['job_id'], 'stage': 'environment_metrics', 'completed': total_types, 'total': total_types,
+        })
         logging.info("Forcing fresh environment metrics collection...")
         _collect_and_store_environment_metrics()
-        
+
         # Verify the metrics were updated correctly
         env_metrics = db.get_latest_environment_metrics()
         logging.info(f"Updated metrics - total_allocatable_pods: {env_metrics.get('total_node_allocatable_pods', 'NOT FOUND')}")
         logging.info(f"Updated metrics - total_capacity_pods: {env_metrics.get('total_node_pod_capacity', 'NOT FOUND')}")
-        
-        return jsonify({
-            "success": True, 
-            "message": "Database refresh completed successfully.",
-            "environment_metrics_updated": True,
-            "total_allocatable_pods": env_metrics.get('total_node_allocatable_pods', 0),
-            "total_capacity_pods": env_metrics.get('total_node_pod_capacity', 0)
-        })
+
+        with _refresh_job_lock:
+            job['success'] = bool(results)
+            job['status'] = 'completed' if results else 'failed'
+            job['message'] = ("Database refresh completed successfully." if results
+                              else "Database refresh failed: no resource type could be fetched.")
+            job['environment_metrics_updated'] = True
+            job['total_allocatable_pods'] = env_metrics.get('total_node_allocatable_pods', 0)
+            job['total_capacity_pods'] = env_metrics.get('total_node_pod_capacity', 0)
     except Exception as e:
         logging.error(f"Database refresh failed: {str(e)}", exc_info=True)
+        with _refresh_job_lock:
+            job['success'] = False
+            job['status'] = 'failed'
+            job['error'] = str(e)
+    finally:
+        with _refresh_job_lock:
+            job['finished_at'] = time.time()
+            if _current_refresh_job is job:
+                _current_refresh_job = None
+        _emit_refresh_event('database_refresh_complete', _refresh_job_snapshot(job))
+
+def start_refresh_job():
+    """Start a manual refresh job, or return the one already running. Returns (job, joined)."""
+    global _current_refresh_job
+    with _refresh_job_lock:
+        if _current_refresh_job is not None:
+            return _current_refresh_job, True
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'status': 'running',
+            'success': None,
+            'started_at': time.time(),
+            'finished_at': None,
+            'completed_types': [],
+            'failed_types': [],
+        }
+        _current_refresh_job = job
+        _refresh_jobs[job['job_id']] = job
+        while len(_refresh_jobs) > MAX_TRACKED_REFRESH_JOBS:
+            _refresh_jobs.pop(next(iter(_refresh_jobs)))
+    socketio.start_background_task(_run_refresh_job, job)
+    return job, False
+
+@app.route('/api/refresh-database', methods=['POST'])
+def refresh_database():
+    """
+    Starts a full refresh of all cluster data (resources and environment metrics) in the background
+    and returns its job id right away. Concurrent requests join the refresh already in flight.
+    """
+    try:
+        job, joined = start_refresh_job()
+        logging.info(f"Manual database refresh requested via API ({'joined' if joined else 'started'} job {job['job_id']}).")
+        return jsonify({
+            "success": True,
+            "job_id": job['job_id'],
+            "joined": joined,
+            "status": 'running',
+            "message": "Joined the database refresh already in progress." if joined else "Database refresh started."
+        }), 202
+    except Exception as e:
+        logging.error(f"Database refresh failed to start: {str(e)}", exc_info=True)
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/refresh-database/<job_id>', methods=['GET'])
+def get_refresh_database_job(job_id):
+    """Returns the status of a manual refresh job."""
+    job = _refresh_jobs.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Unknown refresh job"}), 404
+    return jsonify(_refresh_job_snapshot(job))
+
 @app.route('/api/environment_metrics', methods=['GET'])
+@cache_etag(['pods', 'nodes'], environment_metrics=True)
 def get_environment_metrics_endpoint():
     try:
-        env_metrics = db.get_latest_environment_metrics()
+        snapshot = snapshots.current()
+        env_metrics = snapshot['environment']
         if not env_metrics:
             logging.warning("Environment metrics not found in DB, attempting to collect now.")
             
             # Try to collect metrics immediately
             try:
                 _collect_and_store_environment_metrics()
-                env_metrics = db.get_latest_environment_metrics()
+                snapshot = snapshots.current()
+                env_metrics = snapshot['environment']
                 
                 if env_metrics:
                     logging.info("Successfully collected environment metrics on-demand.")
@@ -1603,8 +1584,6 @@ def get_environment_metrics_endpoint():
                     "suggestion": "The cluster may still be initializing. Try again in a few moments."
                 }), 503
 
-        all_pods_data = db.get_resources('pods')
-
         current_running_pods = 0
         current_pending_pods = 0
         current_failed_pods = 0
@@ -1614,29 +1593,19 @@ def get_environment_metrics_endpoint():
         pending_gpu_request_units = 0
         failed_gpu_request_units = 0
 
-        # Sum up current requests from all pods
-        for pod in all_pods_data:
-            phase = pod.get('status', {}).get('phase')
+        # Sum up current requests from all pods, per phase, from the cluster snapshot
+        for phase, totals in snapshot['by_phase'].items():
+            current_cpu_request_millicores += totals['cpu_request_millicores']
+            current_memory_request_bytes += totals['memory_request_bytes']
             if phase == 'Running':
-                current_running_pods += 1
+                current_running_pods = totals['pod_count']
+                running_gpu_request_units = totals['gpu_request']
             elif phase == 'Pending':
-                current_pending_pods += 1
+                current_pending_pods = totals['pod_count']
+                pending_gpu_request_units = totals['gpu_request']
             elif phase == 'Failed':
-                current_failed_pods += 1
-
-            for container in pod.get('spec', {}).get('containers', []):
-                requests = container.get('resources', {}).get('requests', {})
-                if requests:
-                    current_cpu_request_millicores += parse_cpu_to_millicores(requests.get('cpu', '0'))
-                    current_memory_request_bytes += parse_memory_to_bytes(requests.get('memory', '0'))
-                    gpus = int(requests.get('nvidia.com/gpu', 0))
-                    if gpus > 0:
-                        if phase == 'Running':
-                            running_gpu_request_units += gpus
-                        elif phase == 'Pending':
-                            pending_gpu_request_units += gpus
-                        elif phase == 'Failed':
-                            failed_gpu_request_units += gpus
+                current_failed_pods = totals['pod_count']
+                failed_gpu_request_units = totals['gpu_request']
 
         # Construct the response object from scratch to ensure correct structure
         response_data = {
@@ -1707,6 +1676,35 @@ def get_environment_metrics_endpoint():
         logging.error(f"Error in /api/environment_metrics endpoint: {str(e)}", exc_info=True)
         return jsonify({"error": "An error occurred while fetching environment metrics."}), 500
 
+HISTORY_RANGE_UNITS = {'m': 60, 'h': 3600, 'd': 86400}
+
+def _parse_history_range(value: str) -> int:
+    """Parse a history range such as '30m', '6h' or '7d' into seconds."""
+    value = (value or '').strip().lower()
+    if len(value) < 2 or value[-1] not in HISTORY_RANGE_UNITS or not value[:-1].isdigit() or int(value[:-1]) == 0:
+        raise ValueError(f"Invalid range '{value}', expected e.g. 30m, 6h or 7d")
+    return int(value[:-1]) * HISTORY_RANGE_UNITS[value[-1]]
+
+@app.route('/api/environment_metrics/history', methods=['GET'])
+def get_environment_metrics_history():
+    """
+    Trend of allocatable and requested CPU, memory, GPUs and pods over ?range= (default 24h),
+    for the cluster or ?namespace=, served from the matching downsampled tier.
+    """
+    try:
+        range_seconds = _parse_history_range(request.args.get('range', '24h'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        namespace = request.args.get('namespace')
+        history = db.get_metrics_history(range_seconds, namespace if namespace != 'all' else None)
+        history['range_seconds'] = range_seconds
+        history['namespace'] = namespace or None
+        return jsonify(history)
+    except Exception as e:
+        logging.error(f"Error in /api/environment_metrics/history endpoint: {str(e)}", exc_info=True)
+        return jsonify({"error": "An error occurred while fetching environment metrics history."}), 500
+
 @app.route('/api/pod/<namespace>/<pod_name>/details', methods=['GET'])
 def api_pod_details(namespace, pod_name):
     try:
@@ -1957,6 +1955,104 @@ def delete_chart():
             'error': f'An unexpected error occurred: {str(e)}'
         }), 500
 
+@app.route('/api/resource/<resource_type>/<namespace>/<name>/full', methods=['GET'])
+def get_full_resource(resource_type, namespace, name):
+    """
+    Returns the complete, live object from the cluster. The cache only stores a projection
+    with heavy fields (managedFields, env lists, configmap/secret values...) removed.
+    """
+    try:
+        command_list = ["get", resource_type, name, "-o", "json"]
+        if resource_type not in ('nodes', 'namespaces'):
+            command_list += ["-n", namespace]
+        resource = run_kubectl_command(command_list, is_json_output=True)
+        if not resource:
+            return jsonify({"error": f"{resource_type} {namespace}/{name} not found"}), 404
+        return jsonify(resource)
+    except Exception as e:
+        logging.error(f"Error getting full {resource_type} {namespace}/{name}: {str(e)}", exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/cache/status', methods=['GET'])
+def get_cache_status():
+    """Returns the generation, item count, staleness and refresh schedule of each cached resource type."""
+    try:
+        state = db.get_sync_state()
+        state['decoded_cache'] = db.decoded_cache.stats()
+        if updater.sync_mode == 'poll':
+            for resource_type, schedule in updater.scheduler.status(time.time()).items():
+                state.setdefault(resource_type, {})['schedule'] = schedule
+        for resource_type, timings in db.write_timings.items():
+            state.setdefault(resource_type, {})['last_write'] = timings
+        return jsonify(state)
+    except Exception as e:
+        logging.error(f"Error getting cache status: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Failed to get cache status'}), 500
+
+@app.route('/api/search', methods=['GET'])
+@cache_etag(RESOURCE_TYPES)
+def search_resources():
+    """
+    Search every cached resource type by partial name, namespace, label, annotation key or image.
+    Query parameters: q (terms, all must match), type (comma-separated resource types),
+    namespace and limit (default 50, at most 200).
+    """
+    query = request.args.get('q', '').strip()
+    resource_types = [t for t in request.args.get('type', '').split(',') if t] or None
+    namespace = request.args.get('namespace')
+    namespace = namespace if namespace and namespace != 'all' else None
+    try:
+        limit = min(max(1, int(request.args.get('limit', 50))), 200)
+        started = time.time()
+        results = db.search_resources(query, resource_types=resource_types, namespace=namespace, limit=limit)
+        return jsonify({
+            'query': query,
+            'count': len(results),
+            'took_ms': round((time.time() - started) * 1000, 1),
+            'results': results
+        })
+    except ValueError as e:
+        return jsonify({'error': f"Invalid search: {str(e)}"}), 400
+    except Exception as e:
+        logging.error(f"Error searching resources: {str(e)}", exc_info=True)
+        return jsonify({'error': 'Failed to search resources'}), 500
+
+@app.route('/api/resource/<resource_type>/select', methods=['GET'])
+@cache_etag()
+def select_resources(resource_type):
+    """
+    Cached resources of one type matching a Kubernetes label selector, answered from the label index.
+    Query parameters: selector, namespace, limit (default 100, at most 1000), after (cursor of the
+    previous page), sort_by, sort_order, and view (summary|full) and/or fields to project items.
+    """
+    selector = request.args.get('selector', '')
+    namespace = request.args.get('namespace')
+    filters = {
+        'namespace': namespace if namespace and namespace != 'all' else None,
+        'label': selector or None,
+    }
+    try:
+        limit = min(max(1, int(request.args.get('limit', 100))), 1000)
+        fields = parse_fields(request.args.get('fields'), request.args.get('view'))
+        total_count = db.count_resources(resource_type, **filters)
+        items, next_cursor = db.query_resources(
+            resource_type, sort_by=request.args.get('sort_by') or None,
+            descending=request.args.get('sort_order', 'asc').lower() == 'desc',
+            limit=limit, after=request.args.get('after') or None, fields=fields, **filters
+        )
+        return jsonify({
+            'selector': selector,
+            'totalCount': total_count,
+            'nextCursor': next_cursor,
+            'generation': db.get_generation(resource_type),
+            'items': items
+        })
+    except ValueError as e:
+        return jsonify({'error': f"Invalid selector query: {str(e)}"}), 400
+    except Exception as e:
+        logging.error(f"Error selecting {resource_type} by labels: {str(e)}", exc_info=True)
+        return jsonify({'error': f'Failed to select {resource_type}'}), 500
+
 @app.route('/api/database/last_updated', methods=['GET'])
 def get_database_last_updated():
     """Returns the last modification time of the database file."""
@@ -2078,6 +2174,7 @@ def get_remote_version_full():
         }), 500
 
 @app.route('/api/nodes', methods=['GET'])
+@cache_etag(['nodes'])
 def get_nodes():
     """Get all nodes from the database with hardware specifications."""
     try:
@@ -2137,10 +2234,12 @@ def get_nodes():
 def get_node_details(node_name):
     """Get detailed information for a specific node."""
     try:
-        nodes = db.get_resources('nodes')
-        
-        # Find the specific node
-        node = next((n for n in nodes if n.get('metadata', {}).get('name') == node_name), None)
+        # Name -> node index, rebuilt only when the nodes change
+        nodes_by_name = db.get_derived(
+            'nodes', 'by_name',
+            lambda nodes: {n.get('metadata', {}).get('name'): n for n in nodes}
+        )
+        node = nodes_by_name.get(node_name)
         
         if not node:
             return jsonify({"error": f"Node {node_name} not found"}), 404
@@ -2223,6 +2322,7 @@ def debug_pod_allocation():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/gpu-nodes', methods=['GET'])
+@cache_etag(['nodes'])
 def get_gpu_nodes():
     """Get all nodes with GPU information for GPU overview dashboard."""
     try:
@@ -2283,10 +2383,12 @@ def get_gpu_nodes():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/gpu-queue', methods=['GET'])
+@cache_etag(['pods', 'nodes'], window_seconds=60)
 def get_gpu_queue():
     """Get GPU scheduling queue information - pending pods requesting GPUs."""
     try:
-        pods = db.get_resources('pods')
+        # The queue is collected once per sync in the snapshot; only wait times depend on the current time
+        queued_pods = snapshots.current()['gpu_queue']
         
         gpu_queue = {
             'pending_pods': [],
@@ -2301,138 +2403,68 @@ def get_gpu_queue():
         current_time = datetime.now(timezone.utc)
         wait_times = []
         
-        for pod in pods:
-            if not isinstance(pod, dict):
-                continue
-                
-            metadata = pod.get('metadata', {})
-            spec = pod.get('spec', {})
-            status = pod.get('status', {})
-            phase = status.get('phase', '')
+        for queued_pod in queued_pods:
+            pending_pod = {k: v for k, v in queued_pod.items() if k != 'created_at'}
+            wait_time_seconds = 0
+            if queued_pod['created_at']:
+                wait_time_seconds = (current_time - queued_pod['created_at']).total_seconds()
+                wait_times.append(wait_time_seconds)
+            pending_pod['wait_time_seconds'] = wait_time_seconds
+            pending_pod['wait_time_human'] = format_duration(wait_time_seconds)
             
-            # Only look at pending pods
-            if phase != 'Pending':
-                continue
-            
-            # Check if pod requests GPUs
-            gpu_request = 0
-            for container in spec.get('containers', []):
-                requests = container.get('resources', {}).get('requests', {})
-                gpu_request += int(requests.get('nvidia.com/gpu', 0))
-            
-            if gpu_request > 0:
-                # Calculate wait time
-                creation_time_str = metadata.get('creationTimestamp', '')
-                wait_time_seconds = 0
-                if creation_time_str:
-                    try:
-                        creation_time = datetime.fromisoformat(creation_time_str.replace('Z', '+00:00'))
-                        wait_time_seconds = (current_time - creation_time).total_seconds()
-                        wait_times.append(wait_time_seconds)
-                    except:
-                        pass
-                
-                # Get pod conditions for more details
-                conditions = status.get('conditions', [])
-                unscheduled_condition = next(
-                    (c for c in conditions if c.get('type') == 'PodScheduled' and c.get('status') == 'False'), 
-                    {}
-                )
-                
-                pending_pod = {
-                    'name': metadata.get('name', ''),
-                    'namespace': metadata.get('namespace', ''),
-                    'gpu_request': gpu_request,
-                    'creation_time': creation_time_str,
-                    'wait_time_seconds': wait_time_seconds,
-                    'wait_time_human': format_duration(wait_time_seconds),
-                    'reason': unscheduled_condition.get('reason', 'Unknown'),
-                    'message': unscheduled_condition.get('message', ''),
-                    'node_selector': spec.get('nodeSelector', {}),
-                    'tolerations': len(spec.get('tolerations', [])),
-                    'priority_class': spec.get('priorityClassName', ''),
-                    'owner': get_pod_owner(metadata)
-                }
-                
-                gpu_queue['pending_pods'].append(pending_pod)
-                gpu_queue['queue_summary']['total_pending'] += 1
-                gpu_queue['queue_summary']['total_gpu_requests'] += gpu_request
+            gpu_queue['pending_pods'].append(pending_pod)
+            gpu_queue['queue_summary']['total_pending'] += 1
+            gpu_queue['queue_summary']['total_gpu_requests'] += queued_pod['gpu_request']
         
         # Calculate queue statistics
         if wait_times:
             gpu_queue['queue_summary']['average_wait_time'] = sum(wait_times) / len(wait_times)
             gpu_queue['queue_summary']['longest_wait_time'] = max(wait_times)
         
-        # Sort pending pods by wait time (longest first)
-        gpu_queue['pending_pods'].sort(key=lambda x: x['wait_time_seconds'], reverse=True)
-        
+        # Pending pods are already ordered longest wait first
         return jsonify(gpu_queue)
     except Exception as e:
         logging.error(f"Error getting GPU queue: {str(e)}", exc_info=True)
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/gpu-utilization', methods=['GET'])
+@cache_etag(['pods', 'nodes'], environment_metrics=True)
 def get_gpu_utilization():
     """Get GPU utilization overview - allocation vs capacity across the cluster."""
     try:
+        snapshot = snapshots.current()
+        
         # Get environment metrics for total GPU capacity
-        env_metrics = db.get_latest_environment_metrics()
+        env_metrics = snapshot['environment']
         if not env_metrics:
             return jsonify({"error": "Environment metrics not available"}), 503
         
         total_gpu_capacity = env_metrics.get('total_node_allocatable_gpus', 0)
         
-        # Get current GPU allocations from environment metrics
-        all_pods_data = db.get_resources('pods')
-        
+        # Current GPU allocations from the snapshot's request totals
         allocated_gpus = {
             'running': 0,
             'pending': 0,
             'failed': 0
         }
+        for phase, totals in snapshot['by_phase'].items():
+            phase_key = (phase or '').lower()
+            if phase_key in allocated_gpus:
+                allocated_gpus[phase_key] = totals['gpu_request']
         
         # GPU allocation by namespace
-        namespace_gpu_allocation = {}
-        
-        # GPU allocation by node
-        node_gpu_allocation = {}
+        namespace_gpu_allocation = {
+            namespace: totals['gpu_request']
+            for namespace, totals in snapshot['by_namespace'].items()
+            if totals['gpu_request'] > 0
+        }
         
-        for pod in all_pods_data:
-            if not isinstance(pod, dict):
-                continue
-                
-            metadata = pod.get('metadata', {})
-            spec = pod.get('spec', {})
-            status = pod.get('status', {})
-            phase = status.get('phase', '')
-            namespace = metadata.get('namespace', 'default')
-            node_name = spec.get('nodeName', 'Unscheduled')
-            
-            # Calculate GPU requests
-            pod_gpu_request = 0
-            for container in spec.get('containers', []):
-                requests = container.get('resources', {}).get('requests', {})
-                pod_gpu_request += int(requests.get('nvidia.com/gpu', 0))
-            
-            if pod_gpu_request > 0:
-                # Count by phase
-                if phase == 'Running':
-                    allocated_gpus['running'] += pod_gpu_request
-                elif phase == 'Pending':
-                    allocated_gpus['pending'] += pod_gpu_request
-                elif phase == 'Failed':
-                    allocated_gpus['failed'] += pod_gpu_request
-                
-                # Count by namespace
-                if namespace not in namespace_gpu_allocation:
-                    namespace_gpu_allocation[namespace] = 0
-                namespace_gpu_allocation[namespace] += pod_gpu_request
-                
-                # Count by node (only for running pods)
-                if phase == 'Running' and node_name != 'Unscheduled':
-                    if node_name not in node_gpu_allocation:
-                        node_gpu_allocation[node_name] = 0
-                    node_gpu_allocation[node_name] += pod_gpu_request
+        # GPU allocation by node (only for running pods)
+        node_gpu_allocation = {
+            node_name: totals['gpu_request']
+            for node_name, totals in snapshot['running_by_node'].items()
+            if node_name and totals['gpu_request'] > 0
+        }
         
         # Calculate utilization percentages
         total_allocated = allocated_gpus['running'] + allocated_gpus['pending']
@@ -2468,19 +2500,12 @@ def format_duration(seconds):
         hours = int((seconds % 86400) // 3600)
         return f"{days}d{hours}h"
 
-def get_pod_owner(metadata):
-    """Get the owner reference of a pod (deployment, job, etc.)."""
-    owner_refs = metadata.get('ownerReferences', [])
-    if owner_refs:
-        owner = owner_refs[0]  # Take the first owner
-        return f"{owner.get('kind', 'Unknown')}/{owner.get('name', 'Unknown')}"
-    return "Direct"
 @app.route('/api/gpu-memory-info', methods=['GET'])
+@cache_etag(['pods', 'nodes'])
 def get_gpu_memory_info():
     """Get detailed GPU memory information from the cluster for debugging and configuration."""
     try:
         nodes = db.get_resources('nodes')
-        pods = db.get_resources('pods')
         
         gpu_memory_info = {
             'nodes': [],
@@ -2512,33 +2537,35 @@ def get_gpu_memory_info():
         
         # Analyze pods for GPU memory request patterns
         gpu_memory_request_count = 0
-        for pod in pods:
-            if not isinstance(pod, dict):
-                continue
+        # Closed explicitly so an error mid-loop does not leave the read transaction open
+        with closing(db.iter_resources('pods')) as pods:
+            for pod in pods:
+                if not isinstance(pod, dict):
+                    continue
                 
-            spec = pod.get('spec', {})
-            metadata = pod.get('metadata', {})
+                spec = pod.get('spec', {})
+                metadata = pod.get('metadata', {})
             
-            for container in spec.get('containers', []):
-                resources = container.get('resources', {})
-                requests = resources.get('requests', {})
-                limits = resources.get('limits', {})
+                for container in spec.get('containers', []):
+                    resources = container.get('resources', {})
+                    requests = resources.get('requests', {})
+                    limits = resources.get('limits', {})
                 
-                # Check if this container has GPU requests
-                if requests.get('nvidia.com/gpu', '0') != '0':
-                    gpu_memory_keys = [k for k in list(requests.keys()) + list(limits.keys()) 
-                                     if 'memory' in k.lower() and ('gpu' in k.lower() or 'nvidia' in k.lower())]
+                    # Check if this container has GPU requests
+                    if requests.get('nvidia.com/gpu', '0') != '0':
+                        gpu_memory_keys = [k for k in list(requests.keys()) + list(limits.keys()) 
+                                         if 'memory' in k.lower() and ('gpu' in k.lower() or 'nvidia' in k.lower())]
                     
-                    if gpu_memory_keys:
-                        gpu_memory_request_count += 1
-                        gpu_memory_info['pods_with_gpu_memory'].append({
-                            'pod_name': metadata.get('name', ''),
-                            'namespace': metadata.get('namespace', ''),
-                            'container_name': container.get('name', ''),
-                            'gpu_memory_keys': gpu_memory_keys,
-                            'requests': {k: requests.get(k) for k in gpu_memory_keys if k in requests},
-                            'limits': {k: limits.get(k) for k in gpu_memory_keys if k in limits}
-                        })
+                        if gpu_memory_keys:
+                            gpu_memory_request_count += 1
+                            gpu_memory_info['pods_with_gpu_memory'].append({
+                                'pod_name': metadata.get('name', ''),
+                                'namespace': metadata.get('namespace', ''),
+                                'container_name': container.get('name', ''),
+                                'gpu_memory_keys': gpu_memory_keys,
+                                'requests': {k: requests.get(k) for k in gpu_memory_keys if k in requests},
+                                'limits': {k: limits.get(k) for k in gpu_memory_keys if k in limits}
+                            })
         
         # Provide recommendations based on analysis
         if gpu_memory_request_count == 0:
@@ -1,24 +1,267 @@
 import subprocess
+import shlex
 import json
 import logging
 import time
 import threading
+import queue
+import random
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from database import db
+from resource_fields import project_resource, pod_requests
+from kubectl_stream import KubectlItemStream
+from serializer import serializer
 from datetime import datetime, timezone # Added for age calculation
+from typing import Optional, Tuple
+from urllib.parse import urlencode
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# The kubernetes client is only needed for the watch-based sync mode
+kubernetes_client_available = False
+try:
+    from kubernetes import client as k8s_client, config as k8s_config, watch as k8s_watch
+    from kubernetes.client.rest import ApiException
+    kubernetes_client_available = True
+except ImportError:
+    logger.warning("kubernetes client could not be imported. Watch-based sync mode will be disabled.")
+
+# Resource types kept in the cache
+RESOURCE_TYPES = ['pods', 'services', 'deployments', 'inferenceservices', 'configmaps', 'secrets', 'nodes', 'namespaces']
+
+# Objects handed to the writer at a time when a type is listed without paging
+STREAM_BATCH_SIZE = 500
+
+# First delay before a failed watch or re-list is retried; it doubles up to WATCH_RETRY_MAX_SECONDS
+WATCH_RETRY_MIN_SECONDS = 5
+
+# API paths used for paged (limit/continue) listing through `kubectl get --raw`
+RESOURCE_API_PATHS = {
+    'pods': '/api/v1/pods',
+    'services': '/api/v1/services',
+    'deployments': '/apis/apps/v1/deployments',
+    'inferenceservices': '/apis/serving.kserve.io/v1beta1/inferenceservices',
+    'configmaps': '/api/v1/configmaps',
+    'secrets': '/api/v1/secrets',
+    'nodes': '/api/v1/nodes',
+    'namespaces': '/api/v1/namespaces',
+}
+
+# Base refresh interval (seconds) per resource type for the adaptive poll scheduler.
+# Types not listed here, and all types with REFRESH_SCHEDULE=fixed, use update_interval.
+DEFAULT_REFRESH_INTERVALS = {
+    'pods': 60,
+    'deployments': 120,
+    'inferenceservices': 120,
+    'services': 300,
+    'nodes': 300,
+    'namespaces': 300,
+    'configmaps': 600,
+    'secrets': 600,
+}
+
+def _parse_refresh_intervals(value: str) -> dict:
+    """Parse REFRESH_INTERVALS, e.g. 'pods=30,configmaps=900'."""
+    intervals = {}
+    for entry in filter(None, (part.strip() for part in value.split(','))):
+        try:
+            resource_type, seconds = entry.split('=', 1)
+            intervals[resource_type.strip()] = float(seconds)
+        except ValueError:
+            logger.warning(f"Ignoring invalid REFRESH_INTERVALS entry: {entry}")
+    return intervals
+
+class RefreshScheduler:
+    """
+    Per-resource-type poll schedule that adapts to observed churn.
+    A refresh that changed nothing backs the type's interval off by backoff_factor (up to
+    max_interval); one that changed at least churn_threshold of its objects halves it (down to
+    min_interval). Next-run times are jittered so types do not fall into lock-step re-lists.
+    """
+
+    def __init__(self, base_intervals: dict, min_interval: float = 15, max_interval: float = 1800,
+                 jitter: float = 0.1, adaptive: bool = True, backoff_factor: float = 1.5,
+                 churn_threshold: float = 0.05):
+        self.base_intervals = dict(base_intervals)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.adaptive = adaptive
+        self.backoff_factor = backoff_factor
+        self.churn_threshold = churn_threshold
+        self._lock = threading.Lock()
+        self._intervals = dict(self.base_intervals)
+        self._synced_once = set()
+        # Everything is due immediately on startup
+        self._next_run = {resource_type: 0.0 for resource_type in self.base_intervals}
+
+    def _jittered(self, interval: float) -> float:
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def due(self, now: float) -> list:
+        """Resource types whose next run time has passed."""
+        with self._lock:
+            return [rt for rt, next_run in self._next_run.items() if next_run <= now]
+
+    def seconds_until_next(self, now: float) -> float:
+        with self._lock:
+            return max(0.0, min(self._next_run.values()) - now)
+
+    def record(self, resource_type: str, changes: Optional[int], total: Optional[int], now: float):
+        """
+        Adapt and reschedule a type after a refresh. changes is None when the refresh failed or
+        the write mode cannot tell what changed, in which case the interval is left as it is.
+        """
+        with self._lock:
+            interval = self._intervals[resource_type]
+            # The first successful sync loads everything, which says nothing about churn
+            first_sync = resource_type not in self._synced_once
+            if changes is not None:
+                self._synced_once.add(resource_type)
+            if self.adaptive and changes is not None and not first_sync:
+                if changes == 0:
+                    interval = min(interval * self.backoff_factor, self.max_interval)
+                elif changes >= max(1, (total or 0) * self.churn_threshold):
+                    interval = max(interval / 2, self.min_interval)
+            self._intervals[resource_type] = interval
+            self._next_run[resource_type] = now + self._jittered(interval)
+
+    def trigger(self, resource_types: Optional[list] = None):
+        """Make types (all by default) due now."""
+        with self._lock:
+            for resource_type in resource_types or list(self._next_run):
+                self._next_run[resource_type] = 0.0
+
+    def status(self, now: float) -> dict:
+        with self._lock:
+            return {
+                resource_type: {
+                    'interval_seconds': round(self._intervals[resource_type], 1),
+                    'base_interval_seconds': self.base_intervals[resource_type],
+                    'next_run_in_seconds': round(max(0.0, self._next_run[resource_type] - now), 1),
+                }
+                for resource_type in self._next_run
+            }
+
+class NamespaceMetricsAggregator:
+    """
+    Accumulates per-namespace pod counts and resource requests as pods stream past, so metrics
+    can be computed during ingest without reading the pods back from the database. The totals
+    have the shape of Database.get_pod_request_totals(group_by='namespace').
+    """
+
+    def __init__(self):
+        self.namespace_metrics = {}
+
+    def add_pods(self, pods):
+        for pod in pods:
+            self.add_pod(pod)
+
+    def add_pod(self, pod: dict):
+        if not isinstance(pod, dict):
+            return
+
+        metadata = pod.get('metadata', {})
+        # Pods without a name are not cached either
+        if not metadata.get('name'):
+            return
+        namespace = metadata.get('namespace', 'default')
+        phase = pod.get('status', {}).get('phase', '')
+
+        # Initialize namespace metrics if not exists
+        if namespace not in self.namespace_metrics:
+            self.namespace_metrics[namespace] = {
+                'namespace': namespace,
+                'pod_count': 0,
+                'cpu_request_millicores': 0,
+                'memory_request_bytes': 0,
+                'gpu_request': 0,
+                'running_pods': 0,
+                'pending_pods': 0,
+                'failed_pods': 0
+            }
+        metrics = self.namespace_metrics[namespace]
+
+        # Count pods by phase
+        metrics['pod_count'] += 1
+        if phase == 'Running':
+            metrics['running_pods'] += 1
+        elif phase == 'Pending':
+            metrics['pending_pods'] += 1
+        elif phase == 'Failed':
+            metrics['failed_pods'] += 1
+
+        # Requests are counted the same way as the typed columns of the cached pod
+        cpu, memory, gpu = pod_requests(pod)
+        metrics['cpu_request_millicores'] += cpu
+        metrics['memory_request_bytes'] += memory
+        metrics['gpu_request'] += gpu
+
+    def results(self) -> dict:
+        return self.namespace_metrics
+
 class KubernetesDataUpdater:
-    def __init__(self, update_interval: int = 300, env_metrics_collector_func=None):  # 5 minutes default
+    def __init__(self, update_interval: int = 300, env_metrics_collector_func=None, sync_mode: str = None):  # 5 minutes default
         self.update_interval = update_interval
         self.thread = None
         self.running = False
         self.env_metrics_collector = env_metrics_collector_func
         self.db = db  # Add database reference
+        self.fetch_parallelism = max(1, int(os.environ.get('FETCH_PARALLELISM', 4)))
+        # 'diff' writes only changed rows, 'swap' rebuilds a staging table and renames it over the live one
+        self.write_mode = os.environ.get('RESOURCE_WRITE_MODE', 'diff').lower()
+        # Page size for limit/continue listing; 0 fetches each type with a single unpaged list
+        self.list_chunk_size = int(os.environ.get('LIST_CHUNK_SIZE', 500))
+
+        # 'poll' re-lists everything every update_interval, 'watch' lists once and then applies watch events
+        self.sync_mode = (sync_mode or os.environ.get('SYNC_MODE', 'poll')).lower()
+        self.watch_timeout = int(os.environ.get('WATCH_TIMEOUT_SECONDS', 300))
+        self.watch_metrics_interval = int(os.environ.get('WATCH_METRICS_INTERVAL', 60))
+        self.watch_batch_size = 500
+        self.watch_retry_max = int(os.environ.get('WATCH_RETRY_MAX_SECONDS', 300))
+        # Metrics history is sampled after every pod sync; compaction and old metric cleanup run at most this often
+        self.metrics_maintenance_interval = int(os.environ.get('METRICS_MAINTENANCE_INTERVAL', 300))
+        self.metrics_data_retention_days = int(os.environ.get('METRICS_DATA_RETENTION_DAYS', 7))
+        self._last_metrics_maintenance = 0
+        self.scheduler = self._build_scheduler()
+        self._wake_event = threading.Event()
+        self._sweep_lock = threading.Lock()
+        self._event_queue = queue.Queue()
+        self._watch_threads = []
+        self._watch_target_map = {}
+        # Held while a type is listed and while its watch events are queued, see _list_for_watch
+        self._watch_locks = {resource_type: threading.Lock() for resource_type in RESOURCE_TYPES}
+        # Types with a re-list scheduled after a failed event batch, and how often they failed in a row
+        self._relist_lock = threading.Lock()
+        self._relist_pending = set()
+        self._relist_failures = {}
 
-    def run_kubectl_command(self, command: str) -> dict:
-        """Execute kubectl command and return JSON output."""
+    def _build_scheduler(self) -> RefreshScheduler:
+        """Poll schedule from the environment: REFRESH_SCHEDULE=adaptive (default) or fixed."""
+        adaptive = os.environ.get('REFRESH_SCHEDULE', 'adaptive').lower() != 'fixed'
+        base_intervals = {rt: self.update_interval for rt in RESOURCE_TYPES}
+        if adaptive:
+            base_intervals.update({rt: v for rt, v in DEFAULT_REFRESH_INTERVALS.items() if rt in base_intervals})
+        base_intervals.update({rt: v for rt, v in _parse_refresh_intervals(os.environ.get('REFRESH_INTERVALS', '')).items()
+                               if rt in base_intervals})
+        return RefreshScheduler(
+            base_intervals,
+            min_interval=float(os.environ.get('REFRESH_MIN_INTERVAL', 15)),
+            max_interval=float(os.environ.get('REFRESH_MAX_INTERVAL', 1800)),
+            jitter=float(os.environ.get('REFRESH_JITTER', 0.1)),
+            adaptive=adaptive,
+        )
+
+    def run_kubectl_command(self, command: str, stream: bool = False):
+        """
+        Execute kubectl command and return JSON output.
+        With stream=True a KubectlItemStream is returned instead, which yields the list's items as
+        they are decoded from the pipe and raises on failure while being iterated.
+        """
+        if stream:
+            return KubectlItemStream(['kubectl'] + shlex.split(command) + ['-o', 'json'])
         try:
             result = subprocess.run(f"kubectl {command} -o json", 
                                  shell=True, 
@@ -28,7 +271,7 @@ class KubernetesDataUpdater:
                 # Handle potential empty output for commands like get
                 if not result.stdout.strip():
                     return {"items": []} 
-                return json.loads(result.stdout)
+                return serializer.loads(result.stdout)
             else:
                 logger.error(f"kubectl command failed: {result.stderr}")
                 return {}
@@ -65,17 +308,17 @@ class KubernetesDataUpdater:
         """Fetch resources using kubectl and add calculated age."""
         try:
             if resource_type == 'pods':
-                data = self.run_kubectl_command('get pods --all-namespaces')
-                pods = data.get('items', [])
-                for pod in pods:
+                pods = []
+                for pod in self.run_kubectl_command('get pods --all-namespaces', stream=True):
                     pod['age'] = self._get_age(pod.get('metadata', {}).get('creationTimestamp'))
+                    pods.append(pod)
                 return pods
 
             elif resource_type == 'services':
-                data = self.run_kubectl_command('get services --all-namespaces')
-                services = data.get('items', [])
-                for svc in services:
+                services = []
+                for svc in self.run_kubectl_command('get services --all-namespaces', stream=True):
                     svc['age'] = self._get_age(svc.get('metadata', {}).get('creationTimestamp'))
+                    services.append(svc)
                 return services
             
             # Add other resource types here if needed, fetching raw data and adding age
@@ -98,163 +341,226 @@ class KubernetesDataUpdater:
         except Exception:
             return '0'
 
-    def _update_resources(self):
-        """Update all cached resources."""
-        if not self.running:
+    def _normalize_list_items(self, resource_type: str, data: dict) -> list:
+        """Fill in kind/apiVersion on raw API list items (kubectl output already has them) and project them."""
+        kind = data.get('kind', '')
+        kind = kind[:-len('List')] if kind.endswith('List') else kind
+        items = data.get('items', [])
+        for item in items:
+            if kind:
+                item.setdefault('kind', kind)
+            item.setdefault('apiVersion', data.get('apiVersion'))
+            project_resource(resource_type, item)
+        return items
+
+    def _iter_resource_pages(self, resource_type: str):
+        """
+        Yield the objects of a resource type one page at a time.
+        With list_chunk_size set, pages are requested from the API server with limit/continue;
+        otherwise a single full kubectl list is made and cut into batches of STREAM_BATCH_SIZE.
+        Either way kubectl output is decoded as it streams in, so neither the raw text nor the
+        whole parsed list is ever held in memory.
+        """
+        if not self.list_chunk_size:
+            stream = KubectlItemStream(['kubectl', 'get', resource_type, '-A', '-o', 'json'])
+            batch = []
+            for item in stream:
+                batch.append(project_resource(resource_type, item))
+                if len(batch) >= STREAM_BATCH_SIZE:
+                    yield batch
+                    batch = []
+            yield batch
             return
+
+        continue_token = None
+        while True:
+            query = {'limit': self.list_chunk_size}
+            if continue_token:
+                query['continue'] = continue_token
+            path = f"{RESOURCE_API_PATHS[resource_type]}?{urlencode(query)}"
+            stream = KubectlItemStream(['kubectl', 'get', '--raw', path])
+            # Raw API items carry no kind/apiVersion; the envelope only has them once streaming is done
+            items = list(stream)
+            yield self._normalize_list_items(resource_type, dict(stream.envelope, items=items))
+
+            continue_token = stream.envelope.get('metadata', {}).get('continue')
+            if not continue_token:
+                break
+
+    def _stream_resource_type(self, resource_type: str, page_callback) -> Optional[int]:
+        """
+        Fetch a resource type page by page, handing each page to page_callback as it arrives.
+        Returns the number of objects fetched, or None on failure (after recording it) so the
+        cache keeps the last-known-good data.
+        """
+        start_time = time.time()
+        count = 0
+        pages = 0
+        try:
+            logger.info(f"Fetching {resource_type}...")
+            for page in self._iter_resource_pages(resource_type):
+                page_callback(page)
+                count += len(page)
+                pages += 1
+            logger.info(f"Successfully fetched {count} {resource_type} in {pages} page(s) in {time.time() - start_time:.2f}s")
+            return count
+        except subprocess.TimeoutExpired:
+            error = "Timeout fetching resources"
+        except json.JSONDecodeError as e:
+            error = f"JSON decode error: {e}"
+        except RuntimeError as e:
+            error = str(e)
+        except Exception as e:
+            error = f"Unexpected error: {e}"
+
+        logger.error(f"Failed to fetch {resource_type} after {time.time() - start_time:.2f}s, keeping cached data: {error}")
+        self.db.record_sync_failure(resource_type, error)
+        return None
+
+    def _fetch_resource_type(self, resource_type: str) -> Optional[list]:
+        """Fetch all objects of one resource type into a list. Returns None on failure."""
+        items = []
+        if self._stream_resource_type(resource_type, items.extend) is None:
+            return None
+        return items
+
+    def _fetch_into_queue(self, resource_type: str, pages: queue.Queue):
+        """Worker: stream the pages of a resource type into the writer queue, then signal completion."""
+        count = self._stream_resource_type(resource_type, lambda page: pages.put(('page', resource_type, page)))
+        pages.put(('done', resource_type, count is not None))
+
+    def _sync_resources_paged(self, resource_types: list, progress_callback=None) -> Optional[dict]:
+        """
+        Fetch resource types concurrently and stream their pages into a diff sync session.
+        Workers hand pages to this thread through a bounded queue, so a single writer touches the
+        database and peak memory is bounded by a few pages rather than by the cluster size.
+        Returns per-type change counts, or None if nothing could be synced.
+        """
+        session = self.db.begin_resource_sync()
+        # Namespace metrics are aggregated from pod pages on their way into staging
+        aggregator = NamespaceMetricsAggregator() if 'pods' in resource_types else None
+        pages = queue.Queue(maxsize=self.fetch_parallelism * 2)
+        synced_types = []
+        failed_types = set()
+        try:
+            with ThreadPoolExecutor(max_workers=self.fetch_parallelism, thread_name_prefix='kubectl-fetch') as executor:
+                for resource_type in resource_types:
+                    executor.submit(self._fetch_into_queue, resource_type, pages)
+
+                # Keep draining until every worker reported back, even after a write error,
+                # so no worker stays blocked on the bounded queue
+                pending = len(resource_types)
+                while pending:
+                    message, resource_type, payload = pages.get()
+                    try:
+                        if message == 'page':
+                            if resource_type not in failed_types:
+                                session.add_page(resource_type, payload)
+                                if resource_type == 'pods':
+                                    aggregator.add_pods(payload)
+                            continue
+                        pending -= 1
+                        if payload and resource_type not in failed_types:
+                            session.finish_type(resource_type)
+                            synced_types.append(resource_type)
+                        else:
+                            session.discard_type(resource_type)
+                    except Exception as e:
+                        logger.error(f"Error staging {resource_type}: {e}")
+                        failed_types.add(resource_type)
+                    if message == 'done' and progress_callback:
+                        progress_callback(resource_type, resource_type in synced_types)
+
+            if not synced_types:
+                logger.error("All resource fetches failed, keeping cached data")
+                return None
+            # Stored with the pods they were aggregated from, in the same transaction
+            return session.commit(aggregator.results() if 'pods' in synced_types else None)
+        except Exception as e:
+            logger.error(f"Error during paged resource sync: {e}", exc_info=True)
+            return None
+        finally:
+            session.close()
+
+    def _update_resources(self, resource_types: Optional[list] = None, progress_callback=None) -> dict:
+        """
+        Update cached resources (all types by default).
+        Sweeps never overlap: a caller arriving while one runs waits for it to finish first.
+        progress_callback(resource_type, ok) is called as each type finishes fetching.
+        Returns {resource_type: (changes, total)} for the types that were synced; changes is None
+        when the write mode does not report per-type changes.
+        """
+        with self._sweep_lock:
+            results = self._sweep_resources(resource_types, progress_callback)
+            # The first sweep with compression enabled provides the samples for its dictionary
+            if results and self.db.needs_compression_dictionary():
+                self.db.train_compression_dictionary()
+            return results
+
+    def refresh_now(self, progress_callback=None) -> dict:
+        """
+        Refresh every resource type right away and reschedule them all from now. In watch mode the
+        types are re-listed into the watch event pipeline instead, so the refresh is applied by
+        the event writer in order with the watch events rather than racing it.
+        """
+        if self.sync_mode == 'watch' and self._watch_target_map:
+            return self._relist_watched_types(RESOURCE_TYPES, progress_callback, wait=True)
+        results = self._update_resources(RESOURCE_TYPES, progress_callback)
+        now = time.time()
+        for resource_type in RESOURCE_TYPES:
+            self.scheduler.record(resource_type, *results.get(resource_type, (None, None)), now)
+        return results
+
+    def _sweep_resources(self, resource_types: Optional[list], progress_callback=None) -> dict:
+        if not self.running:
+            return {}
             
         logger.info("Starting resource cache update...")
+        cycle_start = time.time()
         
         # Resource types to fetch
-        resource_types = ['pods', 'services', 'deployments', 'inferenceservices', 'configmaps', 'secrets', 'nodes']
-        
-        # Dictionary to store all resources
-        all_resources = {}
-        
-        for resource_type in resource_types:
-            try:
-                logger.info(f"Fetching {resource_type}...")
-                
-                if resource_type == 'inferenceservices':
-                    # Custom command for InferenceServices
-                    command = ["get", "inferenceservices", "-A", "-o", "json"]
-                else:
-                    # Standard command for other resources
-                    command = ["get", resource_type, "-A", "-o", "json"]
-                
-                result = subprocess.run(['kubectl'] + command, 
-                                     capture_output=True, text=True, timeout=60)
-                
-                if result.returncode == 0:
-                    data = json.loads(result.stdout)
-                    items = data.get('items', [])
-                    all_resources[resource_type] = items
-                    logger.info(f"Successfully fetched {len(items)} {resource_type}")
-                else:
-                    logger.error(f"Failed to fetch {resource_type}: {result.stderr}")
-                    all_resources[resource_type] = []
-                    
-            except subprocess.TimeoutExpired:
-                logger.error(f"Timeout fetching {resource_type}")
-                all_resources[resource_type] = []
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON decode error for {resource_type}: {e}")
-                all_resources[resource_type] = []
-            except Exception as e:
-                logger.error(f"Unexpected error fetching {resource_type}: {e}")
-                all_resources[resource_type] = []
+        resource_types = resource_types or RESOURCE_TYPES
+        results = {}
         
-        # Update database atomically
-        success = self.db.update_resources_atomically(all_resources)
+        if self.write_mode == 'swap':
+            # Fetch all types concurrently; the database swap below still sees one complete batch
+            all_resources = {}
+            with ThreadPoolExecutor(max_workers=self.fetch_parallelism, thread_name_prefix='kubectl-fetch') as executor:
+                futures = {executor.submit(self._fetch_resource_type, rt): rt for rt in resource_types}
+                for future in as_completed(futures):
+                    items = future.result()
+                    if items is not None:
+                        all_resources[futures[future]] = items
+                    if progress_callback:
+                        progress_callback(futures[future], items is not None)
+            logger.info(f"Fetched {len(all_resources)}/{len(resource_types)} resource types in {time.time() - cycle_start:.2f}s "
+                        f"(parallelism {self.fetch_parallelism})")
+            if not all_resources:
+                logger.error("All resource fetches failed, keeping cached data")
+                return {}
+
+            # Update database atomically
+            aggregator = NamespaceMetricsAggregator()
+            aggregator.add_pods(all_resources.get('pods', []))
+            success = self.db.update_resources_atomically(all_resources, aggregator.results())
+            if success:
+                results = {rt: (None, len(items)) for rt, items in all_resources.items()}
+        else:
+            # Pages are diffed into a staging area as they arrive and applied in one transaction
+            stats = self._sync_resources_paged(resource_types, progress_callback)
+            success = stats is not None
+            if success:
+                results = {
+                    rt: (c['inserted'] + c['updated'] + c['deleted'], c['inserted'] + c['updated'] + c['unchanged'])
+                    for rt, c in stats.items()
+                }
         
         if success:
-            logger.info("Resource cache update completed successfully")
-            
-            # After successful resource update, calculate and store namespace metrics
-            self._update_namespace_metrics()
+            logger.info(f"Resource cache update of {', '.join(resource_types)} completed successfully in {time.time() - cycle_start:.2f}s")
         else:
             logger.error("Failed to update resource cache")
+        return results
     
-    def _update_namespace_metrics(self):
-        """Calculate and store namespace-level resource metrics."""
-        try:
-            logger.info("Calculating namespace resource metrics...")
-            
-            # Get all pods to calculate namespace-level metrics
-            pods = self.db.get_resources('pods')
-            
-            # Dictionary to store namespace metrics
-            namespace_metrics = {}
-            
-            for pod in pods:
-                if not isinstance(pod, dict):
-                    continue
-                    
-                metadata = pod.get('metadata', {})
-                namespace = metadata.get('namespace', 'default')
-                spec = pod.get('spec', {})
-                status = pod.get('status', {})
-                phase = status.get('phase', '')
-                
-                # Initialize namespace metrics if not exists
-                if namespace not in namespace_metrics:
-                    namespace_metrics[namespace] = {
-                        'namespace': namespace,
-                        'pod_count': 0,
-                        'cpu_usage': 0,
-                        'gpu_usage': 0,
-                        'memory_usage': 0,  # in MB
-                        'running_pods': 0,
-                        'pending_pods': 0,
-                        'failed_pods': 0
-                    }
-                
-                # Count pods by phase
-                namespace_metrics[namespace]['pod_count'] += 1
-                if phase == 'Running':
-                    namespace_metrics[namespace]['running_pods'] += 1
-                elif phase == 'Pending':
-                    namespace_metrics[namespace]['pending_pods'] += 1
-                elif phase == 'Failed':
-                    namespace_metrics[namespace]['failed_pods'] += 1
-                
-                # Calculate resource usage from containers
-                for container in spec.get('containers', []):
-                    requests = container.get('resources', {}).get('requests', {})
-                    
-                    # CPU usage
-                    if 'cpu' in requests:
-                        cpu_str = requests['cpu']
-                        if cpu_str.endswith('m'):
-                            namespace_metrics[namespace]['cpu_usage'] += float(cpu_str[:-1]) / 1000
-                        else:
-                            try:
-                                namespace_metrics[namespace]['cpu_usage'] += float(cpu_str)
-                            except ValueError:
-                                pass
-                    
-                    # GPU usage
-                    if 'nvidia.com/gpu' in requests:
-                        try:
-                            namespace_metrics[namespace]['gpu_usage'] += float(requests['nvidia.com/gpu'])
-                        except ValueError:
-                            pass
-                    
-                    # Memory usage (convert to MB)
-                    if 'memory' in requests:
-                        memory_str = requests['memory']
-                        if memory_str.endswith('Mi'):
-                            namespace_metrics[namespace]['memory_usage'] += float(memory_str[:-2])
-                        elif memory_str.endswith('Gi'):
-                            namespace_metrics[namespace]['memory_usage'] += float(memory_str[:-2]) * 1024
-                        elif memory_str.endswith('Ki'):
-                            namespace_metrics[namespace]['memory_usage'] += float(memory_str[:-2]) / 1024
-                        else:
-                            try:
-                                # Assume bytes if no unit
-                                namespace_metrics[namespace]['memory_usage'] += float(memory_str) / (1024 * 1024)
-                            except ValueError:
-                                pass
-            
-            # Store metrics in database for each metric type
-            for namespace, metrics in namespace_metrics.items():
-                # Store GPU metrics
-                if metrics['gpu_usage'] > 0:
-                    self.db.update_metrics('gpu', namespace, metrics)
-                
-                # Store CPU metrics
-                if metrics['cpu_usage'] > 0:
-                    self.db.update_metrics('cpu', namespace, metrics)
-                
-                # Store memory metrics
-                if metrics['memory_usage'] > 0:
-                    self.db.update_metrics('memory', namespace, metrics)
-            
-            logger.info(f"Successfully calculated metrics for {len(namespace_metrics)} namespaces")
-            
-        except Exception as e:
-            logger.error(f"Error calculating namespace metrics: {e}")
-
     def start(self):
         """Start the background updater thread."""
         if not self.running:
@@ -265,19 +571,282 @@ class KubernetesDataUpdater:
 
     def _run(self):
         """Run the update loop."""
+        if self.sync_mode == 'watch':
+            if self._start_watchers():
+                self._run_watch_metrics_loop()
+                return
+            logger.warning("Watch-based sync could not be started, falling back to polling.")
+            self.sync_mode = 'poll'
+
+        while self.running:
+            due = self.scheduler.due(time.time())
+            if due:
+                results = {}
+                try:
+                    results = self._update_resources(due)
+                    # Environment metrics are derived from nodes, so they follow the node schedule
+                    if self.env_metrics_collector and 'nodes' in due:
+                        logger.info("Calling environment metrics collector from background task...")
+                        self.env_metrics_collector() # Call the passed-in function
+                    if 'pods' in results:
+                        self._record_metrics_history()
+                    if 'pods' in results or 'nodes' in results:
+                        self._warm_cluster_snapshot()
+                except Exception as e:
+                    logger.error(f"Error in update loop: {str(e)}")
+                now = time.time()
+                for resource_type in due:
+                    self.scheduler.record(resource_type, *results.get(resource_type, (None, None)), now)
+            self._wake_event.wait(self.scheduler.seconds_until_next(time.time()))
+            self._wake_event.clear()
+
+    def _record_metrics_history(self):
+        """Add a metrics history sample and, every metrics_maintenance_interval, compact the history and clear old metrics."""
+        self.db.record_metrics_sample()
+        now = time.time()
+        if now - self._last_metrics_maintenance >= self.metrics_maintenance_interval:
+            self._last_metrics_maintenance = now
+            self.db.compact_metrics_history(now)
+            self.db.clear_old_data(self.metrics_data_retention_days)
+
+    def _warm_cluster_snapshot(self):
+        """Build the dashboard snapshot for the data just synced, so the next dashboard request does not wait for it."""
+        # Imported here: cluster_snapshot depends on the database module, not on the updater
+        from cluster_snapshot import snapshots
+        snapshots.current()
+
+    def request_refresh(self, resource_types: Optional[list] = None):
+        """Make the poll loop refresh the given types (all by default) right away."""
+        self.scheduler.trigger(resource_types)
+        self._wake_event.set()
+
+    def _run_watch_metrics_loop(self):
+        """In watch mode resources stay current on their own, so only derived metrics are refreshed periodically."""
         while self.running:
+            time.sleep(self.watch_metrics_interval)
             try:
-                self._update_resources()
                 if self.env_metrics_collector:
-                    logger.info("Calling environment metrics collector from background task...")
-                    self.env_metrics_collector() # Call the passed-in function
+                    self.env_metrics_collector()
+                self._record_metrics_history()
+                self._warm_cluster_snapshot()
+                # Watch mode has no sweeps, so the dictionary is trained once the initial lists are cached
+                if self.db.needs_compression_dictionary():
+                    self.db.train_compression_dictionary()
             except Exception as e:
-                logger.error(f"Error in update loop: {str(e)}")
-            time.sleep(self.update_interval)
+                logger.error(f"Error in watch metrics loop: {str(e)}")
+
+    def _watch_targets(self) -> dict:
+        """Map each cached resource type to the list function (and its positional args) used to list and watch it."""
+        core = k8s_client.CoreV1Api()
+        apps = k8s_client.AppsV1Api()
+        custom = k8s_client.CustomObjectsApi()
+        return {
+            'pods': (core.list_pod_for_all_namespaces, ()),
+            'services': (core.list_service_for_all_namespaces, ()),
+            'deployments': (apps.list_deployment_for_all_namespaces, ()),
+            'inferenceservices': (custom.list_cluster_custom_object, ('serving.kserve.io', 'v1beta1', 'inferenceservices')),
+            'configmaps': (core.list_config_map_for_all_namespaces, ()),
+            'secrets': (core.list_secret_for_all_namespaces, ()),
+            'nodes': (core.list_node, ()),
+            'namespaces': (core.list_namespace, ()),
+        }
+
+    def _start_watchers(self) -> bool:
+        """Load cluster credentials and start one list/watch thread per resource type plus the event writer."""
+        if not kubernetes_client_available:
+            return False
+        try:
+            try:
+                k8s_config.load_incluster_config()
+            except k8s_config.ConfigException:
+                k8s_config.load_kube_config()
+            targets = self._watch_targets()
+        except Exception as e:
+            logger.error(f"Failed to configure kubernetes client for watch mode: {e}")
+            return False
+        self._watch_target_map = targets
+
+        writer = threading.Thread(target=self._apply_watch_events, daemon=True)
+        writer.start()
+        self._watch_threads = [writer]
+        for resource_type in RESOURCE_TYPES:
+            func, args = targets[resource_type]
+            watcher = threading.Thread(target=self._watch_resource_type, args=(resource_type, func, args), daemon=True)
+            watcher.start()
+            self._watch_threads.append(watcher)
+        logger.info(f"Watch-based sync started for {len(RESOURCE_TYPES)} resource types")
+        return True
+
+    def _list_for_watch(self, resource_type: str, func, args) -> Tuple[str, int]:
+        """
+        List a resource type and queue the result as a full resync. Returns the list resourceVersion
+        and the number of objects listed.
+        The type's watch lock is held from the list request until the SYNC is queued, and the
+        watcher holds it to queue each event. So every event queued before the SYNC predates the
+        list, and the events queued after it, even older ones, are replayed in order on top of it.
+        """
+        start_time = time.time()
+        with self._watch_locks[resource_type]:
+            response = func(*args, _preload_content=False)
+            data = serializer.loads(response.data)
+
+            # Items returned by the API server carry no kind/apiVersion, unlike kubectl output
+            items = self._normalize_list_items(resource_type, data)
+
+            self._event_queue.put(('SYNC', resource_type, items))
+        resource_version = data.get('metadata', {}).get('resourceVersion')
+        logger.info(f"Listed {len(items)} {resource_type} at resourceVersion {resource_version} in {time.time() - start_time:.2f}s")
+        return resource_version, len(items)
+
+    def _relist_watched_types(self, resource_types: list, progress_callback=None, wait: bool = False) -> dict:
+        """
+        Re-list resource types in watch mode, each as a SYNC on the watch event queue.
+        With wait, returns once the event writer has applied them.
+        Returns {resource_type: (None, total)} for the types that were listed.
+        """
+        def relist(resource_type):
+            func, args = self._watch_target_map[resource_type]
+            try:
+                return self._list_for_watch(resource_type, func, args)[1]
+            except Exception as e:
+                logger.error(f"Failed to re-list {resource_type}, keeping cached data: {e}")
+                self.db.record_sync_failure(resource_type, str(e))
+                return None
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.fetch_parallelism, thread_name_prefix='watch-relist') as executor:
+            futures = {executor.submit(relist, rt): rt for rt in resource_types}
+            for future in as_completed(futures):
+                resource_type, count = futures[future], future.result()
+                if count is not None:
+                    results[resource_type] = (None, count)
+                if progress_callback:
+                    progress_callback(resource_type, count is not None)
+
+        if wait and results:
+            applied = threading.Event()
+            self._event_queue.put(('FLUSH', None, applied))
+            while self.running and not applied.wait(1):
+                pass
+        return results
+
+    def _watch_resource_type(self, resource_type: str, func, args):
+        """
+        List then watch a resource type, re-listing only when the resourceVersion has expired (410 Gone).
+        Failures are retried after a delay that doubles up to watch_retry_max, so a type the API
+        server does not serve (404, e.g. a CRD that is not installed) is only checked now and then.
+        """
+        resource_version = None
+        retry_delay = WATCH_RETRY_MIN_SECONDS
+        while self.running:
+            try:
+                if resource_version is None:
+                    resource_version, _ = self._list_for_watch(resource_type, func, args)
+                    retry_delay = WATCH_RETRY_MIN_SECONDS
+
+                watcher = k8s_watch.Watch()
+                for event in watcher.stream(func, *args,
+                                            resource_version=resource_version,
+                                            allow_watch_bookmarks=True,
+                                            timeout_seconds=self.watch_timeout):
+                    if not self.running:
+                        watcher.stop()
+                        break
+
+                    event_type = event.get('type')
+                    raw_object = event.get('raw_object') or {}
+                    if event_type == 'ERROR':
+                        if raw_object.get('code') == 410:
+                            logger.info(f"Watch for {resource_type} expired (410 Gone), re-listing")
+                            resource_version = None
+                            break
+                        raise RuntimeError(raw_object.get('message', 'unknown watch error'))
+
+                    # Bookmarks only advance the resourceVersion so a reconnect does not need a re-list
+                    resource_version = raw_object.get('metadata', {}).get('resourceVersion') or resource_version
+                    if event_type == 'BOOKMARK':
+                        continue
+                    resource = project_resource(resource_type, raw_object)
+                    with self._watch_locks[resource_type]:
+                        self._event_queue.put((event_type, resource_type, resource))
+            except ApiException as e:
+                if e.status == 410:
+                    logger.info(f"Watch for {resource_type} expired (410 Gone), re-listing")
+                    resource_version = None
+                    continue
+                if e.status == 404:
+                    logger.warning(f"{resource_type} are not served by the API server (404), checking again in {retry_delay}s")
+                else:
+                    logger.error(f"API error watching {resource_type}: {e.status} {e.reason}, retrying in {retry_delay}s")
+                error = f"API error {e.status}: {e.reason}"
+            except Exception as e:
+                logger.error(f"Error watching {resource_type}: {e}, retrying in {retry_delay}s")
+                error = str(e)
+            else:
+                # The watch timed out or was re-opened normally
+                retry_delay = WATCH_RETRY_MIN_SECONDS
+                continue
+            self.db.record_sync_failure(resource_type, error)
+            time.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, self.watch_retry_max)
+
+    def _apply_watch_events(self):
+        """Drain the watch event queue and apply events to the database in batches, in arrival order."""
+        while self.running:
+            try:
+                batch = [self._event_queue.get(timeout=1)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.watch_batch_size:
+                try:
+                    batch.append(self._event_queue.get_nowait())
+                except queue.Empty:
+                    break
+            # FLUSH markers are set once every event queued before them has been applied
+            markers = [payload for event_type, _, payload in batch if event_type == 'FLUSH']
+            events = [event for event in batch if event[0] != 'FLUSH']
+            if events:
+                failed_types = {resource_type for _, resource_type, _ in events}
+                if self.db.apply_resource_events(events):
+                    with self._relist_lock:
+                        for resource_type in failed_types:
+                            self._relist_failures.pop(resource_type, None)
+                else:
+                    # The events are lost, so the cache would drift from the cluster until the next 410
+                    logger.error(f"Failed to apply {len(events)} watch events, re-listing {', '.join(sorted(failed_types))}")
+                    self._schedule_relist(failed_types)
+            for marker in markers:
+                marker.set()
+
+    def _schedule_relist(self, resource_types: set):
+        """
+        Re-list types in the background after their watch events could not be applied. The delay
+        doubles (up to watch_retry_max) with each failure in a row, so a database that keeps
+        failing is not flooded with re-lists.
+        """
+        with self._relist_lock:
+            resource_types = sorted(set(resource_types) - self._relist_pending)
+            if not resource_types:
+                return
+            self._relist_pending.update(resource_types)
+            failures = max(self._relist_failures.get(rt, 0) for rt in resource_types)
+            for resource_type in resource_types:
+                self._relist_failures[resource_type] = self._relist_failures.get(resource_type, 0) + 1
+        delay = min(WATCH_RETRY_MIN_SECONDS * 2 ** failures, self.watch_retry_max)
+
+        def relist():
+            time.sleep(delay)
+            with self._relist_lock:
+                self._relist_pending.difference_update(resource_types)
+            if self.running:
+                self._relist_watched_types(resource_types)
+
+        threading.Thread(target=relist, daemon=True).start()
 
     def stop(self):
         """Stop the background updater thread."""
         self.running = False
+        self._wake_event.set()
         if self.thread:
             self.thread.join()
             logger.info("Background updater stopped")
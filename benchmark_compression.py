@@ -0,0 +1,88 @@
+"""
+Compare the storage encodings available for the resources.data column (see resource_codec.py):
+total stored size and per-object encode/decode cost against plain JSON.
+
+    python benchmark_compression.py --db /data/kubernetes_cache.db
+    kubectl get configmaps -A -o json > cm.json && python benchmark_compression.py --json cm.json
+"""
+import argparse
+import json
+import os
+import random
+import time
+from typing import Dict, List
+
+from resource_codec import ResourceCodec, train_dictionary, zstd_available
+
+def load_from_db(db_path: str) -> List[Dict]:
+    # Imported here so --json runs do not touch DB_PATH
+    os.environ['DB_PATH'] = db_path
+    from database import db
+    resources = []
+    with db._reader() as conn:
+        for (data,) in conn.execute('SELECT data FROM resources'):
+            resources.append(db.codec.decode(data))
+    return resources
+
+def load_from_json(path: str) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        document = json.load(f)
+    return document.get('items', []) if isinstance(document, dict) else document
+
+def measure(name: str, codec: ResourceCodec, resources: List[Dict]) -> Dict:
+    start = time.perf_counter()
+    encoded = [codec.encode(resource) for resource in resources]
+    encode_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for value in encoded:
+        codec.decode(value)
+    decode_seconds = time.perf_counter() - start
+
+    size = sum(len(value.encode('utf-8')) if isinstance(value, str) else len(value) for value in encoded)
+    return {
+        'name': name,
+        'bytes': size,
+        'encode_us': encode_seconds / len(resources) * 1e6,
+        'decode_us': decode_seconds / len(resources) * 1e6,
+    }
+
+def run(resources: List[Dict], sample_size: int) -> List[Dict]:
+    samples = [json.dumps(resource, separators=(',', ':')).encode('utf-8')
+               for resource in random.sample(resources, min(sample_size, len(resources)))]
+    codecs = ['zlib'] + (['zstd'] if zstd_available else [])
+
+    results = [measure('json', ResourceCodec('none'), resources)]
+    for compression in codecs:
+        results.append(measure(compression, ResourceCodec(compression), resources))
+        codec = ResourceCodec(compression)
+        codec.register_dictionary(1, compression, train_dictionary(compression, samples))
+        results.append(measure(f'{compression}+dict', codec, resources))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark resource data encodings')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--db', default=os.environ.get('DB_PATH', 'kubernetes_cache.db'),
+                        help='SQLite cache to read resources from (default: DB_PATH)')
+    source.add_argument('--json', help='kubectl "-o json" list output to read resources from')
+    parser.add_argument('--samples', type=int, default=1000, help='objects used to train dictionaries')
+    args = parser.parse_args()
+
+    resources = load_from_json(args.json) if args.json else load_from_db(args.db)
+    if not resources:
+        print('No resources to benchmark')
+        return
+    if not zstd_available:
+        print('zstandard is not installed, skipping zstd')
+
+    results = run(resources, args.samples)
+    baseline = results[0]['bytes']
+    print(f'{len(resources)} objects')
+    print(f"{'encoding':<12}{'total KB':>12}{'ratio':>8}{'encode us':>12}{'decode us':>12}")
+    for result in results:
+        print(f"{result['name']:<12}{result['bytes'] / 1024:>12.1f}{baseline / result['bytes']:>8.2f}"
+              f"{result['encode_us']:>12.1f}{result['decode_us']:>12.1f}")
+
+if __name__ == '__main__':
+    main()
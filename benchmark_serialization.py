@@ -0,0 +1,136 @@
+"""
+Compare the JSON serializers available to the cache and API (see serializer.py) and the
+response encodings (see response_compression.py) on a pod list: encode/decode time and bytes.
+
+    python benchmark_serialization.py --pods 20000
+    kubectl get pods -A -o json > pods.json && python benchmark_serialization.py --json pods.json
+"""
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from response_compression import brotli_available, compress_body
+from serializer import JsonSerializer, orjson_available
+
+def synthetic_pods(count: int, seed: int = 0) -> List[Dict]:
+    """Pods shaped like cached (projected) kubectl output, spread over namespaces, nodes and owners."""
+    rng = random.Random(seed)
+    phases = ['Running'] * 8 + ['Pending', 'Succeeded', 'Failed']
+    pods = []
+    for i in range(count):
+        namespace = f'team-{i % 40}'
+        owner = f'workload-{i % 500}'
+        gpus = rng.choice([0, 0, 0, 1, 2, 4, 8])
+        requests = {'cpu': f'{rng.choice([100, 250, 500, 1000, 4000])}m', 'memory': f'{rng.choice([128, 512, 2048, 16384])}Mi'}
+        if gpus:
+            requests['nvidia.com/gpu'] = str(gpus)
+        pods.append({
+            'apiVersion': 'v1',
+            'kind': 'Pod',
+            'metadata': {
+                'name': f'{owner}-{i:06d}-{rng.getrandbits(20):05x}',
+                'namespace': namespace,
+                'uid': f'{rng.getrandbits(128):032x}',
+                'resourceVersion': str(1000000 + i),
+                'creationTimestamp': f'2024-0{1 + i % 9}-{1 + i % 28:02d}T{i % 24:02d}:00:00Z',
+                'labels': {'app': owner, 'team': namespace, 'pod-template-hash': f'{rng.getrandbits(32):08x}'},
+                'ownerReferences': [{'apiVersion': 'apps/v1', 'kind': 'ReplicaSet', 'name': f'{owner}-rs', 'controller': True}],
+            },
+            'spec': {
+                'nodeName': f'node-{i % 200}',
+                'containers': [{
+                    'name': 'main',
+                    'image': f'registry.example.com/{namespace}/{owner}:v{i % 7}',
+                    'resources': {'requests': requests, 'limits': dict(requests)},
+                    'ports': [{'containerPort': 8080, 'protocol': 'TCP'}],
+                }],
+                'restartPolicy': 'Always',
+                'serviceAccountName': 'default',
+                'tolerations': [{'key': 'nvidia.com/gpu', 'operator': 'Exists', 'effect': 'NoSchedule'}] if gpus else [],
+            },
+            'status': {
+                'phase': rng.choice(phases),
+                'podIP': f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}',
+                'hostIP': f'192.168.{i % 200 // 256}.{i % 200}',
+                'conditions': [{'type': t, 'status': 'True', 'lastTransitionTime': '2024-01-01T00:00:00Z'}
+                               for t in ('Initialized', 'Ready', 'ContainersReady', 'PodScheduled')],
+                'containerStatuses': [{'name': 'main', 'ready': True, 'restartCount': rng.choice([0, 0, 0, 1, 5]),
+                                       'image': f'registry.example.com/{namespace}/{owner}:v{i % 7}'}],
+            },
+        })
+    return pods
+
+def load_from_json(path: str) -> List[Dict]:
+    with open(path, 'rb') as f:
+        document = JsonSerializer('json').loads(f.read())
+    return document.get('items', []) if isinstance(document, dict) else document
+
+def time_call(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def measure_serializers(pods: List[Dict], repeat: int) -> List[Dict]:
+    names = ['json'] + (['orjson'] if orjson_available else [])
+    document = {'data': {'items': pods, 'totalCount': len(pods)}}
+    results = []
+    for name in names:
+        serializer = JsonSerializer(name)
+        body = serializer.dumps_bytes(document)
+        # Per-object encode/decode is what the cache does on every write and cold read
+        objects = [serializer.dumps_bytes(pod) for pod in pods]
+        results.append({
+            'name': name,
+            'bytes': len(body),
+            'encode_ms': time_call(lambda: serializer.dumps_bytes(document), repeat) * 1000,
+            'decode_ms': time_call(lambda: serializer.loads(body), repeat) * 1000,
+            'object_encode_us': time_call(lambda: [serializer.dumps_bytes(pod) for pod in pods], 1) / len(pods) * 1e6,
+            'object_decode_us': time_call(lambda: [serializer.loads(value) for value in objects], 1) / len(pods) * 1e6,
+        })
+    return results
+
+def measure_encodings(body: bytes, repeat: int) -> List[Dict]:
+    results = [{'name': 'identity', 'bytes': len(body), 'compress_ms': 0.0}]
+    for encoding in ['gzip'] + (['br'] if brotli_available else []):
+        results.append({
+            'name': encoding,
+            'bytes': len(compress_body(body, encoding)),
+            'compress_ms': time_call(lambda: compress_body(body, encoding), repeat) * 1000,
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON serializers and response encodings')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--pods', type=int, default=20000, help='number of synthetic pods (default 20000)')
+    source.add_argument('--json', help='kubectl "-o json" list output to use instead of synthetic pods')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement, the best is reported')
+    args = parser.parse_args()
+
+    pods = load_from_json(args.json) if args.json else synthetic_pods(args.pods)
+    if not pods:
+        print('No objects to benchmark')
+        return
+    if not orjson_available:
+        print('orjson is not installed, skipping orjson')
+    if not brotli_available:
+        print('brotli is not installed, skipping br')
+
+    print(f'{len(pods)} objects')
+    print(f"{'serializer':<12}{'KB':>10}{'encode ms':>12}{'decode ms':>12}{'obj enc us':>12}{'obj dec us':>12}")
+    for result in measure_serializers(pods, args.repeat):
+        print(f"{result['name']:<12}{result['bytes'] / 1024:>10.1f}{result['encode_ms']:>12.1f}{result['decode_ms']:>12.1f}"
+              f"{result['object_encode_us']:>12.1f}{result['object_decode_us']:>12.1f}")
+
+    body = JsonSerializer().dumps_bytes({'data': {'items': pods, 'totalCount': len(pods)}})
+    print()
+    print(f"{'encoding':<12}{'KB':>10}{'ratio':>8}{'compress ms':>14}")
+    for result in measure_encodings(body, args.repeat):
+        print(f"{result['name']:<12}{result['bytes'] / 1024:>10.1f}{len(body) / result['bytes']:>8.2f}{result['compress_ms']:>14.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+import logging
+import threading
+from contextlib import closing
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from database import db, NAMESPACE_METRICS_TYPE
+
+logger = logging.getLogger(__name__)
+
+# GPU memory keys looked up on node capacity/allocatable/labels and on container requests/limits
+NODE_GPU_MEMORY_KEYS = [
+    'nvidia.com/gpu.memory',
+    'nvidia.com/gpu-memory',
+    'gpu-memory',
+    'nvidia.com/mig-1g.5gb',  # For MIG instances
+    'nvidia.com/mig-2g.10gb',
+    'nvidia.com/mig-3g.20gb',
+    'nvidia.com/mig-7g.40gb'
+]
+CONTAINER_GPU_MEMORY_KEYS = [
+    'nvidia.com/gpu.memory',
+    'nvidia.com/gpu-memory',
+    'gpu-memory'
+]
+# Memory of known GPU products, for nodes that do not advertise it (a basic mapping)
+GPU_PRODUCT_MEMORY = {
+    'Tesla-V100-SXM2-16GB': '16Gi',
+    'Tesla-V100-SXM2-32GB': '32Gi',
+    'Tesla-T4': '16Gi',
+    'Tesla-P100-PCIE-16GB': '16Gi',
+    'Tesla-K80': '12Gi',
+    'GeForce-RTX-3090': '24Gi',
+    'GeForce-RTX-4090': '24Gi',
+    'A100-SXM4-40GB': '40Gi',
+    'A100-SXM4-80GB': '80Gi',
+    'H100-SXM5-80GB': '80Gi'
+}
+
+def get_pod_owner(metadata):
+    """Get the owner reference of a pod (deployment, job, etc.)."""
+    owner_refs = metadata.get('ownerReferences', [])
+    if owner_refs:
+        owner = owner_refs[0]  # Take the first owner
+        return f"{owner.get('kind', 'Unknown')}/{owner.get('name', 'Unknown')}"
+    return "Direct"
+
+def _node_gpu_memory(node: Dict) -> Optional[str]:
+    """GPU memory of a node from its capacity, allocatable, labels or GPU product, if known."""
+    metadata = node.get('metadata', {})
+    labels = metadata.get('labels', {})
+    status = node.get('status', {})
+    for source in (status.get('capacity', {}), status.get('allocatable', {}), labels):
+        for key in NODE_GPU_MEMORY_KEYS:
+            if source.get(key):
+                return source[key]
+    gpu_product = labels.get('nvidia.com/gpu.product', '')
+    return GPU_PRODUCT_MEMORY.get(gpu_product) if gpu_product else None
+
+def _gpu_pod_entry(pod: Dict, node_gpu_memory_map: Dict[str, str]) -> Optional[Dict]:
+    """The /api/gpu-pods entry of a pod, or None if it requests no GPUs."""
+    metadata = pod.get('metadata', {})
+    spec = pod.get('spec', {})
+    gpu_request_count = 0
+    gpu_memory_request = '0'
+
+    # Check containers and initContainers for GPU requests
+    for container_type in ['containers', 'initContainers']:
+        for container in spec.get(container_type, []):
+            resources = container.get('resources', {})
+            requests = resources.get('requests', {})
+            limits = resources.get('limits', {})
+            if not requests:
+                continue
+            gpu_val_str = requests.get('nvidia.com/gpu', '0')
+            try:
+                current_container_gpu_request = int(gpu_val_str)
+            except ValueError:
+                logger.warning(f"Could not parse GPU request value '{gpu_val_str}' for container {container.get('name')} in pod {metadata.get('name')}")
+                continue
+            if current_container_gpu_request > 0:
+                gpu_request_count += current_container_gpu_request
+                for mem_key in CONTAINER_GPU_MEMORY_KEYS:
+                    if mem_key in requests:
+                        gpu_memory_request = requests[mem_key]
+                        break
+                    elif mem_key in limits:
+                        gpu_memory_request = limits[mem_key]
+                        break
+
+    if gpu_request_count == 0:
+        return None
+
+    pod_node = spec.get('nodeName', '')
+    # If no explicit GPU memory request, infer the per-GPU share from the node's GPU memory
+    if gpu_memory_request == '0' and pod_node in node_gpu_memory_map:
+        node_gpu_memory = node_gpu_memory_map[pod_node]
+        try:
+            if node_gpu_memory.endswith('Gi'):
+                gpu_memory_request = f"{int(node_gpu_memory[:-2]) // gpu_request_count}Gi"
+            elif node_gpu_memory.endswith('Mi'):
+                gpu_memory_request = f"{int(node_gpu_memory[:-2]) // gpu_request_count}Mi"
+        except (ValueError, TypeError):
+            pass
+
+    return {
+        'name': metadata.get('name', ''),
+        'namespace': metadata.get('namespace', ''),
+        'node': pod_node,
+        'status': pod.get('status', {}).get('phase', ''),
+        'gpu_count': gpu_request_count,
+        'gpu_memory': gpu_memory_request if gpu_memory_request != '0' else 'Unknown'
+    }
+
+def _gpu_queue_entry(pod: Dict) -> Dict:
+    """A pending GPU pod as listed by /api/gpu-queue, without the wait time (computed when served)."""
+    metadata = pod.get('metadata', {})
+    spec = pod.get('spec', {})
+    conditions = pod.get('status', {}).get('conditions', [])
+    unscheduled_condition = next(
+        (c for c in conditions if c.get('type') == 'PodScheduled' and c.get('status') == 'False'),
+        {}
+    )
+    # The queue counts regular containers only, like the scheduler's view of the pod's request
+    gpu_request = 0
+    for container in spec.get('containers', []):
+        requests = container.get('resources', {}).get('requests', {})
+        try:
+            gpu_request += int(requests.get('nvidia.com/gpu', 0))
+        except ValueError:
+            pass
+
+    created_at = None
+    creation_time_str = metadata.get('creationTimestamp', '')
+    if creation_time_str:
+        try:
+            created_at = datetime.fromisoformat(creation_time_str.replace('Z', '+00:00'))
+        except ValueError:
+            pass
+
+    return {
+        'name': metadata.get('name', ''),
+        'namespace': metadata.get('namespace', ''),
+        'gpu_request': gpu_request,
+        'creation_time': creation_time_str,
+        'created_at': created_at,
+        'reason': unscheduled_condition.get('reason', 'Unknown'),
+        'message': unscheduled_condition.get('message', ''),
+        'node_selector': spec.get('nodeSelector', {}),
+        'tolerations': len(spec.get('tolerations', [])),
+        'priority_class': spec.get('priorityClassName', ''),
+        'owner': get_pod_owner(metadata)
+    }
+
+def _grouped(totals: List[Dict]) -> Dict[str, Dict]:
+    return {row['group_value']: {k: v for k, v in row.items() if k != 'group_value'} for row in totals}
+
+def build_cluster_snapshot(database, key: Tuple, environment: Optional[Dict]) -> Dict:
+    """
+    Compute every dashboard aggregate once per change: per-namespace totals from the namespace
+    metrics stored with each pod sync, the other request totals from the typed columns in SQL,
+    and the GPU pod list and pending GPU queue from the objects of the pods whose gpu_request
+    column is set, the only ones decoded. Pods requesting GPUs only in initContainers are
+    therefore not listed, just as the queue never counted them.
+    """
+    node_gpu_memory_map = {}
+    for node in database.get_resources('nodes'):
+        gpu_memory = _node_gpu_memory(node)
+        if gpu_memory:
+            node_gpu_memory_map[node.get('metadata', {}).get('name', '')] = gpu_memory
+
+    gpu_pods, gpu_queue = [], []
+    with closing(database.iter_resources('pods', min_gpu_request=1)) as pods:
+        for pod in pods:
+            if not isinstance(pod, dict):
+                continue
+            entry = _gpu_pod_entry(pod, node_gpu_memory_map)
+            if entry is None:
+                continue
+            gpu_pods.append(entry)
+            if entry['status'] == 'Pending':
+                queue_entry = _gpu_queue_entry(pod)
+                if queue_entry['gpu_request'] > 0:
+                    gpu_queue.append(queue_entry)
+    # Oldest first, i.e. longest waiting first
+    gpu_queue.sort(key=lambda p: p['created_at'] or datetime.max.replace(tzinfo=timezone.utc))
+
+    return {
+        'key': key,
+        'built_at': datetime.now(timezone.utc).isoformat(),
+        'environment': environment,
+        'by_phase': _grouped(database.get_pod_request_totals(group_by='phase')),
+        'by_namespace': {m['namespace']: m for m in database.get_metrics(NAMESPACE_METRICS_TYPE)},
+        'by_node': _grouped(database.get_pod_request_totals(group_by='node_name')),
+        'running_by_node': _grouped(database.get_pod_request_totals(group_by='node_name', phase='Running')),
+        'by_owner': _grouped(database.get_pod_request_totals(group_by='owner')),
+        'gpu_pods': gpu_pods,
+        'gpu_queue': gpu_queue,
+    }
+
+class ClusterSnapshots:
+    """
+    Holds the cluster aggregate snapshot for the current pods/nodes generations and environment
+    metrics row. It is rebuilt at most once per change, however many requests ask for it; the
+    returned snapshot is shared and must not be modified.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def _current_key(self) -> Tuple[Tuple, Optional[Dict]]:
+        environment = self.database.get_latest_environment_metrics()
+        key = (
+            self.database.get_generation('pods'),
+            self.database.get_generation('nodes'),
+            environment.get('id') if environment else None,
+        )
+        return key, environment
+
+    def current(self) -> Dict:
+        key, environment = self._current_key()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot['key'] == key:
+            return snapshot
+        with self._lock:
+            # Another request may have rebuilt it while this one waited
+            if self._snapshot is not None and self._snapshot['key'] == key:
+                return self._snapshot
+            self._snapshot = build_cluster_snapshot(self.database, key, environment)
+            logger.info(f"Built cluster snapshot for pods generation {key[0]}, nodes generation {key[1]}")
+            return self._snapshot
+
+snapshots = ClusterSnapshots(db)
@@ -1,15 +1,315 @@
 import sqlite3
 import json
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 import os
+import hashlib
+import base64
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from resource_fields import TYPED_COLUMNS, COLUMN_FIELDS, extract_typed_columns, project_fields
+from resource_codec import ResourceCodec, train_dictionary
+from serializer import serializer
+from label_selector import parse_label_selector
+
+# Column layout shared by the live resources table and the staging table used for atomic swaps
+RESOURCES_TABLE_COLUMNS = '''
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    resource_type TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    name TEXT NOT NULL,
+    data TEXT NOT NULL,
+    resource_version TEXT,
+    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+''' + ''.join(f'    {column} {column_type},\n' for column, column_type in TYPED_COLUMNS) + '''
+    UNIQUE(resource_type, namespace, name)
+'''
+
+TYPED_COLUMN_NAMES = [column for column, _ in TYPED_COLUMNS]
+TYPED_COLUMN_LIST = ', '.join(TYPED_COLUMN_NAMES)
+TYPED_COLUMN_PLACEHOLDERS = ', '.join('?' for _ in TYPED_COLUMNS)
+
+# Indexes on the typed columns. They are (re)created after a table swap, since the
+# staging table is built without them.
+RESOURCE_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_resources_phase ON resources(resource_type, phase)',
+    'CREATE INDEX IF NOT EXISTS idx_resources_node ON resources(resource_type, node_name)',
+    'CREATE INDEX IF NOT EXISTS idx_resources_owner ON resources(resource_type, owner_kind, owner_name)',
+    'CREATE INDEX IF NOT EXISTS idx_resources_gpu ON resources(resource_type, phase, gpu_request) WHERE gpu_request > 0',
+    'CREATE INDEX IF NOT EXISTS idx_resources_created ON resources(resource_type, creation_timestamp)',
+]
+
+# Full-text search index over the identifying fields of every cached object. It is an FTS5
+# external-content table over resources, kept in sync by triggers and rebuilt after a swap.
+# The trigram tokenizer matches any substring of 3+ characters (e.g. part of a pod name).
+SEARCH_COLUMNS = ['resource_type', 'name', 'namespace', 'labels', 'annotation_keys', 'images']
+# bm25 weight per SEARCH_COLUMNS entry: a hit in the name ranks above one in labels or images
+SEARCH_WEIGHTS = [0.0, 10.0, 2.0, 4.0, 1.0, 3.0]
+SEARCH_MIN_TERM_LENGTH = 3
+_search_columns = ', '.join(SEARCH_COLUMNS)
+_new_search_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+_old_search_values = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+RESOURCE_SEARCH_TRIGGERS = [
+    f'''CREATE TRIGGER IF NOT EXISTS resources_search_insert AFTER INSERT ON resources BEGIN
+        INSERT INTO resources_search (rowid, {_search_columns}) VALUES (new.id, {_new_search_values});
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS resources_search_delete AFTER DELETE ON resources BEGIN
+        INSERT INTO resources_search (resources_search, rowid, {_search_columns}) VALUES ('delete', old.id, {_old_search_values});
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS resources_search_update AFTER UPDATE OF {_search_columns} ON resources BEGIN
+        INSERT INTO resources_search (resources_search, rowid, {_search_columns}) VALUES ('delete', old.id, {_old_search_values});
+        INSERT INTO resources_search (rowid, {_search_columns}) VALUES (new.id, {_new_search_values});
+    END''',
+]
+
+# Inverted label index: one (resource_type, label_key, label_value) -> resource id row per label,
+# maintained from the labels column by triggers and rebuilt after a swap like the search index
+RESOURCE_LABEL_TRIGGERS = [
+    '''CREATE TRIGGER IF NOT EXISTS resource_labels_insert AFTER INSERT ON resources
+    WHEN new.labels IS NOT NULL BEGIN
+        INSERT OR IGNORE INTO resource_labels (resource_type, label_key, label_value, resource_id)
+        SELECT new.resource_type, key, value, new.id FROM json_each(new.labels);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS resource_labels_delete AFTER DELETE ON resources
+    WHEN old.labels IS NOT NULL BEGIN
+        DELETE FROM resource_labels WHERE resource_id = old.id;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS resource_labels_update AFTER UPDATE OF resource_type, labels ON resources BEGIN
+        DELETE FROM resource_labels WHERE resource_id = old.id;
+        INSERT OR IGNORE INTO resource_labels (resource_type, label_key, label_value, resource_id)
+        SELECT new.resource_type, key, value, new.id FROM json_each(new.labels) WHERE new.labels IS NOT NULL;
+    END''',
+]
+
+# Environment metrics history: a raw sample per pod sync for the cluster ('' namespace) and each
+# namespace, averaged into 5 minute and 1 hour buckets. Each tier keeps METRICS_RETENTION_HOURS.
+METRICS_TIERS = [('raw', 0), ('5m', 300), ('1h', 3600)]
+METRICS_HISTORY_COLUMNS = [
+    'allocatable_cpu_millicores', 'allocatable_memory_bytes', 'allocatable_gpus', 'allocatable_pods',
+    'requested_cpu_millicores', 'requested_memory_bytes', 'requested_gpus', 'pending_gpus',
+    'pod_count', 'running_pods', 'pending_pods', 'failed_pods',
+]
+# Longest range served from each tier before a coarser one is used, keeping charts to a few hundred points
+METRICS_TIER_MAX_RANGE = {'raw': 6 * 3600, '5m': 3 * 86400}
+
+def _parse_metrics_retention(value: str) -> Dict[str, float]:
+    """Parse METRICS_RETENTION_HOURS, e.g. 'raw=24,5m=168,1h=2160'."""
+    retention = {'raw': 24, '5m': 24 * 7, '1h': 24 * 90}
+    for entry in filter(None, (part.strip() for part in value.split(','))):
+        try:
+            tier, hours = entry.split('=', 1)
+            if tier.strip() in retention:
+                retention[tier.strip()] = float(hours)
+                continue
+        except ValueError:
+            pass
+        logging.warning(f"Ignoring invalid METRICS_RETENTION_HOURS entry: {entry}")
+    return retention
+
+METRICS_RETENTION_HOURS = _parse_metrics_retention(os.environ.get('METRICS_RETENTION_HOURS', ''))
+
+# Columns iter_resources can return instead of (or alongside) the decoded object
+ITERABLE_COLUMNS = {'id', 'namespace', 'name', 'resource_version', 'last_updated', 'data'} | set(TYPED_COLUMN_NAMES)
+
+# Values the per-pod request aggregates may be grouped by, and the SQL computing them; 'owner'
+# has the "Kind/name" (or "Direct") form of cluster_snapshot.get_pod_owner
+GROUPABLE_COLUMNS = {
+    'namespace': 'namespace',
+    'phase': 'phase',
+    'node_name': 'node_name',
+    'owner_kind': 'owner_kind',
+    'owner': '''CASE WHEN owner_kind IS NULL AND owner_name IS NULL THEN 'Direct'
+                ELSE COALESCE(owner_kind, 'Unknown') || '/' || COALESCE(owner_name, 'Unknown') END''',
+}
+
+# Per-namespace pod totals are kept in the metrics table under this metric type, one row per
+# namespace. They are written in the same transaction as every change to the cached pods.
+NAMESPACE_METRICS_TYPE = 'namespace'
+NAMESPACE_METRICS_SQL = '''
+    json_object(
+        'namespace', namespace,
+        'pod_count', COUNT(*),
+        'cpu_request_millicores', COALESCE(SUM(cpu_request_millicores), 0),
+        'memory_request_bytes', COALESCE(SUM(memory_request_bytes), 0),
+        'gpu_request', COALESCE(SUM(gpu_request), 0),
+        'running_pods', SUM(CASE WHEN phase = 'Running' THEN 1 ELSE 0 END),
+        'pending_pods', SUM(CASE WHEN phase = 'Pending' THEN 1 ELSE 0 END),
+        'failed_pods', SUM(CASE WHEN phase = 'Failed' THEN 1 ELSE 0 END)
+    )
+'''
+
+# Sort keys accepted by query_resources, mapped to the SQL expression they order by.
+# Nullable columns are coalesced so keyset comparisons stay well-defined.
+SORT_EXPRESSIONS = {
+    'name': 'name',
+    'namespace': 'namespace',
+    'age': "COALESCE(creation_timestamp, '')",
+    'phase': "COALESCE(phase, '')",
+    'node': "COALESCE(node_name, '')",
+    'restarts': 'COALESCE(restart_count, 0)',
+    'cpu': 'COALESCE(cpu_request_millicores, 0)',
+    'memory': 'COALESCE(memory_request_bytes, 0)',
+    'gpu': 'COALESCE(gpu_request, 0)',
+}
+
+# Connection tuning, applied to every connection the Database opens
+DB_CACHE_SIZE_MB = int(os.environ.get('DB_CACHE_SIZE_MB', 64))
+DB_MMAP_SIZE_MB = int(os.environ.get('DB_MMAP_SIZE_MB', 256))
+DB_SYNCHRONOUS = os.environ.get('DB_SYNCHRONOUS', 'NORMAL').upper()
+DB_BUSY_TIMEOUT_SECONDS = float(os.environ.get('DB_BUSY_TIMEOUT_SECONDS', 30))
+DB_READ_POOL_SIZE = int(os.environ.get('DB_READ_POOL_SIZE', 8))
+RESOURCE_WRITE_BATCH_SIZE = max(1, int(os.environ.get('RESOURCE_WRITE_BATCH_SIZE', 1000)))
+# Rows fetched from the cursor at a time by iter_resources
+RESOURCE_ITER_BATCH_SIZE = max(1, int(os.environ.get('RESOURCE_ITER_BATCH_SIZE', 200)))
+# Objects sampled to train the compression dictionary (RESOURCE_COMPRESSION, see resource_codec.py)
+COMPRESSION_DICTIONARY_SAMPLES = int(os.environ.get('COMPRESSION_DICTIONARY_SAMPLES', 1000))
+COMPRESSION_DICTIONARY_MIN_SAMPLES = 50
+
+class ConnectionPool:
+    """
+    Keeps up to `size` idle connections for reuse across threads. Connections are created on
+    demand by `factory`, so a burst of concurrent callers is never blocked on the pool.
+    """
+
+    def __init__(self, factory, size: int):
+        self._factory = factory
+        self._idle = queue.LifoQueue(maxsize=max(1, size))
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._factory()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+DECODED_CACHE_MB = int(os.environ.get('DECODED_CACHE_MB', 256))
+# Memory taken by decoded objects per byte of their JSON: dicts, lists and small str/int objects
+# weigh about 5x (orjson, which shares key strings) to 6.5x (json) the text they were parsed from
+DECODED_SIZE_FACTOR = 6
+
+class DecodedResourceCache:
+    """
+    LRU cache of decoded resource lists, and of values derived from them, keyed by the query and
+    the resource type's sync generation. Every change to a type advances its generation, so a
+    stale entry can never be served; writers also invalidate the type to free memory early.
+    Sizes are estimates of the memory held by the entries, in bytes (see DECODED_SIZE_FACTOR).
+    Cached objects are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Tuple, value, size: int):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def invalidate(self, resource_types=None):
+        """Drop the entries of the given resource types (all entries by default). Keys start with the type."""
+        with self._lock:
+            for key in list(self._entries):
+                if resource_types is None or key[0] in resource_types:
+                    self._size -= self._entries.pop(key)[1]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'approx_bytes': self._size, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses}
 
 class Database:
     def __init__(self, db_path: str = None):
         # Get database path from environment variable or use default
         self.db_path = db_path or os.environ.get('DB_PATH', 'kubernetes_cache.db')
+        # All writes go through one shared connection (SQLite has a single writer anyway);
+        # reads use pooled read-only connections that WAL lets run alongside the writer.
+        self._write_lock = threading.RLock()
+        self._write_conn = None
+        self._read_pool = ConnectionPool(self._open_read_connection, DB_READ_POOL_SIZE)
+        self.decoded_cache = DecodedResourceCache(DECODED_CACHE_MB * 1024 * 1024)
+        # Timings of the last bulk write per resource type, reported by /api/cache/status
+        self.write_timings: Dict[str, Dict] = {}
+        # Encoding of the data column (RESOURCE_COMPRESSION); rows written with another setting stay readable
+        self.codec = ResourceCodec()
         self._initialize_database()
 
+    def _open_connection(self) -> sqlite3.Connection:
+        """Open a read-write connection with the tuned PRAGMAs applied."""
+        conn = sqlite3.connect(self.db_path, timeout=DB_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        self._apply_pragmas(conn)
+        return conn
+
+    def _open_read_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f'{Path(self.db_path).resolve().as_uri()}?mode=ro', uri=True,
+                               timeout=DB_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+        self._apply_pragmas(conn)
+        conn.execute('PRAGMA query_only = ON')
+        return conn
+
+    @staticmethod
+    def _apply_pragmas(conn: sqlite3.Connection):
+        conn.execute(f'PRAGMA synchronous = {DB_SYNCHRONOUS}')
+        conn.execute(f'PRAGMA cache_size = -{DB_CACHE_SIZE_MB * 1024}')
+        conn.execute(f'PRAGMA mmap_size = {DB_MMAP_SIZE_MB * 1024 * 1024}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        # INSERT OR REPLACE must fire the delete trigger that keeps the search index in sync
+        conn.execute('PRAGMA recursive_triggers = ON')
+
+    @contextmanager
+    def _writer(self):
+        """The shared write connection, held exclusively for the block; commits on success, rolls back on error."""
+        with self._write_lock:
+            if self._write_conn is None:
+                self._write_conn = self._open_connection()
+            with self._write_conn:
+                yield self._write_conn
+
+    def _reader(self):
+        """A pooled read-only connection for the duration of a with-block."""
+        return self._read_pool.connection()
+
     def _initialize_database(self):
         """Initialize the database with required tables."""
         try:
@@ -18,21 +318,16 @@ class Database:
             if db_dir:
                 os.makedirs(db_dir, exist_ok=True)
             
-            with sqlite3.connect(self.db_path) as conn:
+            with self._writer() as conn:
                 cursor = conn.cursor()
+
+                # WAL lets readers keep reading while the updater writes or swaps tables
+                journal_mode = cursor.execute('PRAGMA journal_mode = WAL').fetchone()[0]
+                if journal_mode.lower() != 'wal':
+                    logging.warning(f"Could not enable WAL journaling, database is in {journal_mode} mode")
                 
                 # Create resources table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS resources (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        resource_type TEXT NOT NULL,
-                        namespace TEXT NOT NULL,
-                        name TEXT NOT NULL,
-                        data TEXT NOT NULL,
-                        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(resource_type, namespace, name)
-                    )
-                ''')
+                cursor.execute(f'CREATE TABLE IF NOT EXISTS resources ({RESOURCES_TABLE_COLUMNS})')
                 
                 # Create metrics table
                 cursor.execute('''
@@ -46,6 +341,18 @@ class Database:
                     )
                 ''')
                 
+                # Create per-resource-type sync state table (generation and freshness of each cached type)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS resource_sync_state (
+                        resource_type TEXT PRIMARY KEY,
+                        generation INTEGER NOT NULL DEFAULT 0,
+                        item_count INTEGER NOT NULL DEFAULT 0,
+                        last_success TIMESTAMP,
+                        last_attempt TIMESTAMP,
+                        last_error TEXT
+                    )
+                ''')
+                
                 # Create environment_metrics table
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS environment_metrics (
@@ -64,6 +371,28 @@ class Database:
                     )
                 ''')
                 
+                # Create environment metrics history table (see METRICS_TIERS)
+                cursor.execute(f'''
+                    CREATE TABLE IF NOT EXISTS metrics_history (
+                        tier TEXT NOT NULL,
+                        namespace TEXT NOT NULL, -- '' for the whole cluster
+                        bucket_start INTEGER NOT NULL, -- Unix time; the sample time for raw rows
+                        samples INTEGER NOT NULL DEFAULT 1,
+                        {', '.join(f'{column} REAL' for column in METRICS_HISTORY_COLUMNS)},
+                        PRIMARY KEY (tier, namespace, bucket_start)
+                    ) WITHOUT ROWID
+                ''')
+                
+                # Create compression dictionaries table (kept forever: stored rows reference them by id)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS compression_dictionaries (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        codec TEXT NOT NULL,
+                        dictionary BLOB NOT NULL,
+                        created TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                
                 # Migration: Add total_node_allocatable_pods column if it doesn't exist
                 try:
                     cursor.execute("SELECT total_node_allocatable_pods FROM environment_metrics LIMIT 1")
@@ -71,6 +400,39 @@ class Database:
                     # Column doesn't exist, add it
                     logging.info("Adding total_node_allocatable_pods column to environment_metrics table")
                     cursor.execute("ALTER TABLE environment_metrics ADD COLUMN total_node_allocatable_pods INTEGER DEFAULT 0")
+
+                # Migration: Add resource_version column used by diff-based updates
+                try:
+                    cursor.execute("SELECT resource_version FROM resources LIMIT 1")
+                except sqlite3.OperationalError:
+                    logging.info("Adding resource_version column to resources table")
+                    cursor.execute("ALTER TABLE resources ADD COLUMN resource_version TEXT")
+
+                # Migration: Add typed columns extracted from the objects, and fill them in for
+                # rows already cached (diff updates do not rewrite unchanged rows)
+                existing_columns = {row[1] for row in cursor.execute('PRAGMA table_info(resources)').fetchall()}
+                missing_columns = [(c, t) for c, t in TYPED_COLUMNS if c not in existing_columns]
+                for column, column_type in missing_columns:
+                    logging.info(f"Adding {column} column to resources table")
+                    cursor.execute(f"ALTER TABLE resources ADD COLUMN {column} {column_type}")
+                if missing_columns:
+                    self._backfill_typed_columns(cursor)
+
+                self._create_resource_indexes(cursor)
+                self._create_search_index(cursor)
+                self._create_label_index(cursor)
+
+                # Migration: namespace metrics used to be stored once per metric type (gpu/cpu/memory);
+                # compute the per-namespace rows for pods cached before they existed
+                cursor.execute('DELETE FROM metrics WHERE metric_type != ?', (NAMESPACE_METRICS_TYPE,))
+                if not cursor.execute('SELECT 1 FROM metrics LIMIT 1').fetchone():
+                    self._refresh_namespace_metrics(cursor)
+
+                # Register every dictionary so old rows decode; the newest one of the
+                # configured codec is used for new writes
+                for dictionary_id, codec, dictionary in cursor.execute(
+                        'SELECT id, codec, dictionary FROM compression_dictionaries ORDER BY id'):
+                    self.codec.register_dictionary(dictionary_id, codec, dictionary)
                 
                 conn.commit()
                 logging.info(f"Database initialized successfully at {self.db_path}")
@@ -78,120 +440,802 @@ class Database:
             logging.error(f"Error initializing database: {str(e)}")
             raise
 
-    def update_resources_atomically(self, all_resources: Dict[str, List[Dict]]) -> bool:
+    @staticmethod
+    def _create_resource_indexes(cursor):
+        for statement in RESOURCE_INDEXES:
+            cursor.execute(statement)
+
+    def _create_search_index(self, cursor, rebuild: bool = False):
+        """
+        (Private helper) Create the search index and its triggers on the resources table if missing.
+        The index is filled from the table when it is created, or when rebuild is set (after a swap,
+        whose staging table is loaded without triggers).
+        """
+        search_table_sql = "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'resources_search'"
+        if not cursor.execute(search_table_sql).fetchone():
+            definition = f"{_search_columns.replace('resource_type', 'resource_type UNINDEXED')}, content='resources', content_rowid='id'"
+            try:
+                cursor.execute(f"CREATE VIRTUAL TABLE resources_search USING fts5({definition}, tokenize='trigram')")
+            except sqlite3.OperationalError:
+                # SQLite before 3.34 has no trigram tokenizer; fall back to word prefix matching
+                logging.warning("SQLite has no trigram tokenizer, resource search will match word prefixes only")
+                cursor.execute(f"CREATE VIRTUAL TABLE resources_search USING fts5({definition})")
+            rebuild = True
+        self.search_trigram = 'trigram' in cursor.execute(search_table_sql).fetchone()[0]
+        for statement in RESOURCE_SEARCH_TRIGGERS:
+            cursor.execute(statement)
+        if rebuild:
+            cursor.execute("INSERT INTO resources_search (resources_search) VALUES ('rebuild')")
+
+    @staticmethod
+    def _create_label_index(cursor, rebuild: bool = False):
+        """
+        (Private helper) Create the inverted label index and its triggers if missing, filling it from
+        the labels column when it is created or when rebuild is set (after a swap).
+        """
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'resource_labels'"
+        ).fetchone()
+        if not exists:
+            cursor.execute('''
+                CREATE TABLE resource_labels (
+                    resource_type TEXT NOT NULL,
+                    label_key TEXT NOT NULL,
+                    label_value TEXT NOT NULL,
+                    resource_id INTEGER NOT NULL,
+                    PRIMARY KEY (resource_type, label_key, label_value, resource_id)
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute('CREATE INDEX idx_resource_labels_resource ON resource_labels(resource_id)')
+            rebuild = True
+        for statement in RESOURCE_LABEL_TRIGGERS:
+            cursor.execute(statement)
+        if rebuild:
+            cursor.execute('DELETE FROM resource_labels')
+            cursor.execute('''
+                INSERT OR IGNORE INTO resource_labels (resource_type, label_key, label_value, resource_id)
+                SELECT r.resource_type, l.key, l.value, r.id
+                FROM resources r, json_each(r.labels) l
+                WHERE r.labels IS NOT NULL
+            ''')
+
+    def _backfill_typed_columns(self, cursor):
+        """(Private helper) Compute the typed columns of every cached row from its data."""
+        assignments = ', '.join(f'{column} = ?' for column in TYPED_COLUMN_NAMES)
+        rows = cursor.execute('SELECT id, resource_type, data FROM resources').fetchall()
+        cursor.executemany(
+            f'UPDATE resources SET {assignments} WHERE id = ?',
+            (extract_typed_columns(resource_type, self.codec.decode(data)) + (row_id,) for row_id, resource_type, data in rows)
+        )
+        logging.info(f"Backfilled typed columns for {len(rows)} cached resources")
+
+    def update_resources_atomically(self, all_resources: Dict[str, List[Dict]],
+                                    namespace_metrics: Optional[Dict[str, Dict]] = None) -> bool:
         """
         Atomically updates all resources using a staging table and rename strategy.
         This prevents the database from being in an inconsistent state during updates.
+        Resource types missing from all_resources (e.g. because their fetch failed) keep
+        their last-known-good rows and generation.
+        When pods are swapped, namespace_metrics (per-namespace totals aggregated while the pods
+        were fetched) are stored with them; without it they are computed from the new table.
+        Everything, the DDL included, runs in one explicit transaction, so a failure at any
+        step rolls back to the previous live table.
         """
         staging_table = 'resources_staging'
         live_table = 'resources'
         old_table = 'resources_old'
 
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._writer() as conn:
                 cursor = conn.cursor()
+                # The sqlite3 module only opens transactions implicitly before DML; DDL issued
+                # outside one would autocommit and survive a rollback
+                cursor.execute('BEGIN IMMEDIATE')
 
                 # 1. Drop any old staging table that might exist from a failed run
                 cursor.execute(f'DROP TABLE IF EXISTS {staging_table}')
                 cursor.execute(f'DROP TABLE IF EXISTS {old_table}')
 
                 # 2. Create a new staging table
-                cursor.execute(f'''
-                    CREATE TABLE {staging_table} (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        resource_type TEXT NOT NULL,
-                        namespace TEXT NOT NULL,
-                        name TEXT NOT NULL,
-                        data TEXT NOT NULL,
-                        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        UNIQUE(resource_type, namespace, name)
-                    )
-                ''')
+                cursor.execute(f'CREATE TABLE {staging_table} ({RESOURCES_TABLE_COLUMNS})')
                 
-                # 3. Populate the staging table
+                # 3. Populate the staging table, carrying over types that were not refreshed
+                columns = ', '.join(row[1] for row in cursor.execute(f'PRAGMA table_info({staging_table})').fetchall())
+                placeholders = ', '.join('?' for _ in all_resources)
+                refreshed_filter = f'WHERE resource_type NOT IN ({placeholders})' if all_resources else ''
+                cursor.execute(f'''
+                    INSERT INTO {staging_table} ({columns})
+                    SELECT {columns} FROM {live_table}
+                    {refreshed_filter}
+                ''', tuple(all_resources.keys()))
                 for resource_type, resources_list in all_resources.items():
                     self._update_resource_in_table(cursor, staging_table, resource_type, resources_list)
+                    self._mark_synced(cursor, resource_type, changed=True, table_name=staging_table)
                 
                 # 4. Atomically swap the tables
                 cursor.execute(f'ALTER TABLE {live_table} RENAME TO {old_table}')
                 cursor.execute(f'ALTER TABLE {staging_table} RENAME TO {live_table}')
                 
-                # 5. Drop the old table
+                # 5. Drop the old table (and its indexes), then index the new live table. Building the
+                # indexes once after the bulk load is cheaper than maintaining them on every insert.
                 cursor.execute(f'DROP TABLE {old_table}')
+                index_started = time.perf_counter()
+                self._create_resource_indexes(cursor)
+                self._create_search_index(cursor, rebuild=True)
+                self._create_label_index(cursor, rebuild=True)
+                logging.info(f"Indexed swapped resources table in {(time.perf_counter() - index_started) * 1000:.0f}ms")
+                if 'pods' in all_resources:
+                    self._write_namespace_metrics(cursor, namespace_metrics)
                 
                 conn.commit()
+                self.decoded_cache.invalidate(set(all_resources))
                 logging.info(f"Successfully and atomically updated all resources.")
                 return True
 
         except Exception as e:
             logging.error(f"Error during atomic resource update: {str(e)}", exc_info=True)
-            # Attempt to rollback by restoring the old table if it exists
+            # The transaction rollback has restored the live table. Should a crash ever leave the
+            # tables half-renamed, restore the old one, but only when the live table is missing.
             try:
-                with sqlite3.connect(self.db_path) as conn:
+                with self._writer() as conn:
                     cursor = conn.cursor()
-                    cursor.execute(f'DROP TABLE IF EXISTS {live_table}') # Drop potentially incomplete new table
-                    cursor.execute(f'ALTER TABLE {old_table} RENAME TO {live_table}') # Restore backup
+                    tables = {row[0] for row in cursor.execute(
+                        "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN (?, ?, ?)",
+                        (live_table, staging_table, old_table))}
+                    if live_table not in tables and old_table in tables:
+                        cursor.execute(f'ALTER TABLE {old_table} RENAME TO {live_table}')
+                        logging.info("Restored the previous resources table.")
+                    if staging_table in tables:
+                        cursor.execute(f'DROP TABLE {staging_table}')
                     conn.commit()
-                    logging.info("Rolled back to the previous resources table.")
             except Exception as rollback_e:
-                logging.error(f"Failed to rollback resources table after an error: {rollback_e}")
+                logging.error(f"Failed to clean up resources tables after an error: {rollback_e}")
             return False
 
-    def _update_resource_in_table(self, cursor, table_name: str, resource_type: str, resources: List[Dict]):
+    def _update_resource_in_table(self, cursor, table_name: str, resource_type: str, resources: List[Dict]) -> int:
         """
-        (Private helper) Update or insert resource data into a specific table.
-        This is designed to be called by the atomic update process.
+        (Private helper) Bulk insert or replace resource rows into a specific table.
+        Objects are serialized and written with executemany in batches of RESOURCE_WRITE_BATCH_SIZE;
+        serialize and insert times are logged per batch and kept in write_timings.
+        Returns the number of rows written.
         """
         updated_count = 0
-        for resource in resources:
-            metadata = resource.get('metadata', {})
-            namespace = metadata.get('namespace', 'default')
-            name = metadata.get('name')
-            
-            if not name:
-                logging.warning(f"Skipping resource update due to missing name: {resource_type}/{namespace}")
-                continue
+        serialize_seconds = insert_seconds = 0.0
+        for batch_start in range(0, len(resources), RESOURCE_WRITE_BATCH_SIZE):
+            batch = resources[batch_start:batch_start + RESOURCE_WRITE_BATCH_SIZE]
 
-            cursor.execute(f'''
+            started = time.perf_counter()
+            rows = [row for row in (self._resource_row(resource_type, resource) for resource in batch) if row]
+            serialized = time.perf_counter()
+            cursor.executemany(f'''
                 INSERT OR REPLACE INTO {table_name}
-                (resource_type, namespace, name, data, last_updated)
-                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ''', (
-                resource_type,
-                namespace,
-                name,
-                json.dumps(resource)
-            ))
-            updated_count += 1
-        logging.info(f"Updated/Inserted {updated_count} {resource_type} resources into {table_name}.")
-
-    def get_resources(self, resource_type: str, namespace: Optional[str] = None) -> List[Dict]:
-        """Retrieve resources from the database."""
+                (resource_type, namespace, name, data, resource_version, last_updated, {TYPED_COLUMN_LIST})
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, {TYPED_COLUMN_PLACEHOLDERS})
+            ''', rows)
+            inserted = time.perf_counter()
+
+            updated_count += len(rows)
+            serialize_seconds += serialized - started
+            insert_seconds += inserted - serialized
+            logging.debug(f"Wrote batch of {len(rows)} {resource_type} into {table_name}: "
+                          f"serialize {(serialized - started) * 1000:.1f}ms, insert {(inserted - serialized) * 1000:.1f}ms")
+
+        self.write_timings[resource_type] = {
+            'rows': updated_count,
+            'batches': -(-len(resources) // RESOURCE_WRITE_BATCH_SIZE),
+            'serialize_ms': round(serialize_seconds * 1000, 1),
+            'insert_ms': round(insert_seconds * 1000, 1),
+        }
+        logging.info(f"Updated/Inserted {updated_count} {resource_type} resources into {table_name} "
+                     f"(serialize {serialize_seconds * 1000:.0f}ms, insert {insert_seconds * 1000:.0f}ms).")
+        return updated_count
+
+    def _resource_row(self, resource_type: str, resource: Dict) -> Optional[Tuple]:
+        """
+        (Private helper) The column values stored for a resource, in the order
+        (resource_type, namespace, name, data, resource_version, typed columns...).
+        Returns None (and logs) when the resource has no name.
+        """
+        metadata = resource.get('metadata', {})
+        namespace = metadata.get('namespace', 'default')
+        name = metadata.get('name')
+
+        if not name:
+            logging.warning(f"Skipping resource update due to missing name: {resource_type}/{namespace}")
+            return None
+
+        return (
+            resource_type,
+            namespace,
+            name,
+            self.codec.encode(resource),
+            self._resource_version_key(resource)
+        ) + extract_typed_columns(resource_type, resource)
+
+    def _upsert_resource_row(self, cursor, table_name: str, resource_type: str, resource: Dict) -> bool:
+        """(Private helper) Insert or replace a single resource row. Returns False if the resource was skipped."""
+        row = self._resource_row(resource_type, resource)
+        if not row:
+            return False
+
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO {table_name}
+            (resource_type, namespace, name, data, resource_version, last_updated, {TYPED_COLUMN_LIST})
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, {TYPED_COLUMN_PLACEHOLDERS})
+        ''', row)
+        return True
+
+    @staticmethod
+    def _resource_version_key(resource: Dict) -> str:
+        """The value compared by diff updates: metadata.resourceVersion, or a content hash when it is missing."""
+        resource_version = resource.get('metadata', {}).get('resourceVersion')
+        if resource_version:
+            return str(resource_version)
+        return 'sha1:' + hashlib.sha1(serializer.dumps_bytes(resource, sort_keys=True)).hexdigest()
+
+    def update_resources_diff(self, all_resources: Dict[str, List[Dict]]) -> Optional[Dict[str, Dict[str, int]]]:
+        """
+        Applies a full snapshot of resources as a diff against the live table.
+        Only rows whose resourceVersion (or content hash) changed are written, rows that
+        disappeared are deleted, and everything happens in one transaction so readers
+        never observe a partial update.
+        Returns per-type counts of inserted/updated/deleted/unchanged rows, or None on failure.
+        """
+        session = None
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            session = self.begin_resource_sync()
+            for resource_type, resources_list in all_resources.items():
+                session.add_page(resource_type, resources_list)
+                session.finish_type(resource_type)
+            return session.commit()
+        except Exception as e:
+            logging.error(f"Error during diff resource update: {str(e)}", exc_info=True)
+            return None
+        finally:
+            if session:
+                session.close()
+
+    def begin_resource_sync(self) -> 'ResourceSyncSession':
+        """Start a paged diff sync. See ResourceSyncSession."""
+        return ResourceSyncSession(self)
+
+    def apply_resource_events(self, events: List[Tuple[str, str, object]]) -> bool:
+        """
+        Applies a batch of watch events to the live resources table in a single transaction.
+        Each event is a (event_type, resource_type, payload) tuple where event_type is
+        ADDED/MODIFIED/DELETED with the resource object as payload, or SYNC with the
+        complete list of objects for that resource type (the result of a list/re-list).
+        The namespace metrics of the namespaces whose pods changed are recomputed in the same
+        transaction, from the typed columns of just those namespaces' pods.
+        """
+        try:
+            with self._writer() as conn:
                 cursor = conn.cursor()
-                
-                if namespace:
-                    cursor.execute('''
-                        SELECT data FROM resources 
-                        WHERE resource_type = ? AND namespace = ?
-                    ''', (resource_type, namespace))
+                applied = 0
+                touched_types = set()
+                # Namespaces whose pods changed; None once a pods SYNC touched all of them
+                pod_namespaces = set()
+
+                for event_type, resource_type, payload in events:
+                    if event_type == 'SYNC':
+                        cursor.execute('DELETE FROM resources WHERE resource_type = ?', (resource_type,))
+                        self._update_resource_in_table(cursor, 'resources', resource_type, payload)
+                        if resource_type == 'pods':
+                            pod_namespaces = None
+                    elif event_type in ('ADDED', 'MODIFIED', 'DELETED'):
+                        metadata = payload.get('metadata', {})
+                        namespace = metadata.get('namespace', 'default')
+                        if event_type == 'DELETED':
+                            cursor.execute('''
+                                DELETE FROM resources
+                                WHERE resource_type = ? AND namespace = ? AND name = ?
+                            ''', (resource_type, namespace, metadata.get('name')))
+                        else:
+                            self._upsert_resource_row(cursor, 'resources', resource_type, payload)
+                        if resource_type == 'pods' and pod_namespaces is not None:
+                            pod_namespaces.add(namespace)
+                    else:
+                        logging.warning(f"Ignoring unsupported watch event type {event_type} for {resource_type}")
+                        continue
+                    applied += 1
+                    touched_types.add(resource_type)
+
+                for resource_type in touched_types:
+                    self._mark_synced(cursor, resource_type, changed=True)
+                if pod_namespaces is None or pod_namespaces:
+                    self._refresh_namespace_metrics(cursor, pod_namespaces)
+
+                conn.commit()
+                self.decoded_cache.invalidate(touched_types)
+                logging.debug(f"Applied {applied} watch events to the resources table.")
+                return True
+        except Exception as e:
+            logging.error(f"Error applying resource watch events: {str(e)}", exc_info=True)
+            return False
+
+    def _mark_synced(self, cursor, resource_type: str, changed: bool, table_name: str = 'resources'):
+        """(Private helper) Record a successful sync of a resource type, advancing its generation if its data changed."""
+        cursor.execute(f'''
+            INSERT INTO resource_sync_state
+            (resource_type, generation, item_count, last_success, last_attempt, last_error)
+            VALUES (?, 1, (SELECT COUNT(*) FROM {table_name} WHERE resource_type = ?), CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, NULL)
+            ON CONFLICT(resource_type) DO UPDATE SET
+                generation = generation + ?,
+                item_count = excluded.item_count,
+                last_success = excluded.last_success,
+                last_attempt = excluded.last_attempt,
+                last_error = NULL
+        ''', (resource_type, resource_type, 1 if changed else 0))
+
+    def _write_namespace_metrics(self, cursor, namespace_metrics: Optional[Dict[str, Dict]] = None):
+        """
+        (Private helper) Replace every namespace metrics row, with namespace_metrics (aggregated
+        while the pods were ingested) or, without it, with totals computed from the pods table.
+        """
+        if namespace_metrics is None:
+            self._refresh_namespace_metrics(cursor)
+            return
+        cursor.execute('DELETE FROM metrics WHERE metric_type = ?', (NAMESPACE_METRICS_TYPE,))
+        cursor.executemany('''
+            INSERT INTO metrics (metric_type, namespace, data, last_updated)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ''', ((NAMESPACE_METRICS_TYPE, namespace, json.dumps(data)) for namespace, data in namespace_metrics.items()))
+
+    @staticmethod
+    def _refresh_namespace_metrics(cursor, namespaces: Optional[set] = None):
+        """
+        (Private helper) Recompute the namespace metrics rows of the given namespaces (all by
+        default) from the typed pod columns; namespaces left without pods lose their row.
+        """
+        where, params = '', ()
+        if namespaces is not None:
+            where = f" AND namespace IN ({', '.join('?' for _ in namespaces)})"
+            params = tuple(namespaces)
+        cursor.execute(f'DELETE FROM metrics WHERE metric_type = ?{where}', (NAMESPACE_METRICS_TYPE,) + params)
+        cursor.execute(f'''
+            INSERT INTO metrics (metric_type, namespace, data, last_updated)
+            SELECT ?, namespace, {NAMESPACE_METRICS_SQL}, CURRENT_TIMESTAMP
+            FROM resources
+            WHERE resource_type = 'pods'{where}
+            GROUP BY namespace
+        ''', (NAMESPACE_METRICS_TYPE,) + params)
+
+    def record_sync_failure(self, resource_type: str, error: str) -> bool:
+        """Record a failed fetch of a resource type. Its cached rows and generation are left untouched."""
+        try:
+            with self._writer() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO resource_sync_state (resource_type, last_attempt, last_error)
+                    VALUES (?, CURRENT_TIMESTAMP, ?)
+                    ON CONFLICT(resource_type) DO UPDATE SET
+                        last_attempt = excluded.last_attempt,
+                        last_error = excluded.last_error
+                ''', (resource_type, error))
+                conn.commit()
+                return True
+        except Exception as e:
+            logging.error(f"Error recording sync failure for {resource_type}: {str(e)}")
+            return False
+
+    def get_sync_state(self, resource_type: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Retrieve the generation and freshness of each cached resource type.
+        staleness_seconds is the time since the last successful sync (None if never synced).
+        """
+        try:
+            with self._reader() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                query = '''
+                    SELECT resource_type, generation, item_count, last_success, last_attempt, last_error,
+                           CAST((julianday('now') - julianday(last_success)) * 86400 AS INTEGER) AS staleness_seconds
+                    FROM resource_sync_state
+                '''
+                if resource_type:
+                    cursor.execute(query + ' WHERE resource_type = ?', (resource_type,))
                 else:
-                    cursor.execute('''
-                        SELECT data FROM resources 
-                        WHERE resource_type = ?
-                    ''', (resource_type,))
-                
-                results = cursor.fetchall()
-                return [json.loads(row[0]) for row in results]
+                    cursor.execute(query)
+                return {row['resource_type']: dict(row) for row in cursor.fetchall()}
+        except Exception as e:
+            logging.error(f"Error retrieving sync state: {str(e)}")
+            return {}
+
+    def get_resources(self, resource_type: str, namespace: Optional[str] = None, phase: Optional[str] = None,
+                      node_name: Optional[str] = None, min_gpu_request: Optional[int] = None) -> List[Dict]:
+        """
+        Retrieve resources from the database, optionally filtered on the indexed typed columns.
+        Decoded lists are cached per sync generation, so repeated reads between syncs skip
+        json.loads entirely. The returned objects are shared and must not be modified.
+        """
+        try:
+            with self._reader() as conn:
+                cursor = conn.cursor()
+                # Generation and rows are read in one transaction so they always match
+                cursor.execute('BEGIN')
+                return self._decoded_resources(cursor, resource_type, self._generation(cursor, resource_type),
+                                               namespace, phase, node_name, min_gpu_request)
         except Exception as e:
             logging.error(f"Error retrieving resources: {str(e)}")
             return []
 
+    def _decoded_resources(self, cursor, resource_type: str, generation: int, namespace: Optional[str] = None,
+                           phase: Optional[str] = None, node_name: Optional[str] = None,
+                           min_gpu_request: Optional[int] = None) -> List[Dict]:
+        """
+        (Private helper) The decoded resources for get_resources, from the cache or read with cursor,
+        which must be in the read transaction that generation was read in.
+        """
+        cache_key = (resource_type, namespace, phase, node_name, min_gpu_request, generation)
+        cached = self.decoded_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        where, params = self._typed_filters(resource_type, namespace, phase, node_name, min_gpu_request)
+        cursor.execute(f'''
+            SELECT data FROM resources 
+            WHERE resource_type = ?{where}
+        ''', (resource_type,) + params)
+        
+        results = cursor.fetchall()
+        resources = [self.codec.decode(row[0]) for row in results]
+        json_size = sum(self.codec.estimated_json_size(row[0]) for row in results)
+        self.decoded_cache.put(cache_key, resources, json_size * DECODED_SIZE_FACTOR)
+        return resources
+
+    def iter_resources(self, resource_type: str, namespace: Optional[str] = None,
+                       columns: Optional[List[str]] = None, batch_size: int = RESOURCE_ITER_BATCH_SIZE,
+                       **filters) -> Iterator:
+        """
+        Stream resources for single-pass consumers (aggregations, exports) without building a list.
+        Rows are fetched batch_size at a time and decoded one by one as they are yielded, so memory
+        stays flat however many objects are cached. Yields decoded objects, or with columns (names
+        from ITERABLE_COLUMNS) a dict of those columns, with 'data' decoded if requested. Typed
+        columns alone need no decoding at all. filters are those of query_resources.
+        When the decoded list is already cached it is streamed from memory instead.
+        Errors are logged and re-raised, so a partial read is never taken for a complete one.
+        Until it is exhausted or closed, the generator holds a pooled connection and a read
+        transaction, whose WAL snapshot keeps checkpoints from completing. Callers that may stop
+        early (break, return or raise mid-loop) should wrap it in contextlib.closing().
+        """
+        if columns:
+            unknown = set(columns) - ITERABLE_COLUMNS
+            if unknown:
+                raise ValueError(f"Unknown resource columns: {sorted(unknown)}")
+        where, params = self._typed_filters(resource_type, namespace=namespace, **filters)
+
+        cached = None
+        try:
+            with self._reader() as conn:
+                cursor = conn.cursor()
+                # One read transaction, so a sync committing mid-stream cannot mix two snapshots
+                cursor.execute('BEGIN')
+                if not columns and not filters:
+                    cached = self.decoded_cache.get(
+                        (resource_type, namespace, None, None, None, self._generation(cursor, resource_type))
+                    )
+                if cached is None:
+                    try:
+                        cursor.execute(f'''
+                            SELECT {', '.join(columns) if columns else 'data'} FROM resources
+                            WHERE resource_type = ?{where}
+                        ''', (resource_type,) + params)
+                        data_index = columns.index('data') if columns and 'data' in columns else None
+                        while True:
+                            rows = cursor.fetchmany(batch_size)
+                            if not rows:
+                                break
+                            for row in rows:
+                                if not columns:
+                                    yield self.codec.decode(row[0])
+                                    continue
+                                values = dict(zip(columns, row))
+                                if data_index is not None:
+                                    values['data'] = self.codec.decode(row[data_index])
+                                yield values
+                    finally:
+                        # Also runs when the generator is closed early: end the read transaction
+                        # before the connection goes back to the pool
+                        cursor.close()
+                        conn.rollback()
+        except Exception as e:
+            logging.error(f"Error iterating {resource_type} resources: {str(e)}")
+            raise
+        # A cached list is streamed after the connection has been released
+        if cached is not None:
+            yield from cached
+
+    def get_derived(self, resource_type: str, name: str, build, namespace: Optional[str] = None):
+        """
+        A value derived from get_resources(resource_type, namespace) by build(resources), such as
+        a lookup index, cached alongside the decoded list for the same generation.
+        """
+        try:
+            with self._reader() as conn:
+                cursor = conn.cursor()
+                # The list is read in the transaction the generation was, so the value is cached
+                # under the generation it was built from
+                cursor.execute('BEGIN')
+                generation = self._generation(cursor, resource_type)
+                cache_key = (resource_type, 'derived', name, namespace, generation)
+                cached = self.decoded_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+                resources = self._decoded_resources(cursor, resource_type, generation, namespace)
+        except Exception as e:
+            logging.error(f"Error retrieving resources for derived {name}: {str(e)}")
+            return build([])
+        value = build(resources)
+        # Derived values are usually indexes over the same objects, so they are costed lightly
+        self.decoded_cache.put(cache_key, value, 64 * len(resources))
+        return value
+
+    @staticmethod
+    def _generation(cursor, resource_type: str) -> int:
+        row = cursor.execute('SELECT generation FROM resource_sync_state WHERE resource_type = ?',
+                             (resource_type,)).fetchone()
+        return row[0] if row else 0
+
+    def get_generation(self, resource_type: str) -> int:
+        """Current sync generation of a resource type (0 if it was never synced)."""
+        try:
+            with self._reader() as conn:
+                return self._generation(conn.cursor(), resource_type)
+        except Exception as e:
+            logging.error(f"Error retrieving generation of {resource_type}: {str(e)}")
+            return 0
+
+    def get_generations(self, resource_types: List[str]) -> Dict[str, int]:
+        """Current sync generations of several resource types in one read (0 for types never synced)."""
+        generations = {resource_type: 0 for resource_type in resource_types}
+        try:
+            with self._reader() as conn:
+                placeholders = ', '.join('?' * len(generations))
+                for resource_type, generation in conn.execute(
+                        f'SELECT resource_type, generation FROM resource_sync_state WHERE resource_type IN ({placeholders})',
+                        tuple(generations)):
+                    generations[resource_type] = generation
+        except Exception as e:
+            logging.error(f"Error retrieving generations of {resource_types}: {str(e)}")
+        return generations
+
+    @staticmethod
+    def _typed_filters(resource_type: str, namespace: Optional[str] = None, phase: Optional[str] = None,
+                       node_name: Optional[str] = None, min_gpu_request: Optional[int] = None,
+                       name_prefix: Optional[str] = None, label: Optional[str] = None) -> Tuple[str, Tuple]:
+        """
+        (Private helper) AND-ed WHERE clauses (with a leading AND) for the optional filters.
+        label is a Kubernetes label selector (see label_selector.py), answered from the
+        resource_labels index.
+        """
+        clauses, params = [], []
+        for column, value in (('namespace', namespace), ('phase', phase), ('node_name', node_name)):
+            if value:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        if min_gpu_request is not None:
+            # The partial GPU index is only chosen when its own 'gpu_request > 0' term is present
+            clauses.append('gpu_request > 0 AND gpu_request >= ?' if min_gpu_request > 0 else 'gpu_request >= ?')
+            params.append(min_gpu_request)
+        if name_prefix:
+            # A range instead of LIKE so the (resource_type, namespace, name) index stays usable
+            clauses.append('name >= ? AND name < ?')
+            params.extend([name_prefix, name_prefix[:-1] + chr(ord(name_prefix[-1]) + 1)])
+        if label:
+            selector_clause, selector_params = Database._label_selector_clause(resource_type, parse_label_selector(label))
+            if selector_clause:
+                clauses.append(selector_clause)
+                params.extend(selector_params)
+        return ''.join(f' AND {clause}' for clause in clauses), tuple(params)
+
+    @staticmethod
+    def _label_selector_clause(resource_type: str, requirements) -> Tuple[str, List]:
+        """
+        (Private helper) Translate selector requirements into set operations on resource_labels:
+        the ids matching every positive requirement (=, in, exists) are INTERSECTed, and the ids
+        matching any negated one (!=, notin, !key) are excluded, so rows are found from the index
+        instead of by scanning labels. As in Kubernetes, != and notin also match objects without the key.
+        """
+        included, excluded, params, excluded_params = [], [], [], []
+        for key, operator, values in requirements:
+            subquery = 'SELECT resource_id FROM resource_labels WHERE resource_type = ? AND label_key = ?'
+            subquery_params = [resource_type, key]
+            if values:
+                subquery += f" AND label_value IN ({', '.join('?' for _ in values)})"
+                subquery_params.extend(values)
+            if operator in ('=', 'in', 'exists'):
+                included.append(subquery)
+                params.extend(subquery_params)
+            else:
+                excluded.append(subquery)
+                excluded_params.extend(subquery_params)
+
+        clauses = []
+        if included:
+            clauses.append(f"id IN ({' INTERSECT '.join(included)})")
+        if excluded:
+            clauses.append(f"id NOT IN ({' UNION '.join(excluded)})")
+        return ' AND '.join(clauses), params + excluded_params
+
+    @staticmethod
+    def encode_cursor(sort_value, row_id: int) -> str:
+        return base64.urlsafe_b64encode(json.dumps([sort_value, row_id]).encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[object, int]:
+        """Decode a cursor made by encode_cursor. Raises ValueError for anything else."""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            if not isinstance(payload, list) or len(payload) != 2:
+                raise ValueError("not a [sort value, id] pair")
+            sort_value, row_id = payload
+            if sort_value is not None and not isinstance(sort_value, (str, int, float)):
+                raise ValueError("sort value is not a scalar")
+            return sort_value, int(row_id)
+        except (TypeError, ValueError, UnicodeError) as e:
+            raise ValueError(f"Invalid cursor: {e}") from e
+
+    def count_resources(self, resource_type: str, **filters) -> int:
+        """SELECT COUNT(*) of a resource type under the same filters query_resources accepts."""
+        try:
+            with self._reader() as conn:
+                where, params = self._typed_filters(resource_type, **filters)
+                return conn.execute(f'''
+                    SELECT COUNT(*) FROM resources
+                    WHERE resource_type = ?{where}
+                ''', (resource_type,) + params).fetchone()[0]
+        except ValueError:
+            raise
+        except Exception as e:
+            logging.error(f"Error counting resources: {str(e)}")
+            return 0
+
+    def query_resources(self, resource_type: str, sort_by: Optional[str] = None, descending: bool = False,
+                        limit: int = 50, offset: int = 0, after: Optional[str] = None,
+                        fields: Optional[List[str]] = None, **filters) -> Tuple[List[Dict], Optional[str]]:
+        """
+        One page of resources, filtered, sorted and limited in SQL so only the returned rows are decoded.
+        sort_by is a key of SORT_EXPRESSIONS (default: insertion order). Pages are addressed either by
+        offset or, for deep pages, by the opaque `after` cursor returned with the previous page.
+        fields (see resource_fields.parse_fields) projects each item to those paths; when they are all
+        COLUMN_FIELDS the data column is not read at all.
+        Returns (items, next_cursor); next_cursor is None on the last page.
+        Raises ValueError for unknown sort keys, malformed label selectors or cursors.
+        """
+        if sort_by and sort_by not in SORT_EXPRESSIONS:
+            raise ValueError(f"Unknown sort key: {sort_by}")
+        sort_expression = SORT_EXPRESSIONS[sort_by] if sort_by else 'id'
+        direction = 'DESC' if descending else 'ASC'
+        where, params = self._typed_filters(resource_type, **filters)
+
+        if after:
+            sort_value, row_id = self.decode_cursor(after)
+            comparison = '<' if descending else '>'
+            if sort_by:
+                where += f' AND ({sort_expression}, id) {comparison} (?, ?)'
+                params += (sort_value, row_id)
+            else:
+                where += f' AND id {comparison} ?'
+                params += (row_id,)
+            offset = 0
+
+        columns = ['data']
+        if fields is not None:
+            columns = sorted({COLUMN_FIELDS[path] for path in fields if path in COLUMN_FIELDS})
+            if any(path not in COLUMN_FIELDS for path in fields):
+                columns.append('data')
+
+        try:
+            with self._reader() as conn:
+                rows = conn.execute(f'''
+                    SELECT id, {sort_expression}, {', '.join(columns)} FROM resources
+                    WHERE resource_type = ?{where}
+                    ORDER BY {sort_expression} {direction}{', id ' + direction if sort_by else ''}
+                    LIMIT ? OFFSET ?
+                ''', (resource_type,) + params + (limit + 1, offset)).fetchall()
+        except Exception as e:
+            logging.error(f"Error querying resources: {str(e)}")
+            return [], None
+
+        # One extra row is fetched to know whether another page follows
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            row_id, sort_value = rows[-1][:2]
+            next_cursor = self.encode_cursor(sort_value, row_id)
+
+        if fields is None:
+            return [self.codec.decode(row[2]) for row in rows], next_cursor
+        items = []
+        for row in rows:
+            values = dict(zip(columns, row[2:]))
+            resource = self.codec.decode(values['data']) if 'data' in values else None
+            items.append(project_fields(resource_type, fields, values, resource))
+        return items, next_cursor
+
+    def search_resources(self, query: str, resource_types: Optional[List[str]] = None,
+                         namespace: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """
+        Ranked search over names, namespaces, labels, annotation keys and container images of
+        every cached resource type. Each whitespace-separated term must match (as a substring
+        with the trigram tokenizer). Raises ValueError for queries the index cannot answer.
+        """
+        terms = query.split()
+        if not terms:
+            raise ValueError("Search query is empty")
+        if self.search_trigram and any(len(term) < SEARCH_MIN_TERM_LENGTH for term in terms):
+            raise ValueError(f"Search terms must be at least {SEARCH_MIN_TERM_LENGTH} characters long")
+        # Every term is quoted so FTS5 syntax characters in it are matched literally
+        suffix = '' if self.search_trigram else '*'
+        match = ' '.join('"' + term.replace('"', '""') + '"' + suffix for term in terms)
+
+        where, params = '', []
+        if resource_types:
+            where += f" AND r.resource_type IN ({', '.join('?' for _ in resource_types)})"
+            params.extend(resource_types)
+        if namespace:
+            where += ' AND r.namespace = ?'
+            params.append(namespace)
+
+        try:
+            with self._reader() as conn:
+                rows = conn.execute(f'''
+                    SELECT r.resource_type, r.namespace, r.name, r.labels, r.images,
+                           bm25(resources_search, {', '.join(str(weight) for weight in SEARCH_WEIGHTS)}) AS rank
+                    FROM resources_search
+                    JOIN resources r ON r.id = resources_search.rowid
+                    WHERE resources_search MATCH ?{where}
+                    ORDER BY rank
+                    LIMIT ?
+                ''', [match] + params + [limit]).fetchall()
+        except Exception as e:
+            logging.error(f"Error searching resources: {str(e)}")
+            return []
+
+        return [{
+            'resource_type': resource_type,
+            'namespace': namespace,
+            'name': name,
+            'labels': json.loads(labels) if labels else {},
+            'images': images.split() if images else [],
+            'score': round(-rank, 3),
+        } for resource_type, namespace, name, labels, images, rank in rows]
+
+    def get_pod_request_totals(self, group_by: str = 'phase', phase: Optional[str] = None,
+                               min_gpu_request: Optional[int] = None) -> List[Dict]:
+        """
+        Pod counts (in total and per phase) and summed cpu/memory/gpu requests per value of
+        group_by (one of GROUPABLE_COLUMNS), computed in SQL over the typed columns.
+        """
+        if group_by not in GROUPABLE_COLUMNS:
+            raise ValueError(f"Cannot group pod requests by {group_by}")
+        try:
+            with self._reader() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                where, params = self._typed_filters('pods', phase=phase, min_gpu_request=min_gpu_request)
+                cursor.execute(f'''
+                    SELECT {GROUPABLE_COLUMNS[group_by]} AS group_value,
+                           COUNT(*) AS pod_count,
+                           COALESCE(SUM(cpu_request_millicores), 0) AS cpu_request_millicores,
+                           COALESCE(SUM(memory_request_bytes), 0) AS memory_request_bytes,
+                           COALESCE(SUM(gpu_request), 0) AS gpu_request,
+                           SUM(CASE WHEN phase = 'Running' THEN 1 ELSE 0 END) AS running_pods,
+                           SUM(CASE WHEN phase = 'Pending' THEN 1 ELSE 0 END) AS pending_pods,
+                           SUM(CASE WHEN phase = 'Failed' THEN 1 ELSE 0 END) AS failed_pods
+                    FROM resources
+                    WHERE resource_type = 'pods'{where}
+                    GROUP BY group_value
+                ''', params)
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logging.error(f"Error aggregating pod requests: {str(e)}")
+            return []
+
     def update_metrics(self, metric_type: str, namespace: str, data: Dict) -> bool:
         """Update or insert metrics data."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._writer() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute('''
@@ -211,9 +1255,9 @@ class Database:
             return False
 
     def get_metrics(self, metric_type: str, namespace: Optional[str] = None) -> List[Dict]:
-        """Retrieve metrics from the database."""
+        """Retrieve metrics from the database, e.g. the per-namespace pod totals (NAMESPACE_METRICS_TYPE)."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._reader() as conn:
                 cursor = conn.cursor()
                 
                 if namespace:
@@ -236,7 +1280,7 @@ class Database:
     def clear_environment_metrics_cache(self) -> bool:
         """Clear any cached environment metrics to force fresh collection."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._writer() as conn:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM environment_metrics')
                 conn.commit()
@@ -249,7 +1293,7 @@ class Database:
     def update_environment_metrics(self, metrics_data: Dict) -> bool:
         """Update the single row in environment_metrics table with the latest metrics."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._writer() as conn:
                 cursor = conn.cursor()
                 
                 # Delete existing metrics (should only be one row)
@@ -291,9 +1335,9 @@ class Database:
     def get_latest_environment_metrics(self) -> Optional[Dict]:
         """Retrieve the latest environment metrics."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row # Access columns by name
+            with self._reader() as conn:
                 cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row # Access columns by name
                 cursor.execute('SELECT * FROM environment_metrics ORDER BY timestamp DESC LIMIT 1')
                 row = cursor.fetchone()
                 if row:
@@ -303,21 +1347,176 @@ class Database:
             logging.error(f"Error retrieving latest environment_metrics: {str(e)}")
             return None
 
+    def get_latest_environment_metrics_id(self) -> Optional[int]:
+        """Row id of the latest environment metrics, which changes whenever new metrics are stored."""
+        try:
+            with self._reader() as conn:
+                row = conn.execute('SELECT id FROM environment_metrics ORDER BY timestamp DESC LIMIT 1').fetchone()
+                return row[0] if row else None
+        except Exception as e:
+            logging.error(f"Error retrieving latest environment_metrics id: {str(e)}")
+            return None
+
+    def needs_compression_dictionary(self) -> bool:
+        """True when resources are stored compressed but no dictionary has been trained for the codec yet."""
+        return self.codec.compression != 'none' and not self.codec.dictionary_id
+
+    def train_compression_dictionary(self, sample_size: int = COMPRESSION_DICTIONARY_SAMPLES) -> bool:
+        """
+        Train a dictionary for the configured codec from a sample of cached objects, then
+        re-encode every cached row with it. Small Kubernetes objects share most of their keys
+        and values, which is where a dictionary beats compressing each row on its own.
+        The re-encode does not change any object, so generations and cached decodes stay valid.
+        The dictionary is committed before any row refers to it, and new writes (including those
+        of sync sessions, which take the write lock to commit) only switch to it once the
+        re-encode has committed, so no stored value can name a dictionary that was rolled back.
+        """
+        compression = self.codec.compression
+        if compression == 'none':
+            return False
+        try:
+            with self._reader() as conn:
+                rows = conn.execute('SELECT data FROM resources ORDER BY RANDOM() LIMIT ?', (sample_size,)).fetchall()
+            if len(rows) < COMPRESSION_DICTIONARY_MIN_SAMPLES:
+                logging.info(f"Only {len(rows)} cached resources, not training a {compression} dictionary yet")
+                return False
+            samples = [serializer.dumps_bytes(self.codec.decode(data)) for (data,) in rows]
+            dictionary = train_dictionary(compression, samples)
+
+            with self._writer() as conn:
+                cursor = conn.cursor()
+                cursor.execute('INSERT INTO compression_dictionaries (codec, dictionary) VALUES (?, ?)',
+                               (compression, dictionary))
+                dictionary_id = cursor.lastrowid
+            # Decoding only for now: new writes keep the current dictionary until the re-encode commits
+            self.codec.register_dictionary(dictionary_id, compression, dictionary, use_for_writes=False)
+
+            with self._writer() as conn:
+                cursor = conn.cursor()
+                rows = cursor.execute('SELECT id, data FROM resources').fetchall()
+                cursor.executemany(
+                    'UPDATE resources SET data = ? WHERE id = ?',
+                    ((self.codec.encode(self.codec.decode(data), dictionary_id), row_id) for row_id, data in rows)
+                )
+            self.codec.register_dictionary(dictionary_id, compression, dictionary)
+            logging.info(f"Trained a {len(dictionary)} byte {compression} dictionary and re-encoded {len(rows)} cached resources")
+            return True
+        except Exception as e:
+            # New writes keep using the previous dictionary
+            logging.error(f"Error training compression dictionary: {str(e)}")
+            return False
+
+    def record_metrics_sample(self, timestamp: Optional[float] = None) -> bool:
+        """
+        Append a raw metrics_history sample for the cluster and for every namespace: pod requests and
+        phase counts computed from the typed pod columns, plus the cluster's allocatable resources
+        from the latest environment_metrics row.
+        """
+        sample_time = int(timestamp or time.time())
+        pod_totals = '''
+            SUM(cpu_request_millicores), SUM(memory_request_bytes),
+            SUM(CASE WHEN phase = 'Running' THEN gpu_request ELSE 0 END),
+            SUM(CASE WHEN phase = 'Pending' THEN gpu_request ELSE 0 END),
+            COUNT(*),
+            SUM(CASE WHEN phase = 'Running' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN phase = 'Pending' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN phase = 'Failed' THEN 1 ELSE 0 END)
+        '''
+        try:
+            with self._writer() as conn:
+                cursor = conn.cursor()
+                allocatable = cursor.execute('''
+                    SELECT total_node_allocatable_cpu_millicores, total_node_allocatable_memory_bytes,
+                           total_node_allocatable_gpus, total_node_allocatable_pods
+                    FROM environment_metrics ORDER BY timestamp DESC LIMIT 1
+                ''').fetchone() or (None, None, None, None)
+                cursor.execute(f'''
+                    INSERT OR REPLACE INTO metrics_history (tier, namespace, bucket_start, samples, {', '.join(METRICS_HISTORY_COLUMNS)})
+                    SELECT 'raw', '', ?, 1, ?, ?, ?, ?, {pod_totals}
+                    FROM resources WHERE resource_type = 'pods'
+                    UNION ALL
+                    SELECT 'raw', namespace, ?, 1, NULL, NULL, NULL, NULL, {pod_totals}
+                    FROM resources WHERE resource_type = 'pods'
+                    GROUP BY namespace
+                ''', (sample_time,) + tuple(allocatable) + (sample_time,))
+                conn.commit()
+                return True
+        except Exception as e:
+            logging.error(f"Error recording metrics sample: {str(e)}")
+            return False
+
+    def compact_metrics_history(self, now: Optional[float] = None) -> bool:
+        """
+        Average every complete bucket of each tier into the next coarser one (raw -> 5m -> 1h),
+        weighted by sample count, then drop rows older than each tier's retention.
+        Buckets from the last compacted one onward are recomputed, so running it often is cheap and safe.
+        """
+        now = int(now or time.time())
+        averages = ', '.join(
+            f'SUM({column} * samples) / SUM(CASE WHEN {column} IS NOT NULL THEN samples END)'
+            for column in METRICS_HISTORY_COLUMNS
+        )
+        try:
+            with self._writer() as conn:
+                cursor = conn.cursor()
+                for (source, _), (target, step) in zip(METRICS_TIERS, METRICS_TIERS[1:]):
+                    since = cursor.execute(
+                        'SELECT COALESCE(MAX(bucket_start), 0) FROM metrics_history WHERE tier = ?', (target,)
+                    ).fetchone()[0]
+                    cursor.execute(f'''
+                        INSERT OR REPLACE INTO metrics_history (tier, namespace, bucket_start, samples, {', '.join(METRICS_HISTORY_COLUMNS)})
+                        SELECT ?, namespace, (bucket_start / ?) * ? AS bucket, SUM(samples), {averages}
+                        FROM metrics_history
+                        WHERE tier = ? AND bucket_start >= ? AND bucket_start < ?
+                        GROUP BY namespace, bucket
+                    ''', (target, step, step, source, since, now // step * step))
+                for tier, _ in METRICS_TIERS:
+                    cursor.execute('DELETE FROM metrics_history WHERE tier = ? AND bucket_start < ?',
+                                   (tier, now - int(METRICS_RETENTION_HOURS[tier] * 3600)))
+                conn.commit()
+                return True
+        except Exception as e:
+            logging.error(f"Error compacting metrics history: {str(e)}")
+            return False
+
+    def get_metrics_history(self, range_seconds: int, namespace: Optional[str] = None) -> Dict:
+        """
+        Metrics history for the last range_seconds, for the cluster or one namespace, from the finest
+        tier that covers the range (see METRICS_TIER_MAX_RANGE and METRICS_RETENTION_HOURS).
+        """
+        tier, step = METRICS_TIERS[-1]
+        for candidate, candidate_step in METRICS_TIERS[:-1]:
+            if (range_seconds <= METRICS_TIER_MAX_RANGE[candidate]
+                    and range_seconds <= METRICS_RETENTION_HOURS[candidate] * 3600):
+                tier, step = candidate, candidate_step
+                break
+        try:
+            with self._reader() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                cursor.execute(f'''
+                    SELECT strftime('%Y-%m-%dT%H:%M:%SZ', bucket_start, 'unixepoch') AS timestamp, samples,
+                           {', '.join(METRICS_HISTORY_COLUMNS)}
+                    FROM metrics_history
+                    WHERE tier = ? AND namespace = ? AND bucket_start >= ?
+                    ORDER BY bucket_start
+                ''', (tier, namespace or '', int(time.time()) - range_seconds))
+                points = [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            logging.error(f"Error retrieving metrics history: {str(e)}")
+            points = []
+        return {'tier': tier, 'step_seconds': step, 'points': points}
+
     def clear_old_data(self, days: int = 7):
-        """Clear data older than specified number of days."""
+        """
+        Clear environment metrics older than specified number of days. Cached resources are not
+        aged out: diff updates leave unchanged rows (and their last_updated) alone, and every sync
+        already removes objects that no longer exist. Namespace metrics follow the cached pods,
+        so a quiet namespace keeps its row however old it is.
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._writer() as conn:
                 cursor = conn.cursor()
-                
-                cursor.execute('''
-                    DELETE FROM resources 
-                    WHERE last_updated < datetime('now', ?)
-                ''', (f'-{days} days',))
-                
-                cursor.execute('''
-                    DELETE FROM metrics 
-                    WHERE last_updated < datetime('now', ?)
-                ''', (f'-{days} days',))
 
                 cursor.execute('''
                     DELETE FROM environment_metrics
@@ -329,5 +1528,177 @@ class Database:
         except Exception as e:
             logging.error(f"Error clearing old data: {str(e)}")
 
+class ResourceSyncSession:
+    """
+    Applies a paged snapshot of several resource types as one diff against the live table.
+    Pages are staged in a temporary table as they arrive: each object is compared with the
+    stored resourceVersion and only new or changed objects are serialized. Nothing touches
+    the live table until commit(), which applies every finished type in a single transaction.
+    Types that are discarded (e.g. their fetch failed half-way) keep their existing rows.
+    """
+
+    def __init__(self, database: 'Database'):
+        self.database = database
+        self.conn = database._open_connection()
+        self.cursor = self.conn.cursor()
+        self.cursor.execute(f'''
+            CREATE TEMP TABLE IF NOT EXISTS resources_incoming (
+                resource_type TEXT NOT NULL,
+                namespace TEXT NOT NULL,
+                name TEXT NOT NULL,
+                resource_version TEXT,
+                data TEXT,
+                {', '.join(f'{column} {column_type}' for column, column_type in TYPED_COLUMNS)},
+                PRIMARY KEY (resource_type, namespace, name)
+            )
+        ''')
+        self.cursor.execute('DELETE FROM temp.resources_incoming')
+        self.conn.commit()
+        self._known_versions = {}
+        self._finished_types = []
+        self._timings: Dict[str, Dict] = {}
+
+    def _stored_versions(self, resource_type: str) -> Dict[Tuple[str, str], str]:
+        if resource_type not in self._known_versions:
+            self.cursor.execute('''
+                SELECT namespace, name, resource_version FROM resources
+                WHERE resource_type = ?
+            ''', (resource_type,))
+            self._known_versions[resource_type] = {(namespace, name): version for namespace, name, version in self.cursor.fetchall()}
+        return self._known_versions[resource_type]
+
+    def add_page(self, resource_type: str, resources: List[Dict]):
+        """Stage one page of objects. Unchanged objects are recorded by key only."""
+        stored = self._stored_versions(resource_type)
+        started = time.perf_counter()
+        rows = []
+        for resource in resources:
+            metadata = resource.get('metadata', {})
+            namespace = metadata.get('namespace', 'default')
+            name = metadata.get('name')
+            if not name:
+                logging.warning(f"Skipping resource update due to missing name: {resource_type}/{namespace}")
+                continue
+
+            version = Database._resource_version_key(resource)
+            if stored.get((namespace, name)) == version:
+                rows.append((resource_type, namespace, name, version, None) + (None,) * len(TYPED_COLUMNS))
+            else:
+                rows.append((resource_type, namespace, name, version, self.database.codec.encode(resource))
+                            + extract_typed_columns(resource_type, resource))
+
+        serialized = time.perf_counter()
+        self.cursor.executemany(f'''
+            INSERT OR REPLACE INTO temp.resources_incoming
+            (resource_type, namespace, name, resource_version, data, {TYPED_COLUMN_LIST})
+            VALUES (?, ?, ?, ?, ?, {TYPED_COLUMN_PLACEHOLDERS})
+        ''', rows)
+        # Commit per page so no lock is held on the main database while waiting for the next page
+        self.conn.commit()
+        inserted = time.perf_counter()
+
+        timings = self._timings.setdefault(resource_type, {'rows': 0, 'batches': 0, 'serialize_ms': 0.0, 'insert_ms': 0.0})
+        timings['rows'] += len(rows)
+        timings['batches'] += 1
+        timings['serialize_ms'] += (serialized - started) * 1000
+        timings['insert_ms'] += (inserted - serialized) * 1000
+        logging.debug(f"Staged page of {len(rows)} {resource_type}: serialize {(serialized - started) * 1000:.1f}ms, "
+                      f"insert {(inserted - serialized) * 1000:.1f}ms")
+
+    def finish_type(self, resource_type: str):
+        """Mark a resource type as completely staged; it will be applied on commit()."""
+        self._stored_versions(resource_type)
+        self._finished_types.append(resource_type)
+
+    def discard_type(self, resource_type: str):
+        """Drop the staged pages of a resource type so its cached rows are left untouched."""
+        self.cursor.execute('DELETE FROM temp.resources_incoming WHERE resource_type = ?', (resource_type,))
+        self.conn.commit()
+        self._known_versions.pop(resource_type, None)
+        self._timings.pop(resource_type, None)
+
+    def commit(self, namespace_metrics: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Apply all finished types to the live table in one transaction and return per-type change counts.
+        When pods are applied, namespace_metrics (aggregated while their pages were staged) are
+        stored in the same transaction; without it they are computed from the updated table.
+        """
+        stats = {}
+        changed_types = set()
+        # Serialized with the Database's own writes (watch events, dictionary training)
+        with self.database._write_lock:
+            self.cursor.execute('BEGIN IMMEDIATE')
+            for resource_type in self._finished_types:
+                started = time.perf_counter()
+                stats[resource_type] = self._apply_type(resource_type)
+                timings = self._timings.get(resource_type, {'rows': 0, 'batches': 0, 'serialize_ms': 0.0, 'insert_ms': 0.0})
+                timings['apply_ms'] = (time.perf_counter() - started) * 1000
+                self.database.write_timings[resource_type] = {
+                    key: round(value, 1) if isinstance(value, float) else value for key, value in timings.items()
+                }
+                counts = stats[resource_type]
+                if counts['inserted'] + counts['updated'] + counts['deleted'] > 0:
+                    changed_types.add(resource_type)
+                self.database._mark_synced(self.cursor, resource_type, resource_type in changed_types)
+            if 'pods' in self._finished_types:
+                self.database._write_namespace_metrics(self.cursor, namespace_metrics)
+            self.conn.commit()
+        self.database.decoded_cache.invalidate(changed_types)
+
+        for resource_type, counts in stats.items():
+            logging.info(f"Diff-applied {resource_type}: {counts['inserted']} inserted, {counts['updated']} updated, "
+                         f"{counts['deleted']} deleted, {counts['unchanged']} unchanged.")
+        return stats
+
+    def _apply_type(self, resource_type: str) -> Dict[str, int]:
+        self.cursor.execute('''
+            SELECT
+                COALESCE(SUM(CASE WHEN r.id IS NULL THEN 1 ELSE 0 END), 0),
+                COALESCE(SUM(CASE WHEN r.id IS NOT NULL AND s.data IS NOT NULL THEN 1 ELSE 0 END), 0),
+                COUNT(*)
+            FROM temp.resources_incoming s
+            LEFT JOIN resources r
+                ON r.resource_type = s.resource_type AND r.namespace = s.namespace AND r.name = s.name
+            WHERE s.resource_type = ?
+        ''', (resource_type,))
+        inserted, updated, seen = self.cursor.fetchone()
+
+        typed_updates = ''.join(f',\n                {column} = excluded.{column}' for column in TYPED_COLUMN_NAMES)
+        self.cursor.execute(f'''
+            INSERT INTO resources (resource_type, namespace, name, data, resource_version, last_updated, {TYPED_COLUMN_LIST})
+            SELECT resource_type, namespace, name, data, resource_version, CURRENT_TIMESTAMP, {TYPED_COLUMN_LIST}
+            FROM temp.resources_incoming
+            WHERE resource_type = ? AND data IS NOT NULL
+            ON CONFLICT(resource_type, namespace, name) DO UPDATE SET
+                data = excluded.data,
+                resource_version = excluded.resource_version,
+                last_updated = excluded.last_updated{typed_updates}
+        ''', (resource_type,))
+
+        self.cursor.execute('''
+            DELETE FROM resources
+            WHERE resource_type = ? AND NOT EXISTS (
+                SELECT 1 FROM temp.resources_incoming s
+                WHERE s.resource_type = resources.resource_type
+                  AND s.namespace = resources.namespace
+                  AND s.name = resources.name
+            )
+        ''', (resource_type,))
+        deleted = self.cursor.rowcount
+
+        return {
+            'inserted': inserted,
+            'updated': updated,
+            'deleted': deleted,
+            'unchanged': seen - inserted - updated
+        }
+
+    def close(self):
+        """Release the session connection (and with it the temporary staging table)."""
+        try:
+            self.conn.close()
+        except Exception as e:
+            logging.warning(f"Error closing resource sync session: {e}")
+
 # Create a global instance
 db = Database() 
\ No newline at end of file
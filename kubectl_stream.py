@@ -0,0 +1,157 @@
+import json
+import logging
+import subprocess
+import tempfile
+import threading
+from typing import Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+
+class KubectlError(RuntimeError):
+    """Raised when a streamed kubectl command exits with an error."""
+
+class JsonItemStream:
+    """
+    Incrementally decode a Kubernetes list document ({"items": [...], ...}) from a text stream.
+    Iterating yields the elements of the top-level "items" array one at a time, so only the
+    object being decoded (plus one read chunk) is held in memory. Every other top-level key
+    (kind, apiVersion, metadata with its continue token, ...) is collected into `envelope`,
+    which is complete once iteration has finished.
+    """
+
+    def __init__(self, stream, chunk_size: int = 65536):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self.envelope: Dict = {}
+
+    def _fill(self) -> bool:
+        """Read the next chunk, dropping the already consumed part of the buffer. Returns False at EOF."""
+        chunk = self._stream.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _error(self, message: str):
+        return json.JSONDecodeError(message, self._buf, self._pos)
+
+    def _peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                raise self._error("Unexpected end of JSON input")
+
+    def _expect(self, char: str):
+        if self._peek() != char:
+            raise self._error(f"Expected '{char}'")
+        self._pos += 1
+
+    def _value(self):
+        """Decode the next complete JSON value, reading more input until it is available."""
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+                # A value ending exactly at the buffer end may be a truncated number or literal
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def __iter__(self) -> Iterator[Dict]:
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self._value()
+            self._expect(':')
+            if key == 'items' and self._peek() == '[':
+                self._pos += 1
+                if self._peek() == ']':
+                    self._pos += 1
+                else:
+                    while True:
+                        yield self._value()
+                        separator = self._peek()
+                        self._pos += 1
+                        if separator == ']':
+                            break
+                        if separator != ',':
+                            raise self._error("Expected ',' or ']' in items")
+            else:
+                self.envelope[key] = self._value()
+            separator = self._peek()
+            self._pos += 1
+            if separator == '}':
+                break
+            if separator != ',':
+                raise self._error("Expected ',' or '}'")
+
+class KubectlItemStream:
+    """
+    Run a kubectl command that prints a JSON list and iterate over its items while kubectl is
+    still writing them. Failures (non-zero exit, timeout, malformed output) are raised from the
+    iteration as KubectlError, subprocess.TimeoutExpired or json.JSONDecodeError; stopping early
+    kills the process. The list's other top-level fields are available in `envelope` afterwards.
+    """
+
+    def __init__(self, command_list: List[str], timeout: int = 60):
+        self.command_list = command_list
+        self.timeout = timeout
+        self.envelope: Dict = {}
+
+    def __iter__(self) -> Iterator[Dict]:
+        # stderr goes to a temp file so a chatty kubectl can never block on a full pipe
+        with tempfile.TemporaryFile(mode='w+') as stderr:
+            process = subprocess.Popen(self.command_list, stdout=subprocess.PIPE, stderr=stderr, text=True)
+            timed_out = threading.Event()
+
+            def _kill():
+                timed_out.set()
+                process.kill()
+
+            timer = threading.Timer(self.timeout, _kill)
+            timer.daemon = True
+            timer.start()
+            try:
+                items = JsonItemStream(process.stdout)
+                self.envelope = items.envelope
+                decode_error = None
+                try:
+                    yield from items
+                except json.JSONDecodeError as e:
+                    # Truncated output from a killed or failing kubectl is reported as such below
+                    decode_error = e
+                # Drain anything left after the items so kubectl can exit
+                while process.stdout.read(65536):
+                    pass
+                process.wait()
+                if timed_out.is_set():
+                    raise subprocess.TimeoutExpired(self.command_list, self.timeout)
+                if process.returncode != 0:
+                    stderr.seek(0)
+                    raise KubectlError(f"kubectl failed: {stderr.read().strip()}")
+                if decode_error:
+                    raise decode_error
+            finally:
+                timer.cancel()
+                if process.poll() is None:
+                    process.kill()
+                process.stdout.close()
+                process.wait()
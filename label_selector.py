@@ -0,0 +1,75 @@
+import re
+from typing import List, NamedTuple, Tuple
+
+# Label keys are DNS-style names with an optional prefix, e.g. app.kubernetes.io/name
+LABEL_KEY_PATTERN = re.compile(r'^[A-Za-z0-9]([A-Za-z0-9._/-]*[A-Za-z0-9])?$')
+LABEL_VALUE_PATTERN = re.compile(r'^([A-Za-z0-9]([A-Za-z0-9._-]*[A-Za-z0-9])?)?$')
+SET_REQUIREMENT_PATTERN = re.compile(r'^(\S+)\s+(in|notin)\s*\((.*)\)$')
+
+class LabelRequirement(NamedTuple):
+    """One requirement of a selector. operator is '=', '!=', 'in', 'notin', 'exists' or '!' (does not exist)."""
+    key: str
+    operator: str
+    values: Tuple[str, ...] = ()
+
+def _split_requirements(selector: str) -> List[str]:
+    """Split on the commas between requirements, not the ones inside an in/notin value list."""
+    terms, depth, current = [], 0, ''
+    for char in selector:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth < 0:
+                raise ValueError(f"Unbalanced parentheses in label selector: {selector}")
+        if char == ',' and depth == 0:
+            terms.append(current)
+            current = ''
+        else:
+            current += char
+    if depth:
+        raise ValueError(f"Unbalanced parentheses in label selector: {selector}")
+    terms.append(current)
+    return terms
+
+def _check_key(key: str) -> str:
+    if not LABEL_KEY_PATTERN.match(key):
+        raise ValueError(f"Invalid label key: {key!r}")
+    return key
+
+def _check_value(value: str) -> str:
+    if not LABEL_VALUE_PATTERN.match(value):
+        raise ValueError(f"Invalid label value: {value!r}")
+    return value
+
+def parse_label_selector(selector: str) -> List[LabelRequirement]:
+    """
+    Parse a Kubernetes label selector, e.g. 'app=web,tier!=cache,env in (prod,staging),!canary'.
+    Supports =, ==, !=, in, notin, existence ('key') and non-existence ('!key'); all requirements
+    must hold. Raises ValueError for malformed selectors.
+    """
+    if not selector or not selector.strip():
+        return []
+
+    requirements = []
+    for term in _split_requirements(selector):
+        term = term.strip()
+        if not term:
+            raise ValueError(f"Empty requirement in label selector: {selector}")
+
+        set_match = SET_REQUIREMENT_PATTERN.match(term)
+        if set_match:
+            key, operator, values = set_match.groups()
+            values = tuple(_check_value(value.strip()) for value in values.split(','))
+            requirements.append(LabelRequirement(_check_key(key), operator, values))
+        elif term.startswith('!') and '=' not in term:
+            requirements.append(LabelRequirement(_check_key(term[1:].strip()), '!'))
+        elif '!=' in term:
+            key, _, value = term.partition('!=')
+            requirements.append(LabelRequirement(_check_key(key.strip()), '!=', (_check_value(value.strip()),)))
+        elif '=' in term:
+            key, _, value = term.partition('==') if '==' in term else term.partition('=')
+            requirements.append(LabelRequirement(_check_key(key.strip()), '=', (_check_value(value.strip()),)))
+        else:
+            requirements.append(LabelRequirement(_check_key(term), 'exists'))
+    return requirements
@@ -0,0 +1,145 @@
+import logging
+import os
+import struct
+import threading
+import zlib
+from typing import Dict, List, Optional, Union
+
+from serializer import serializer
+
+logger = logging.getLogger(__name__)
+
+# zstd is optional; without it RESOURCE_COMPRESSION=zstd falls back to zlib
+try:
+    import zstandard
+    zstd_available = True
+except ImportError:
+    zstd_available = False
+
+RESOURCE_COMPRESSION = os.environ.get('RESOURCE_COMPRESSION', 'none').lower()
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+ZLIB_DICTIONARY_SIZE = 32 * 1024  # zlib only uses the last 32KB of a preset dictionary
+ZSTD_DICTIONARY_SIZE = 112 * 1024
+
+# Compressed values are stored as BLOBs: one codec tag byte, a 4-byte dictionary id (0 for none)
+# and the compressed JSON. Plain JSON is stored as TEXT, so both can live in the same column.
+CODEC_TAGS = {'zlib': b'Z', 'zstd': b'S'}
+TAG_CODECS = {tag: codec for codec, tag in CODEC_TAGS.items()}
+HEADER = struct.Struct('>cI')
+# Rough size of the JSON behind a compressed value, for memory accounting of decoded objects
+ESTIMATED_COMPRESSION_RATIO = 6
+
+def resolve_compression(compression: str) -> str:
+    """Validate a RESOURCE_COMPRESSION value, falling back when the codec is not available."""
+    if compression in ('', 'none', 'off'):
+        return 'none'
+    if compression == 'zstd' and not zstd_available:
+        logger.warning("RESOURCE_COMPRESSION=zstd but the zstandard package is not installed, using zlib")
+        return 'zlib'
+    if compression not in CODEC_TAGS:
+        logger.warning(f"Unknown RESOURCE_COMPRESSION {compression}, storing plain JSON")
+        return 'none'
+    return compression
+
+def train_dictionary(codec: str, samples: List[bytes]) -> bytes:
+    """Build a compression dictionary for codec from sample encoded objects."""
+    if codec == 'zstd':
+        return zstandard.train_dictionary(ZSTD_DICTIONARY_SIZE, samples).as_bytes()
+    # zlib has no trainer; a preset dictionary of typical objects works well for small,
+    # repetitive JSON. The most representative samples go last, where zlib looks first.
+    dictionary = b''
+    for sample in samples:
+        dictionary = (dictionary + sample)[-ZLIB_DICTIONARY_SIZE:]
+    return dictionary
+
+class ResourceCodec:
+    """
+    Encodes resource objects for the data column and decodes any stored value, whichever
+    encoding or dictionary it was written with, as long as the dictionary is registered.
+    """
+
+    def __init__(self, compression: str = RESOURCE_COMPRESSION):
+        self.compression = resolve_compression(compression)
+        self._dictionaries: Dict[int, bytes] = {}
+        # zstd (de)compressors must not be shared between threads, so each thread keeps its own
+        self._local = threading.local()
+        self.dictionary_id = 0
+
+    def register_dictionary(self, dictionary_id: int, codec: str, dictionary: bytes, use_for_writes: bool = True):
+        """Make a dictionary available for decoding and, with use_for_writes, use it for new writes."""
+        self._dictionaries[dictionary_id] = dictionary
+        if use_for_writes and codec == self.compression:
+            self.dictionary_id = dictionary_id
+
+    def encode(self, resource: Dict, dictionary_id: Optional[int] = None) -> Union[str, bytes]:
+        """Encode with the given registered dictionary, or by default the one used for writes."""
+        if self.compression == 'none':
+            return serializer.dumps(resource)
+        if dictionary_id is None:
+            # Read once, so a concurrent switch cannot mix two dictionaries in one value
+            dictionary_id = self.dictionary_id
+        raw = serializer.dumps_bytes(resource)
+        dictionary = self._dictionaries.get(dictionary_id)
+        if self.compression == 'zstd':
+            payload = self._compressor(dictionary_id).compress(raw)
+        elif dictionary:
+            compressor = self._zlib_primed('compressors', dictionary_id,
+                                           lambda: zlib.compressobj(ZLIB_LEVEL, zdict=dictionary))
+            payload = compressor.compress(raw) + compressor.flush()
+        else:
+            payload = zlib.compress(raw, ZLIB_LEVEL)
+        return HEADER.pack(CODEC_TAGS[self.compression], dictionary_id if dictionary else 0) + payload
+
+    def decode(self, value: Union[str, bytes]) -> Dict:
+        if isinstance(value, str):
+            return serializer.loads(value)
+        tag, dictionary_id = HEADER.unpack_from(value)
+        payload = memoryview(value)[HEADER.size:]
+        codec = TAG_CODECS.get(tag)
+        if dictionary_id and dictionary_id not in self._dictionaries:
+            raise ValueError(f"Unknown compression dictionary {dictionary_id}")
+        if codec == 'zlib':
+            if dictionary_id:
+                decompressor = self._zlib_primed('decompressors', dictionary_id,
+                                                 lambda: zlib.decompressobj(zdict=self._dictionaries[dictionary_id]))
+                raw = decompressor.decompress(payload) + decompressor.flush()
+            else:
+                raw = zlib.decompress(payload)
+        elif codec == 'zstd':
+            if not zstd_available:
+                raise ValueError("Value is zstd-compressed but the zstandard package is not installed")
+            raw = self._decompressor(dictionary_id).decompress(payload)
+        else:
+            raise ValueError(f"Unknown resource encoding tag {tag!r}")
+        return serializer.loads(raw)
+
+    @staticmethod
+    def estimated_json_size(value: Union[str, bytes]) -> int:
+        return len(value) if isinstance(value, str) else len(value) * ESTIMATED_COMPRESSION_RATIO
+
+    def _zlib_primed(self, kind: str, dictionary_id: int, factory):
+        """A fresh copy of a zlib (de)compressor with the dictionary already loaded, which is cheaper than loading it per value."""
+        primed = self._local.__dict__.setdefault(f'zlib_{kind}', {})
+        if dictionary_id not in primed:
+            primed[dictionary_id] = factory()
+        return primed[dictionary_id].copy()
+
+    def _compressor(self, dictionary_id: int):
+        compressors = self._local.__dict__.setdefault('compressors', {})
+        if dictionary_id not in compressors:
+            dictionary = self._dictionaries.get(dictionary_id)
+            compressors[dictionary_id] = zstandard.ZstdCompressor(
+                level=ZSTD_LEVEL,
+                dict_data=zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            )
+        return compressors[dictionary_id]
+
+    def _decompressor(self, dictionary_id: int):
+        decompressors = self._local.__dict__.setdefault('decompressors', {})
+        if dictionary_id not in decompressors:
+            dictionary = self._dictionaries.get(dictionary_id)
+            decompressors[dictionary_id] = zstandard.ZstdDecompressor(
+                dict_data=zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            )
+        return decompressors[dictionary_id]
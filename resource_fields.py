@@ -0,0 +1,343 @@
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Ingest-time projection: heavy fields that the dashboard never reads are stripped before
+# objects are cached. Paths are tuples of keys; '*' matches every element of a list or
+# every value of a dict. The full object is always available live through
+# /api/resource/<type>/<namespace>/<name>/full.
+COMMON_DROPPED_FIELDS = [
+    ('metadata', 'managedFields'),
+    ('metadata', 'annotations', 'kubectl.kubernetes.io/last-applied-configuration'),
+]
+
+DEFAULT_PROJECTIONS = {
+    'pods': {
+        'drop': [
+            ('spec', 'containers', '*', 'env'),
+            ('spec', 'initContainers', '*', 'env'),
+        ],
+    },
+    'deployments': {
+        'drop': [
+            ('spec', 'template', 'spec', 'containers', '*', 'env'),
+            ('spec', 'template', 'spec', 'initContainers', '*', 'env'),
+        ],
+    },
+    'nodes': {
+        'drop': [
+            ('status', 'images'),
+        ],
+    },
+    # The resource views only show how many keys configmaps and secrets hold
+    'configmaps': {
+        'keys_only': [('data',), ('binaryData',)],
+    },
+    'secrets': {
+        'keys_only': [('data',), ('stringData',)],
+    },
+}
+
+def _load_projections() -> Dict[str, Dict[str, List[Tuple]]]:
+    """
+    Build the projection table from the defaults and the environment.
+    RESOURCE_PROJECTION=none disables projection entirely; RESOURCE_PROJECTION_FILE may point to a
+    JSON file such as {"pods": {"drop": [["spec", "containers", "*", "env"]]}} whose entries replace
+    the defaults for the resource types it names.
+    """
+    if os.environ.get('RESOURCE_PROJECTION', 'default').lower() == 'none':
+        return {}
+
+    projections = dict(DEFAULT_PROJECTIONS)
+    projection_file = os.environ.get('RESOURCE_PROJECTION_FILE')
+    if projection_file:
+        try:
+            with open(projection_file, 'r', encoding='utf-8') as f:
+                overrides = json.load(f)
+            for resource_type, spec in overrides.items():
+                projections[resource_type] = {
+                    operation: [tuple(path) for path in paths]
+                    for operation, paths in spec.items()
+                }
+            logger.info(f"Loaded resource projection overrides for {list(overrides.keys())} from {projection_file}")
+        except Exception as e:
+            logger.error(f"Error loading resource projection file {projection_file}, using defaults: {e}")
+    return projections
+
+PROJECTIONS = _load_projections()
+PROJECTION_ENABLED = os.environ.get('RESOURCE_PROJECTION', 'default').lower() != 'none'
+
+def _apply_to_path(node, path: Tuple, action):
+    """Walk path inside node and call action(parent, key) on every match of its last segment."""
+    if not path or node is None:
+        return
+    key, rest = path[0], path[1:]
+    if key == '*':
+        if isinstance(node, dict):
+            children = list(node.items())
+        elif isinstance(node, list):
+            children = list(enumerate(node))[::-1]  # Reversed so list deletions do not shift later indexes
+        else:
+            children = []
+        for child_key, child in children:
+            if rest:
+                _apply_to_path(child, rest, action)
+            else:
+                action(node, child_key)
+    elif isinstance(node, dict) and key in node:
+        if rest:
+            _apply_to_path(node[key], rest, action)
+        else:
+            action(node, key)
+
+def _drop(parent, key):
+    del parent[key]
+
+def _keep_keys_only(parent, key):
+    if isinstance(parent[key], dict):
+        parent[key] = {k: '' for k in parent[key]}
+
+def project_resource(resource_type: str, resource: Dict) -> Dict:
+    """Strip heavy fields from a resource object in place (and return it) before it is cached."""
+    if not PROJECTION_ENABLED or not isinstance(resource, dict):
+        return resource
+
+    for path in COMMON_DROPPED_FIELDS:
+        _apply_to_path(resource, path, _drop)
+
+    spec = PROJECTIONS.get(resource_type, {})
+    for path in spec.get('drop', []):
+        _apply_to_path(resource, path, _drop)
+    for path in spec.get('keys_only', []):
+        _apply_to_path(resource, path, _keep_keys_only)
+    return resource
+
+# --- Typed columns extracted at ingest ---
+def parse_cpu_to_millicores(cpu_string: str) -> int:
+    """Converts a CPU string (e.g., '500m', '1', '0.5') to millicores."""
+    if not cpu_string:
+        return 0
+    cpu_string = str(cpu_string).strip()
+    try:
+        if cpu_string.endswith('m'): # millicores
+            return int(float(cpu_string[:-1]))
+        if cpu_string.endswith('u'): # microcores
+            return int(float(cpu_string[:-1]) / 1000)
+        if cpu_string.endswith('n'): # nanocores
+            return int(float(cpu_string[:-1]) / 1000000)
+        # Assuming it's in full cores if no suffix
+        return int(float(cpu_string) * 1000)
+    except ValueError:
+        logger.warning(f"Could not parse CPU string: {cpu_string}")
+        return 0
+
+def parse_memory_to_bytes(memory_string: str) -> int:
+    """Converts a memory string (e.g., '128Mi', '1Gi', '500Ki', '1024') to bytes."""
+    if not memory_string:
+        return 0
+    memory_string = str(memory_string).strip()
+    multipliers = {
+        'k': 1000, 'ki': 1024,
+        'm': 1000**2, 'mi': 1024**2,
+        'g': 1000**3, 'gi': 1024**3,
+        't': 1000**4, 'ti': 1024**4,
+        'p': 1000**5, 'pi': 1024**5,
+        'e': 1000**6, 'ei': 1024**6,
+    }
+    # Normalize to lowercase and identify multiplier
+    memory_string_lower = memory_string.lower()
+    unit = None
+    value_str = memory_string_lower
+
+    for u in sorted(multipliers.keys(), key=len, reverse=True): # Check longer units first (e.g., 'ki' before 'k')
+        if memory_string_lower.endswith(u):
+            unit = u
+            value_str = memory_string_lower[:-len(u)]
+            break
+    
+    try:
+        value = float(value_str)
+        if unit:
+            return int(value * multipliers[unit])
+        else: # Assume bytes if no unit
+            return int(value)
+    except ValueError:
+        logger.warning(f"Could not parse memory string: {memory_string}")
+        return 0
+
+def _parse_int(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+# Columns of the resources table that are derived from the object itself, in insert order
+TYPED_COLUMNS = [
+    ('phase', 'TEXT'),
+    ('node_name', 'TEXT'),
+    ('owner_kind', 'TEXT'),
+    ('owner_name', 'TEXT'),
+    ('cpu_request_millicores', 'INTEGER'),
+    ('memory_request_bytes', 'INTEGER'),
+    ('gpu_request', 'INTEGER'),
+    ('creation_timestamp', 'TEXT'),
+    ('restart_count', 'INTEGER'),
+    ('labels', 'TEXT'),
+    ('annotation_keys', 'TEXT'),
+    ('images', 'TEXT'),
+]
+
+# Where each workload type keeps the pod spec whose container images are indexed for search
+POD_SPEC_PATHS = {
+    'pods': ('spec',),
+    'deployments': ('spec', 'template', 'spec'),
+    'inferenceservices': ('spec', 'predictor'),
+}
+
+def _container_images(resource_type: str, resource: Dict) -> List[str]:
+    pod_spec = resource
+    for key in POD_SPEC_PATHS.get(resource_type, ()):
+        pod_spec = pod_spec.get(key) or {}
+    if pod_spec is resource:
+        return []
+    images = []
+    for container in (pod_spec.get('initContainers') or []) + (pod_spec.get('containers') or []):
+        image = container.get('image')
+        if image and image not in images:
+            images.append(image)
+    return images
+
+def pod_requests(pod: Dict) -> Tuple[int, int, int]:
+    """CPU millicores, memory bytes and GPUs requested by a pod's regular containers, matching how the dashboards count them."""
+    cpu = memory = gpu = 0
+    for container in pod.get('spec', {}).get('containers', []):
+        requests = container.get('resources', {}).get('requests', {})
+        if requests:
+            cpu += parse_cpu_to_millicores(requests.get('cpu', '0'))
+            memory += parse_memory_to_bytes(requests.get('memory', '0'))
+            gpu += _parse_int(requests.get('nvidia.com/gpu', 0))
+    return cpu, memory, gpu
+
+def extract_typed_columns(resource_type: str, resource: Dict) -> Tuple:
+    """
+    Values for TYPED_COLUMNS, so hot filters and aggregates can run in SQL instead of parsing
+    data. Owner, creation time, labels (as JSON) and annotation keys apply to every type, images
+    to the types in POD_SPEC_PATHS; the rest are only filled in for pods (requests: see pod_requests).
+    """
+    metadata = resource.get('metadata', {})
+    owner_refs = metadata.get('ownerReferences') or []
+    owner = owner_refs[0] if owner_refs else {}
+    phase = node_name = cpu = memory = gpu = restarts = None
+
+    if resource_type == 'pods':
+        spec = resource.get('spec', {})
+        status = resource.get('status', {})
+        phase = status.get('phase')
+        node_name = spec.get('nodeName')
+        cpu, memory, gpu = pod_requests(resource)
+        restarts = sum(_parse_int(cs.get('restartCount', 0)) for cs in status.get('containerStatuses', []))
+
+    return (
+        phase,
+        node_name,
+        owner.get('kind'),
+        owner.get('name'),
+        cpu,
+        memory,
+        gpu,
+        metadata.get('creationTimestamp'),
+        restarts,
+        json.dumps(metadata['labels'], sort_keys=True) if metadata.get('labels') else None,
+        ' '.join(sorted(metadata['annotations'])) if metadata.get('annotations') else None,
+        ' '.join(_container_images(resource_type, resource)) or None,
+    )
+
+# Response projection (fields= / view= on the resource list APIs). Fields are dotted object paths;
+# the ones below are answered from resource columns, so a projection made only of them is built
+# without decoding the data column. The summary.* fields are not part of the objects: they expose
+# the owner and request totals computed into the typed columns.
+COLUMN_FIELDS = {
+    'metadata.name': 'name',
+    'metadata.namespace': 'namespace',
+    'metadata.creationTimestamp': 'creation_timestamp',
+    'metadata.labels': 'labels',
+    'status.phase': 'phase',
+    'spec.nodeName': 'node_name',
+    'summary.ownerKind': 'owner_kind',
+    'summary.ownerName': 'owner_name',
+    'summary.cpuRequestMillicores': 'cpu_request_millicores',
+    'summary.memoryRequestBytes': 'memory_request_bytes',
+    'summary.gpuRequest': 'gpu_request',
+    'summary.restartCount': 'restart_count',
+    'summary.images': 'images',
+}
+# Named field sets; 'full' returns whole objects
+RESOURCE_VIEWS = {
+    'summary': list(COLUMN_FIELDS),
+    'full': None,
+}
+# Cluster-scoped objects have no namespace; their namespace column only holds a placeholder
+CLUSTER_SCOPED_TYPES = {'nodes', 'namespaces'}
+FIELD_PATTERN = re.compile(r'^[A-Za-z0-9_-]+(\.[A-Za-z0-9_-]+)*$')
+
+def parse_fields(fields: Optional[str] = None, view: Optional[str] = None) -> Optional[List[str]]:
+    """
+    The field paths requested by a view name and/or a comma-separated fields list (added to the
+    view's fields), or None for whole objects. Raises ValueError for unknown views or bad paths.
+    """
+    if view and view not in RESOURCE_VIEWS:
+        raise ValueError(f"Unknown view: {view}")
+    paths = list(RESOURCE_VIEWS[view] or []) if view else []
+    for path in (fields or '').split(','):
+        path = path.strip()
+        if not path:
+            continue
+        if not FIELD_PATTERN.match(path):
+            raise ValueError(f"Invalid field: {path!r}")
+        if path not in paths:
+            paths.append(path)
+    if not paths:
+        return None
+    # Every projected object keeps what identifies it
+    for path in ('metadata.name', 'metadata.namespace'):
+        if path not in paths:
+            paths.insert(0, path)
+    return paths
+
+def _set_path(target: Dict, keys: List[str], value) -> None:
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    target[keys[-1]] = value
+
+def project_fields(resource_type: str, paths: List[str], columns: Dict, resource: Optional[Dict] = None) -> Dict:
+    """
+    Build the projected object for paths: COLUMN_FIELDS from the row's column values, any other
+    path copied from the decoded resource. Fields that are not set are left out, as in the object.
+    """
+    projected = {}
+    for path in paths:
+        keys = path.split('.')
+        column = COLUMN_FIELDS.get(path)
+        if column:
+            value = columns.get(column)
+            if value is None or (column == 'namespace' and resource_type in CLUSTER_SCOPED_TYPES):
+                continue
+            if column == 'labels':
+                value = json.loads(value)
+            elif column == 'images':
+                value = value.split(' ')
+        else:
+            value = resource
+            for key in keys:
+                if not isinstance(value, dict) or key not in value:
+                    value = None
+                    break
+                value = value[key]
+            if value is None:
+                continue
+        _set_path(projected, keys, value)
+    return projected
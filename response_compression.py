@@ -0,0 +1,89 @@
+import gzip
+import logging
+import os
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# brotli is optional; without it responses are only gzip-compressed
+try:
+    import brotli
+    brotli_available = True
+except ImportError:
+    brotli_available = False
+
+RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', 'auto').lower()
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.environ.get('RESPONSE_COMPRESSION_MIN_BYTES', 1024))
+# Levels chosen for dynamic responses: most of the ratio at a fraction of the top levels' cost
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+COMPRESSIBLE_MIMETYPES = {'application/json'}
+
+def _allowed_encodings(compression: str) -> list:
+    """Encodings the server may use, in order of preference."""
+    if compression in ('off', 'none'):
+        return []
+    if compression == 'gzip':
+        return ['gzip']
+    if compression not in ('auto', 'br'):
+        logger.warning(f"Unknown RESPONSE_COMPRESSION {compression}, using auto")
+    return (['br'] if brotli_available else []) + ['gzip']
+
+ALLOWED_ENCODINGS = _allowed_encodings(RESPONSE_COMPRESSION)
+
+def negotiate_encoding(accept_encoding: str, allowed: list = ALLOWED_ENCODINGS) -> Optional[str]:
+    """
+    Pick the content coding for a request from its Accept-Encoding header: the client's
+    highest-q allowed coding, ties broken by the server's preference. None means identity.
+    """
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    best, best_q = None, 0.0
+    for coding in allowed:
+        q = accepted.get(coding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+def compress_response(response, accept_encoding: str):
+    """
+    Compress a buffered JSON response of at least RESPONSE_COMPRESSION_MIN_BYTES for clients that
+    accept it. Streamed and file responses, errors and already-encoded bodies are left alone.
+    """
+    if (not ALLOWED_ENCODINGS or response.status_code != 200 or response.direct_passthrough
+            or response.is_streamed or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < RESPONSE_COMPRESSION_MIN_BYTES:
+        return response
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None:
+        return response
+
+    response.set_data(compress_body(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    # The encoded bytes differ from the identity representation, so a strong tag becomes weak
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,67 @@
+import json
+import logging
+import os
+from typing import Any, Callable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# orjson is optional; without it everything is (de)serialized with the json module
+try:
+    import orjson
+    orjson_available = True
+except ImportError:
+    orjson_available = False
+
+JSON_SERIALIZER = os.environ.get('JSON_SERIALIZER', 'auto').lower()
+
+def resolve_serializer(name: str) -> str:
+    """Validate a JSON_SERIALIZER value: 'auto' picks orjson when it is installed."""
+    if name in ('', 'auto'):
+        return 'orjson' if orjson_available else 'json'
+    if name == 'orjson' and not orjson_available:
+        logger.warning("JSON_SERIALIZER=orjson but the orjson package is not installed, using json")
+        return 'json'
+    if name not in ('orjson', 'json'):
+        logger.warning(f"Unknown JSON_SERIALIZER {name}, using json")
+        return 'json'
+    return name
+
+class JsonSerializer:
+    """
+    Compact JSON encoding and decoding through orjson or the json module. Output of both is
+    interchangeable (UTF-8, non-ASCII characters unescaped as orjson writes them); values orjson
+    cannot encode (integers beyond 64 bits, sets passed to a default...) are retried with the
+    json module, so switching serializers never loses data.
+    """
+
+    def __init__(self, name: str = JSON_SERIALIZER):
+        self.name = resolve_serializer(name)
+
+    def dumps_bytes(self, obj: Any, sort_keys: bool = False, default: Optional[Callable] = None) -> bytes:
+        if self.name == 'orjson':
+            option = orjson.OPT_NON_STR_KEYS
+            if sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if default is not None:
+                # Let the caller's default format datetimes, as the json module would
+                option |= orjson.OPT_PASSTHROUGH_DATETIME
+            try:
+                return orjson.dumps(obj, default=default, option=option)
+            except TypeError:
+                pass
+        return json.dumps(obj, sort_keys=sort_keys, default=default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def dumps(self, obj: Any, sort_keys: bool = False, default: Optional[Callable] = None) -> str:
+        if self.name == 'orjson':
+            return self.dumps_bytes(obj, sort_keys, default).decode('utf-8')
+        return json.dumps(obj, sort_keys=sort_keys, default=default, separators=(',', ':'), ensure_ascii=False)
+
+    def loads(self, data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch either the same way
+        if self.name == 'orjson':
+            return orjson.loads(data)
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+serializer = JsonSerializer()
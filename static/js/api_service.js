@@ -1,5 +1,29 @@
 // api_service.js
 
+// Last body and ETag of each GET endpoint fetched with fetchWithETag, keyed by URL
+const etagCache = new Map();
+
+// GET a cache-backed endpoint conditionally: the server answers 304 while its data generation is
+// unchanged, and the body from the previous response is returned as a fresh Response instead
+function fetchWithETag(url) {
+    const cached = etagCache.get(url);
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+    return fetch(url, { headers })
+        .then(response => {
+            if (response.status === 304 && cached) {
+                return new Response(cached.body, { status: 200, headers: { 'Content-Type': 'application/json' } });
+            }
+            const etag = response.headers.get('ETag');
+            if (response.ok && etag) {
+                return response.text().then(body => {
+                    etagCache.set(url, { etag, body });
+                    return new Response(body, { status: response.status, headers: response.headers });
+                });
+            }
+            return response;
+        });
+}
+
 // Fetch cluster capacity information
 function fetchClusterCapacity() {
     console.log('Fetching cluster capacity information...');
@@ -77,6 +101,17 @@ function fetchResourceCount(resourceType, namespace = 'all') {
         });
 }
 
+// Object fields the resource tables render beyond the summary view (name, namespace, age, labels,
+// phase, node and request totals), so list requests skip the rest of each object
+const RESOURCE_LIST_FIELDS = {
+    pods: '',
+    services: 'spec.type,spec.clusterIP,spec.ports,status.loadBalancer',
+    inferenceservices: 'status.url,status.conditions',
+    deployments: 'status.readyReplicas,status.replicas',
+    configmaps: 'data',
+    secrets: 'type,data'
+};
+
 // Fetch a specific page of resources (or potentially all if pageSize is large)
 function fetchResourcePage(resourceType, namespace = 'all', page = 1, pageSize = 50) {
     console.log(`Fetching page ${page} size ${pageSize} for ${resourceType} in ${namespace}`);
@@ -103,6 +138,10 @@ function fetchResourcePage(resourceType, namespace = 'all', page = 1, pageSize =
     // critical_only parameter removed for simplicity, can be added back if needed
     formData.append('page', page.toString());
     formData.append('page_size', pageSize.toString());
+    if (resourceType in RESOURCE_LIST_FIELDS) {
+        formData.append('view', 'summary');
+        formData.append('fields', RESOURCE_LIST_FIELDS[resourceType]);
+    }
 
     const url = window.app.getRelativeUrl('/get_resources');
     return fetch(url, { method: 'POST', body: formData })
@@ -189,26 +228,16 @@ function refreshDatabase() {
         statusDiv.innerHTML = `<div class="alert alert-info"><i class="fas fa-spinner fa-spin"></i> Refreshing database...</div>`;
     }
 
+    // The server starts (or joins) a background refresh job and answers with its id right away
     const url = window.app.getRelativeUrl('/api/refresh-database');
     fetch(url, { method: 'POST' })
     .then(response => response.json())
     .then(data => {
-        if (data.success) {
-            if (statusDiv) statusDiv.innerHTML = `<div class="alert alert-success"><i class="fas fa-check-circle"></i> ${data.message}</div>`;
-            else alert(`Database refreshed: ${data.message}`);
-            
-            // Refresh current view based on active tab
-            if (window.app.state.navigation.activeTab === 'home' && typeof initializeHomePage === 'function') {
-                initializeHomePage();
-            } else if (window.app.state.navigation.activeTab === 'resources' && typeof loadResourcesPage === 'function') {
-                loadResourcesPage();
-            }
-            // Add more conditions for other tabs if necessary
+        if (data.success && data.job_id) {
+            waitForDatabaseRefresh(data.job_id, statusDiv);
         } else {
-            if (statusDiv) statusDiv.innerHTML = `<div class="alert alert-danger"><i class="fas fa-exclamation-circle"></i> Error: ${data.error}</div>`;
-            else alert(`Error refreshing database: ${data.error}`);
+            showDatabaseRefreshResult(data, statusDiv);
         }
-        if (statusDiv) setTimeout(() => { statusDiv.style.display = 'none'; }, 5000);
     })
     .catch(error => {
         if (statusDiv) statusDiv.innerHTML = `<div class="alert alert-danger"><i class="fas fa-exclamation-circle"></i> Error: ${error}</div>`;
@@ -217,6 +246,67 @@ function refreshDatabase() {
     });
 }
 
+// Follow a refresh job through Socket.IO progress events, polling its status as a fallback
+function waitForDatabaseRefresh(jobId, statusDiv) {
+    const socket = window.app.socket;
+    let finished = false;
+    let pollTimer = null;
+
+    const onProgress = (data) => {
+        if (data.job_id !== jobId || finished || !statusDiv) return;
+        const detail = data.stage === 'environment_metrics'
+            ? 'collecting environment metrics'
+            : `${data.completed}/${data.total} resource types`;
+        statusDiv.innerHTML = `<div class="alert alert-info"><i class="fas fa-spinner fa-spin"></i> Refreshing database... (${detail})</div>`;
+    };
+    const finish = (job) => {
+        if (finished) return;
+        finished = true;
+        clearInterval(pollTimer);
+        if (socket) {
+            socket.off('database_refresh_progress', onProgress);
+            socket.off('database_refresh_complete', onComplete);
+        }
+        showDatabaseRefreshResult(job, statusDiv);
+    };
+    const onComplete = (data) => {
+        if (data.job_id === jobId) finish(data);
+    };
+
+    if (socket) {
+        socket.on('database_refresh_progress', onProgress);
+        socket.on('database_refresh_complete', onComplete);
+    }
+    pollTimer = setInterval(() => {
+        fetch(window.app.getRelativeUrl(`/api/refresh-database/${jobId}`))
+        .then(response => response.json())
+        .then(job => {
+            if (job.status && job.status !== 'running') finish(job);
+        })
+        .catch(error => console.warn('Error polling database refresh status:', error));
+    }, 5000);
+}
+
+function showDatabaseRefreshResult(data, statusDiv) {
+    if (data.success) {
+        if (statusDiv) statusDiv.innerHTML = `<div class="alert alert-success"><i class="fas fa-check-circle"></i> ${data.message}</div>`;
+        else alert(`Database refreshed: ${data.message}`);
+        
+        // Refresh current view based on active tab
+        if (window.app.state.navigation.activeTab === 'home' && typeof initializeHomePage === 'function') {
+            initializeHomePage();
+        } else if (window.app.state.navigation.activeTab === 'resources' && typeof loadResourcesPage === 'function') {
+            loadResourcesPage();
+        }
+        // Add more conditions for other tabs if necessary
+    } else {
+        const error = data.error || data.message;
+        if (statusDiv) statusDiv.innerHTML = `<div class="alert alert-danger"><i class="fas fa-exclamation-circle"></i> Error: ${error}</div>`;
+        else alert(`Error refreshing database: ${error}`);
+    }
+    if (statusDiv) setTimeout(() => { statusDiv.style.display = 'none'; }, 5000);
+}
+
 // === Functions moved from resource_data_logic.js ===
 
 // Main function to fetch resource data
@@ -668,7 +668,7 @@ function loadAllGpuData() {
 function loadGpuOverview() {
     console.log('Loading GPU utilization overview...');
     
-    fetch('/api/gpu-utilization')
+    fetchWithETag('/api/gpu-utilization')
         .then(response => response.json())
         .then(data => {
             if (data.error) {
@@ -828,7 +828,7 @@ function updateGpuAllocationChart(data) {
 function loadGpuNodes() {
     console.log('Loading GPU nodes overview...');
     
-    fetch('/api/gpu-nodes')
+    fetchWithETag('/api/gpu-nodes')
         .then(response => response.json())
         .then(data => {
             if (data.error) {
@@ -929,7 +929,7 @@ function renderGpuNodes(nodes) {
 function loadGpuQueue() {
     console.log('Loading GPU queue information...');
     
-    fetch('/api/gpu-queue')
+    fetchWithETag('/api/gpu-queue')
         .then(response => response.json())
         .then(data => {
             if (data.error) {
@@ -6,7 +6,7 @@ async function initializeHomePage() {
 
     // Fetch the detailed cluster metrics for the new dashboard cards
     try {
-        const response = await fetch('/api/environment_metrics');
+        const response = await fetchWithETag('/api/environment_metrics');
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
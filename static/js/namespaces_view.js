@@ -11,7 +11,7 @@ $(document).ready(function() {
 
     // Refresh button
     $('#refreshNamespaces').on('click', function() {
-        loadNamespacesViewData();
+        loadNamespacesViewData(true);
     });
 
     // Filter input
@@ -88,13 +88,14 @@ $(document).ready(function() {
     }
 });
 
-// Load detailed namespaces data for the dedicated view
-function loadNamespacesViewData() {
+// Load detailed namespaces data for the dedicated view.
+// Served from the cache; live reads the cluster instead, e.g. right after a namespace was changed.
+function loadNamespacesViewData(live = false) {
     $('#namespacesLoading').show();
     $('#namespacesTableCard').hide();
     $('#noNamespacesMessage').hide();
 
-    const url = window.app.getRelativeUrl('/get_namespace_details');
+    const url = window.app.getRelativeUrl(live ? '/get_namespace_details?live=true' : '/get_namespace_details');
     $.ajax({
         url: url,
         type: 'GET',
@@ -329,7 +330,7 @@ function saveNamespaceChanges() {
                 // Refresh data in modal and main view
                 loadNamespaceEditData(namespace);
                 loadNamespaceDescribe(namespace);
-                loadNamespacesViewData(); 
+                loadNamespacesViewData(true); 
             } else {
                 Swal.fire('Error', response.error || 'Unknown error updating namespace.', 'error');
             }
@@ -363,7 +364,7 @@ function deleteNamespace() {
             if (response.output || response.success) {
                 Swal.fire('Deleted!', `Namespace "${namespace}" deleted.`, 'success');
                 $('#namespaceEditModal').modal('hide');
-                loadNamespacesViewData(); // Refresh the main list
+                loadNamespacesViewData(true); // Refresh the main list
             } else {
                 Swal.fire('Error', response.error || 'Unknown error deleting namespace.', 'error');
                  $('#confirmNamespaceDelete').prop('disabled', false).html('<i class="fas fa-trash-alt me-2"></i> Confirm Delete');
@@ -534,7 +535,7 @@ ${Object.entries(annotations).map(([key, value]) => `    ${key}: "${value}"`).jo
             }
             
             // Refresh the namespaces list
-            loadNamespacesViewData();
+            loadNamespacesViewData(true);
         },
         error: function(xhr, status, error) {
             console.error('Error creating namespace:', xhr.responseText);
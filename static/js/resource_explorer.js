@@ -759,7 +759,13 @@ function getResourceUsage(item) {
         return 0; // Unknown unit or format
     }
 
-    if (item.spec && item.spec.containers) {
+    // Items fetched with view=summary carry the request totals computed on the server
+    if (item.summary && item.summary.cpuRequestMillicores !== undefined) {
+        cpu = item.summary.cpuRequestMillicores / 1000;
+        gpu = item.summary.gpuRequest || 0;
+        totalMemoryMi = (item.summary.memoryRequestBytes || 0) / (1024 * 1024);
+    }
+    else if (item.spec && item.spec.containers) {
         item.spec.containers.forEach(container => {
             if (container.resources && container.resources.requests) {
                 const requests = container.resources.requests;
@@ -104,7 +104,7 @@ document.addEventListener('DOMContentLoaded', function() {
         if (nodesError) nodesError.style.display = 'none';
         nodesContainer.innerHTML = '';
         
-        fetch('/api/nodes')
+        fetchWithETag('/api/nodes')
             .then(response => {
                 if (!response.ok) {
                     throw new Error(`HTTP error! status: ${response.status}`);